@@ -1,7 +1,7 @@
 from typing import Dict, Any
 
 from app.agents.document_generator.fact_mapper import map_facts_to_template
-from app.agents.document_generator.section_generator import generate_sections, SECTION_SEPARATOR
+from app.agents.document_generator.section_generator import generate_sections, SECTION_SEPARATOR, SectionGenerationError  # noqa: F401
 from app.agents.document_generator.consistency_checker import check_consistency
 from app.agents.document_generator.document_formatter import format_document, normalize_clause_style
 
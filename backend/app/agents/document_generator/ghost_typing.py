@@ -33,7 +33,8 @@ class GhostTypingEngine:
 
 **Next Sentence:**
 """
-        suggestion = await llm_client.generate(prompt)
+        # Suggestions are sampled: asking again should offer a new one.
+        suggestion = await llm_client.generate(prompt, caller="ghost_typing", use_cache=False)
         
         # Clean up suggestion (remove quotes, extra whitespace)
         suggestion = suggestion.strip().strip('"').strip("'")
@@ -1,13 +1,20 @@
 
-import time
 import asyncio
-from typing import Optional, Dict, Any, List
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import backoff
 import google.generativeai as genai
-from groq import Groq
+from groq import AsyncGroq
 
 from app.core.config import settings
+from app.services.llm_cache import LLMResponseCache, llm_response_cache
+from app.services.llm_scheduler import (
+    LLMKeyScheduler,
+    current_llm_priority,
+    is_rate_limit_error,
+    retry_after_seconds,
+)
+from app.services.single_flight import SingleFlight, llm_single_flight
 
 # --- Monkeypatch for httpx 0.28.1 compatibility with legacy SDKs ---
 import httpx
@@ -29,6 +36,12 @@ def patched_async_httpx_init(self, *args, **kwargs):
 httpx.AsyncClient.__init__ = patched_async_httpx_init
 # ------------------------------------------------------------------
 
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Configuration
 # Collect all available Groq keys
 ALL_GROQ_KEYS = [
@@ -52,44 +65,80 @@ if GEMINI_API_KEY:
     except:
         pass
 
-# Rate limiting
-class SimpleRateLimiter:
-    def __init__(self, rate_limit: int, period: int):
-        self.rate_limit = rate_limit
-        self.period = period
-        self.requests = []
-
-    async def wait(self):
-        while True:
-            now = time.time()
-            self.requests = [req for req in self.requests if now - req < self.period]
-            if len(self.requests) < self.rate_limit:
-                self.requests.append(now)
-                break
-            await asyncio.sleep(self.period - (now - self.requests[0]))
-
-# Groq has a rate limit of 14400 requests per day for free tier, but 30 requests per minute usually.
-groq_rate_limiter = SimpleRateLimiter(rate_limit=25, period=60)
+GROQ_MODEL = "llama-3.3-70b-versatile"
+# Sampling parameters of every Groq call; part of the response cache key.
+GROQ_SAMPLING = {"temperature": 0.7, "max_tokens": 4096}
+# Tokens a call is charged up front (~4 characters per prompt token plus a
+# typical completion); settled against the reported usage afterwards.
+EXPECTED_COMPLETION_TOKENS = 1024
+# Scheduler lane of each caller: ghost typing is waited on keystroke by
+# keystroke, research and drafting by a user on the page. Work run under
+# `llm_priority("background")` (evaluation, ingestion) overrides these.
+CALLER_PRIORITIES = {
+    "ghost_typing": "interactive",
+    "research": "standard",
+    "generation": "standard",
+    "extraction": "standard",
+}
+# Ghost typing and document generation pass `use_cache=False`: their output
+# is sampled, and asking again must give a fresh suggestion or draft. Their
+# calls show up as bypasses in the response cache's per-caller stats.
+
+
+def estimate_groq_tokens(prompt: str) -> int:
+    return len(prompt) // 4 + EXPECTED_COMPLETION_TOKENS
+
+
+def build_groq_http_client() -> httpx.AsyncClient:
+    """
+    Connection pool shared by every Groq key: keep-alive connections (and
+    HTTP/2 multiplexing when `h2` is installed) are reused across calls,
+    and the connection count is bounded for the whole process.
+    """
+    return httpx.AsyncClient(
+        http2=settings.GROQ_HTTP2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings.GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(settings.GROQ_TIMEOUT_SECONDS, connect=5.0),
+        follow_redirects=True,
+    )
+
+
+def resolve_priority(caller: str, priority: Optional[str] = None) -> str:
+    return priority or current_llm_priority() or CALLER_PRIORITIES.get(caller, "standard")
+
 
 class LLMClient:
-    def __init__(self, groq_client: Optional[object] = None, gemini_model: Optional[genai.GenerativeModel] = None, use_project_keys: bool = False):
+    def __init__(
+        self,
+        groq_client: Optional[object] = None,
+        gemini_model: Optional[genai.GenerativeModel] = None,
+        use_project_keys: bool = False,
+        response_cache: Optional[LLMResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+    ):
+        self.response_cache = response_cache if response_cache is not None else llm_response_cache
+        self.single_flight = single_flight if single_flight is not None else llm_single_flight
         if use_project_keys and PROJECT_GROQ_KEYS:
-            self.groq_clients = [Groq(api_key=k) for k in PROJECT_GROQ_KEYS]
-            print(f"Groq project clients initialized with {len(self.groq_clients)} keys.")
+            self.groq_api_keys = list(PROJECT_GROQ_KEYS)
+            print(f"Groq project clients initialized with {len(self.groq_api_keys)} keys.")
         elif ALL_GROQ_KEYS:
-            self.groq_clients = [Groq(api_key=k) for k in ALL_GROQ_KEYS]
-            print(f"Groq clients initialized with {len(self.groq_clients)} keys.")
+            self.groq_api_keys = list(ALL_GROQ_KEYS)
+            print(f"Groq clients initialized with {len(self.groq_api_keys)} keys.")
         else:
-            self.groq_clients = []
+            self.groq_api_keys = []
+        self._groq_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._build_groq_clients()
 
-        # Scale rate limiter based on number of keys (assuming ~25 RPM per key)
-        num_keys = len(self.groq_clients)
-        if num_keys > 0:
-            groq_rate_limiter.rate_limit = 25 * num_keys
-            print(f"Groq rate limit scaled to {groq_rate_limiter.rate_limit} requests per minute.")
-
-        self.groq_key_index = 0
-        self.groq_client = self.groq_clients[0] if self.groq_clients else None
+        # Every key gets its own request and token budget.
+        self.groq_scheduler = LLMKeyScheduler(
+            len(self.groq_clients),
+            requests_per_minute=settings.GROQ_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.GROQ_TOKENS_PER_MINUTE,
+        )
 
         if GEMINI_API_KEY and GEMINI_API_KEY.strip():
             print(f"Gemini configuring with key: {GEMINI_API_KEY[:4]}...{GEMINI_API_KEY[-4:]}")
@@ -126,64 +175,97 @@ class LLMClient:
             self.gemini_model = None
 
 
-    def _get_next_groq_client(self) -> Groq:
-        """Rotate to next Groq client for load balancing."""
-        if len(self.groq_clients) <= 1:
-            return self.groq_client
-        self.groq_key_index = (self.groq_key_index + 1) % len(self.groq_clients)
-        client = self.groq_clients[self.groq_key_index]
-        print(f"Switching to Groq key index: {self.groq_key_index + 1}/{len(self.groq_clients)}")
-        return client
+    def _build_groq_clients(self) -> None:
+        self._groq_http = build_groq_http_client() if self.groq_api_keys else None
+        self.groq_clients = [AsyncGroq(api_key=k, http_client=self._groq_http) for k in self.groq_api_keys]
+        self.groq_client = self.groq_clients[0] if self.groq_clients else None
 
-    @backoff.on_exception(backoff.expo, Exception, max_tries=5)
-    async def generate_with_groq(self, prompt: str, model: str = "llama-3.3-70b-versatile") -> str:
-        if not self.groq_clients:
-            raise ValueError("Groq client not configured. Please provide a GROQ_API_KEY.")
+    async def _groq_clients_for_loop(self) -> List[AsyncGroq]:
+        """
+        The key clients for the running event loop. Pooled connections
+        belong to the loop that opened them, so a later loop (another
+        `asyncio.run` in a script) gets a fresh pool and the previous one
+        is closed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._groq_loop is None:
+            self._groq_loop = loop
+        elif self._groq_loop is not loop:
+            stale_http, stale_loop = self._groq_http, self._groq_loop
+            self._groq_loop = loop
+            self._build_groq_clients()
+            await self._close_stale_pool(stale_http, stale_loop)
+        return self.groq_clients
 
-        await groq_rate_limiter.wait()
+    @staticmethod
+    async def _close_stale_pool(http: Optional[httpx.AsyncClient], loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Closes a pool left by an earlier event loop. A pool whose loop still
+        runs (in another thread) may have calls in flight and is only
+        dropped. Connections of a closed loop cannot always be shut from
+        this one; they are then released when the dropped pool is collected.
+        """
+        if http is None or (loop.is_running() and not loop.is_closed()):
+            return
+        try:
+            await http.aclose()
+        except Exception as e:
+            print(f"Previous Groq connection pool not closed cleanly: {e}")
 
-        # Rotate to next client
-        current_client = self._get_next_groq_client()
+    async def aclose(self) -> None:
+        if self._groq_http is not None:
+            await self._groq_http.aclose()
 
-        # Run synchronous Groq call in a thread pool to avoid blocking FastAPI
-        loop = asyncio.get_event_loop()
-        try:
-            print(f"Calling Groq with model: {model}")
-            chat_completion = await loop.run_in_executor(
-                None,
-                lambda: current_client.chat.completions.create(
+    async def _call_groq(self, prompt: str, model: str, stream: bool = False, priority: str = "standard") -> Any:
+        """
+        Runs one Groq completion on the key the scheduler picks. A 429 cools
+        that key down for its `retry-after` and the call moves to the next
+        key with headroom; other errors propagate. `priority` is the
+        scheduler lane the call queues in.
+        """
+        if not self.groq_clients:
+            raise ValueError("Groq client not configured. Please provide a GROQ_API_KEY.")
+
+        estimated = estimate_groq_tokens(prompt)
+        clients = await self._groq_clients_for_loop()
+        for attempt in range(len(clients)):
+            key_index = await self.groq_scheduler.acquire(estimated, priority)
+            print(f"Calling Groq with model: {model} (key {key_index + 1}/{len(clients)})")
+            try:
+                chat_completion = await clients[key_index].chat.completions.create(
                     messages=[{"role": "user", "content": prompt}],
                     model=model,
-                    temperature=0.7,
-                    max_tokens=4096,
+                    stream=stream,
+                    **GROQ_SAMPLING,
                 )
-            )
-            content = chat_completion.choices[0].message.content
-            if not content:
-                raise ValueError("Groq returned empty content")
-            return content
+            except Exception as e:
+                if not is_rate_limit_error(e):
+                    raise
+                # A rejected request used none of the key's tokens.
+                self.groq_scheduler.refund(key_index, estimated)
+                self.groq_scheduler.cool_down(key_index, retry_after_seconds(e))
+                if attempt == len(clients) - 1:
+                    raise
+                print(f"Groq key {key_index + 1} rate limited: {e}")
+                continue
+            usage = getattr(chat_completion, "usage", None)
+            if usage is not None and getattr(usage, "total_tokens", None):
+                self.groq_scheduler.record_usage(key_index, usage.total_tokens, estimated)
+            return chat_completion
+
+    # Rate limits are not retried here: `_call_groq` has already tried every
+    # key and cooled each one down, so the caller falls back to Gemini.
+    @backoff.on_exception(backoff.expo, Exception, max_tries=5, giveup=is_rate_limit_error)
+    async def generate_with_groq(self, prompt: str, model: str = GROQ_MODEL, priority: str = "standard") -> str:
+        try:
+            chat_completion = await self._call_groq(prompt, model, priority=priority)
         except Exception as e:
-            error_str = str(e)
-            print(f"Groq call failed: {error_str}")
-            if "rate_limit" in error_str.lower() or "429" in error_str:
-                # Try other keys on rate limit
-                for _ in range(len(self.groq_clients) - 1):
-                    current_client = self._get_next_groq_client()
-                    try:
-                        print(f"Retrying Groq with fallback key index: {self.groq_key_index + 1}")
-                        chat_completion = await loop.run_in_executor(
-                            None,
-                            lambda c=current_client: c.chat.completions.create(
-                                messages=[{"role": "user", "content": prompt}],
-                                model=model,
-                                temperature=0.7,
-                                max_tokens=4096,
-                            )
-                        )
-                        return chat_completion.choices[0].message.content
-                    except Exception:
-                        continue
+            print(f"Groq call failed: {e}")
             raise
+        content = chat_completion.choices[0].message.content
+        if not content:
+            raise ValueError("Groq returned empty content")
+        return content
 
     @backoff.on_exception(backoff.expo, Exception, max_tries=3)
     async def generate_with_gemini(self, prompt: str) -> str:
@@ -235,18 +317,149 @@ class LLMClient:
             raise last_error
         return "Error: All Gemini model candidates failed."
 
-    async def generate(self, prompt: str, use_groq: bool = True) -> str:
+    def _model_key(self, model: str, prompt: str) -> str:
+        # Groq calls always run with GROQ_SAMPLING, Gemini with its defaults.
+        return self.response_cache.make_key(model, prompt, GROQ_SAMPLING if model.startswith("groq:") else None)
+
+    def _gemini_label(self) -> str:
+        return f"gemini:{self.gemini_model.model_name}"
+
+    def _cache_key(self, prompt: str, use_groq: bool) -> Optional[tuple]:
+        """
+        (key, model) for the provider this call would try first, or None
+        when none is configured. Responses are stored under the provider
+        that actually answered, so a fallback answer is only served to
+        calls that would go to that provider first.
+        """
+        if self.groq_client and use_groq:
+            model = f"groq:{GROQ_MODEL}"
+        elif self.gemini_model:
+            model = self._gemini_label()
+        else:
+            return None
+        return self._model_key(model, prompt), model
+
+    async def generate(
+        self,
+        prompt: str,
+        use_groq: bool = True,
+        caller: str = "default",
+        use_cache: bool = True,
+        priority: Optional[str] = None,
+    ) -> str:
+        """
+        Generates with Groq, falling back to Gemini. Identical prompts (up to
+        whitespace) for the same model and sampling parameters are answered
+        from the response cache; `caller` labels the lookup in the cache's
+        hit-rate stats, and `use_cache=False` always calls the model (counted
+        as a bypass for `caller`).
+        Concurrent calls with the same cache key share one model call.
+        Groq calls queue in `priority`'s lane, defaulting to the active
+        `llm_priority` block, then to the caller's CALLER_PRIORITIES entry.
+        """
+        priority = resolve_priority(caller, priority)
+        cache_key = self._cache_key(prompt, use_groq) if use_cache and self.response_cache.enabled else None
+        if cache_key is None:
+            self.response_cache.record_bypass(caller)
+            response, _model = await self._generate_uncached(prompt, use_groq, priority)
+            return response
+        cached = await asyncio.to_thread(self.response_cache.get, cache_key[0], caller)
+        if cached is not None:
+            return cached
+
+        async def _generate_and_store() -> str:
+            response, model = await self._generate_uncached(prompt, use_groq, priority)
+            if response and not response.startswith("Error:"):
+                await asyncio.to_thread(self.response_cache.set, self._model_key(model, prompt), model, response)
+            return response
+
+        return await self.single_flight.do(cache_key[0], _generate_and_store)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        use_groq: bool = True,
+        caller: str = "default",
+        use_cache: bool = True,
+        priority: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streaming variant of `generate`: yields text chunks as the provider
+        produces them. Groq falls back to Gemini only if it fails before the
+        first chunk. Cached responses are yielded as a single chunk, and
+        completed streams are written to the response cache.
+        """
+        cache_key = self._cache_key(prompt, use_groq) if use_cache and self.response_cache.enabled else None
+        if cache_key is None:
+            self.response_cache.record_bypass(caller)
+        else:
+            cached = await asyncio.to_thread(self.response_cache.get, cache_key[0], caller)
+            if cached is not None:
+                yield cached
+                return
+
+        parts: List[str] = []
+        model = f"groq:{GROQ_MODEL}"
+        if self.groq_client and use_groq:
+            try:
+                async for chunk in self._stream_with_groq(prompt, priority=resolve_priority(caller, priority)):
+                    parts.append(chunk)
+                    yield chunk
+            except Exception as e:
+                if parts:
+                    raise
+                print(f"Groq stream failed, falling back to Gemini: {e}")
+        if not parts:
+            if not self.gemini_model:
+                raise ValueError("No viable LLM clients (Groq/Gemini) are configured or functional.")
+            print("Using Gemini for streaming generation...")
+            async for chunk in self._stream_with_gemini(prompt):
+                parts.append(chunk)
+                yield chunk
+            model = self._gemini_label()
+
+        response = "".join(parts)
+        if cache_key is not None and response:
+            await asyncio.to_thread(self.response_cache.set, self._model_key(model, prompt), model, response)
+
+    async def _stream_with_groq(
+        self, prompt: str, model: str = GROQ_MODEL, priority: str = "standard"
+    ) -> AsyncIterator[str]:
+        stream = await self._call_groq(prompt, model, stream=True, priority=priority)
+        async for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if text:
+                yield text
+
+    async def _stream_with_gemini(self, prompt: str) -> AsyncIterator[str]:
+        response = await self.gemini_model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+
+    async def _generate_uncached(
+        self, prompt: str, use_groq: bool = True, priority: str = "standard"
+    ) -> Tuple[str, str]:
+        """
+        (response, model label of the provider that produced it).
+        """
         # Try Groq first
         if self.groq_client and use_groq:
             try:
-                return await self.generate_with_groq(prompt)
+                return await self.generate_with_groq(prompt, priority=priority), f"groq:{GROQ_MODEL}"
             except Exception as e:
                 print(f"Groq failed, falling back to Gemini: {e}")
         
         # Fallback to Gemini
         if self.gemini_model:
             print("Using Gemini for generation...")
-            return await self.generate_with_gemini(prompt)
+            response = await self.generate_with_gemini(prompt)
+            # Read after the call: it may have moved to a fallback model.
+            return response, self._gemini_label()
         else:
             raise ValueError("No viable LLM clients (Groq/Gemini) are configured or functional.")
 
@@ -1,31 +1,74 @@
-from typing import List, Dict, Any
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
 
+from app.core.config import settings
 from app.services.llm_service import llm_service
 
+logger = logging.getLogger(__name__)
+
 SECTION_SEPARATOR = "\n---section---\n"
 
-async def generate_sections(template: str, case_facts: Dict[str, Any]) -> List[str]:
-    """Splits the template into sections and generates each section.
+
+class SectionGenerationError(RuntimeError):
+    """Raised when one or more template sections could not be generated.
+
+    `sections` holds every section in template order, with the raw template
+    text (placeholders included) where generation failed; `failed_sections`
+    lists the 1-based numbers of those sections and `errors` their causes.
+    """
+
+    def __init__(self, sections: List[str], failed_sections: List[int], errors: List[BaseException]):
+        self.sections = sections
+        self.failed_sections = failed_sections
+        self.errors = errors
+        numbers = ", ".join(str(number) for number in failed_sections)
+        super().__init__(f"Generation failed for section(s) {numbers} of {len(sections)}: {errors[0]}")
+
+async def generate_sections(
+    template: str, case_facts: Dict[str, Any], max_concurrency: Optional[int] = None
+) -> List[str]:
+    """Splits the template into sections and generates them concurrently.
+
+    At most `max_concurrency` sections (default SECTION_GENERATION_CONCURRENCY)
+    are in flight at once; each call still queues in the shared Groq key
+    scheduler. A failing section does not cancel the others, but any failure
+    raises SectionGenerationError once all have finished, so a draft with
+    unfilled template text is never returned as if it were complete.
 
     Args:
         template: The document template.
         case_facts: A dictionary of case facts.
+        max_concurrency: Override for the concurrency limit.
 
     Returns:
-        A list of generated sections.
+        A list of generated sections, in template order.
+
+    Raises:
+        SectionGenerationError: if any section failed.
     """
     sections = template.split(SECTION_SEPARATOR)
-    generated_sections = []
-
-    for section_template in sections:
-        # Here you could add more complex logic to generate each section,
-        # for example, by creating a specific prompt for each section.
-        # For now, we will just use the llm_service to fill the template.
-        
-        generated_section = await llm_service.generate_document(
-            case_facts=case_facts,
-            template=section_template
-        )
-        generated_sections.append(generated_section)
+    semaphore = asyncio.Semaphore(max(1, max_concurrency or settings.SECTION_GENERATION_CONCURRENCY))
+
+    async def _generate(section_template: str) -> str:
+        async with semaphore:
+            return await llm_service.generate_document(
+                case_facts=case_facts,
+                template=section_template
+            )
+
+    results = await asyncio.gather(*(_generate(section) for section in sections), return_exceptions=True)
 
+    generated_sections: List[str] = []
+    failed_sections: List[int] = []
+    errors: List[BaseException] = []
+    for idx, (section_template, result) in enumerate(zip(sections, results)):
+        if isinstance(result, BaseException):
+            logger.warning("Generation of section %d/%d failed: %s", idx + 1, len(sections), result)
+            failed_sections.append(idx + 1)
+            errors.append(result)
+            result = section_template
+        generated_sections.append(result)
+    if failed_sections:
+        raise SectionGenerationError(generated_sections, failed_sections, errors)
     return generated_sections
@@ -41,7 +41,7 @@ class LLMExtractor:
         
         try:
             # Using LLM (Groq prioritized)
-            response_text = await llm_client.generate(prompt, use_groq=True)
+            response_text = await llm_client.generate(prompt, use_groq=True, caller="extraction")
             # Robust JSON extraction using regex
             import re
             json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
@@ -1,11 +1,24 @@
+import asyncio
 import logging
 import re
-from html import unescape
-from typing import List, Dict, Any, Optional
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
 
 from app.agents.document_generator.llm_client import llm_client
-from app.services.legal_corpus_catalog import get_legal_research_act_catalog, normalize_legal_title
+from app.agents.legal_research.content_normalization import (
+    doc_search_fields,
+    normalize_content,
+    normalized_prefix,
+)
+from app.services.context_packer import context_packer, context_token_budget
+from app.services.legal_corpus_catalog import match_act_in_text, normalize_legal_title
 from app.services.retrieval_service import RetrievalService
+from app.services.semantic_answer_cache import (
+    SemanticAnswerCache,
+    semantic_answer_cache,
+    source_key,
+)
 
 logger = logging.getLogger(__name__)
 RESEARCH_STOPWORDS = {
@@ -18,20 +31,32 @@ SUBSTANTIVE_QUERY_TERMS = {
     "grounds", "injunction", "specific", "performance", "dishonour", "cheque",
     "limitation", "partnership", "company", "companies", "rent", "tenant", "landlord",
 }
+# Per-term rerank weights for a match in the chunk text, act name, title and
+# section number.
+RERANK_FIELD_WEIGHTS = np.array([5.0, 8.0, 6.0, 4.0])
+# Cap per retrieved chunk in the research prompt (~4000 characters).
+MAX_TOKENS_PER_DOC = 1000
+
+class _PreparedAnswer(NamedTuple):
+    result: Optional[Dict[str, Any]] = None
+    prompt: str = ""
+    sources: List[Dict[str, Any]] = []
+    query_vector: Any = None
+    source_ids: List[str] = []
+    cache_scope: Tuple[str, int] = ("", 0)
+
 
 class LegalResearchAgent:
     """
     An agent that performs legal research using a persistent vector store (RAG).
     """
 
-    def __init__(self, persist_directory: str = "chroma_db"):
+    def __init__(self, persist_directory: str = "chroma_db", answer_cache: Optional[SemanticAnswerCache] = None):
         self.retrieval_service = RetrievalService(persist_directory=persist_directory)
+        self.answer_cache = answer_cache if answer_cache is not None else semantic_answer_cache
 
     def _normalize_content(self, raw_content: str) -> str:
-        content = re.sub(r"<[^>]+>", " ", raw_content or "")
-        content = unescape(content)
-        content = re.sub(r"\s+", " ", content).strip()
-        return content.encode("ascii", errors="ignore").decode("ascii")
+        return normalize_content(raw_content)
 
     def _extract_query_terms(self, query: str) -> List[str]:
         tokens = re.findall(r"[a-z0-9]+", query.lower())
@@ -44,13 +69,7 @@ class LegalResearchAgent:
         return "dense"
 
     def _match_act_from_query(self, query: str) -> Optional[Dict[str, Any]]:
-        normalized_query = normalize_legal_title(query)
-        for entry in get_legal_research_act_catalog():
-            candidates = [entry["name"], *entry.get("aliases", [])]
-            normalized_candidates = [normalize_legal_title(candidate) for candidate in candidates]
-            if any(candidate in normalized_query for candidate in normalized_candidates):
-                return entry
-        return None
+        return match_act_in_text(query)
 
     def _build_focus_queries(self, query: str) -> List[str]:
         focus_queries = [query]
@@ -80,37 +99,57 @@ class LegalResearchAgent:
             seen_queries.add(key)
         return deduped_queries
 
+    def _score_docs(self, query_terms: List[str], docs: List[Any]) -> np.ndarray:
+        """
+        Scores every candidate in one pass over a (docs x query terms x
+        fields) match tensor built from the token sets stored at ingestion,
+        so the cost does not grow with chunk length. Each doc's matching
+        query terms come from set intersections mapped to term indices, and
+        the tensor is filled with a single scatter. Chunk text is only
+        normalized for the "short title" check, and only for chunks holding
+        both words.
+        """
+        term_index = {term: col for col, term in enumerate(dict.fromkeys(query_terms))}
+        term_counts = np.zeros(len(term_index))
+        np.add.at(term_counts, [term_index[term] for term in query_terms], 1.0)
+        rows: List[int] = []
+        cols: List[int] = []
+        field_cols: List[int] = []
+        penalties = np.zeros(len(docs))
+        for row, doc in enumerate(docs):
+            fields = doc_search_fields(doc)
+            field_terms = (fields.content_terms, fields.act_terms, fields.title_terms, {fields.section})
+            for field_col, terms in enumerate(field_terms):
+                hits = [term_index[term] for term in term_index.keys() & terms]
+                rows.extend([row] * len(hits))
+                cols.extend(hits)
+                field_cols.extend([field_col] * len(hits))
+            if fields.section == "preamble":
+                penalties[row] -= 8
+            content = getattr(doc, "page_content", "")
+            if (
+                {"short", "title"} <= fields.content_terms
+                and not {"eviction", "arrears"} & fields.content_terms
+                # Both words occur; only the text says whether as a phrase.
+                and "short title" in normalize_content(content).lower()
+            ):
+                penalties[row] -= 4
+            if normalized_prefix(content, 9).lower() == "an act to":
+                penalties[row] -= 4
+        matches = np.zeros((len(docs), len(term_index), len(RERANK_FIELD_WEIGHTS)))
+        matches[rows, cols, field_cols] = 1.0
+        return (matches @ RERANK_FIELD_WEIGHTS) @ term_counts + penalties
+
     def _score_doc_relevance(self, query_terms: List[str], doc: Any) -> int:
-        metadata = getattr(doc, "metadata", {}) or {}
-        normalized_content = self._normalize_content(getattr(doc, "page_content", "")).lower()
-
-        score = 0
-        for term in query_terms:
-            if term in normalized_content:
-                score += 5
-            if term in str(metadata.get("act_name", "")).lower():
-                score += 8
-            if term in str(metadata.get("title", "")).lower():
-                score += 6
-            if term == str(metadata.get("section", "")).lower():
-                score += 4
-
-        if metadata.get("section") == "Preamble":
-            score -= 8
-        if "short title" in normalized_content and "eviction" not in normalized_content and "arrears" not in normalized_content:
-            score -= 4
-        if normalized_content.startswith("an act to"):
-            score -= 4
-        return score
+        return int(self._score_docs(query_terms, [doc])[0])
 
     def _rerank_docs(self, query: str, docs: List[Any], k: int) -> List[Any]:
-        query_terms = self._extract_query_terms(query)
-        ranked_docs = sorted(
-            docs,
-            key=lambda doc: self._score_doc_relevance(query_terms, doc),
-            reverse=True,
-        )
-        return ranked_docs[:k]
+        if not docs:
+            return []
+        scores = self._score_docs(self._extract_query_terms(query), docs)
+        # Stable, like the sorted() it replaces: ties keep retrieval order.
+        order = np.argsort(-scores, kind="stable")
+        return [docs[idx] for idx in order[:k]]
 
     def _dedupe_docs(self, docs: List[Any]) -> List[Any]:
         seen = set()
@@ -123,81 +162,83 @@ class LegalResearchAgent:
             unique_docs.append(doc)
         return unique_docs
 
-    async def answer_query(self, query: str, k: int = 5) -> Dict[str, Any]:
+    async def _prepare_answer(self, query: str, k: int, filters: Optional[Dict[str, Any]]) -> _PreparedAnswer:
         """
-        Answers a legal research query by retrieving context and generating a response.
+        Retrieval, semantic-cache lookup and prompt construction shared by
+        `answer_query` and `stream_answer`. `result` is set when no LLM
+        call is needed.
         """
-        try:
-            logger.info(f"Researching query: {query}")
-
-            strategy = self._select_retrieval_strategy(query)
-            docs = []
-            for focus_query in self._build_focus_queries(query):
-                docs.extend(
-                    self.retrieval_service.retrieve_documents(
-                        query=focus_query,
-                        strategy=strategy,
-                        k=max(k, 8),
-                    )
-                )
-            docs = self._dedupe_docs(docs)
-            docs = self._rerank_docs(query, docs, k=k)
-            
-            if not docs:
-                return {
-                    "answer": "I couldn't find any specific legal documents in my database related to your query.",
-                    "sources": []
-                }
-
-            # 2. Construct Context with dynamic sizing
-            # Groq's Llama 3.3 has 128K token context (~512K chars)
-            # We use ~80K chars to leave room for prompt + response
-            MAX_CONTEXT_CHARS = 80000
-            MAX_CHARS_PER_DOC = 4000  # Allow substantial content per doc
-            
-            context_parts = []
-            sources = []
-            total_chars = 0
-            
-            for i, doc in enumerate(docs[:k]):
-                raw_content = doc.page_content
-                content = self._normalize_content(raw_content)
-                
-                # Calculate how much space we have left
-                remaining = MAX_CONTEXT_CHARS - total_chars
-                if remaining <= 500:  # Stop if not enough room
-                    break
-                    
-                # Truncate this doc to fit (but max 4000 chars per doc)
-                allowed = min(MAX_CHARS_PER_DOC, remaining - 200)  # Leave room for header
-                content = content[:allowed]
-                
-                metadata = doc.metadata
-                source_title = metadata.get("title") or metadata.get("act_name") or "Unknown Title"
-                if metadata.get("section"):
-                    source_title = f"{source_title} - Section {metadata.get('section')}"
-                source_label = metadata.get("source") or metadata.get("doc_type") or "Unknown"
-                source_info = f"Source {i+1}: {source_title} (Source: {source_label})"
-                if metadata.get('url'):
-                    source_info += f" - {metadata.get('url')}"
-                
-                doc_text = f"--- {source_info} ---\n{content}\n"
-                context_parts.append(doc_text)
-                total_chars += len(doc_text)
-                
-                sources.append({
-                    "title": metadata.get('title'),
-                    "url": metadata.get('url'),
-                    "source": metadata.get('source'),
-                    "id": metadata.get('doc_id') or metadata.get('tid')
-                })
-            
-            logger.info(f"Research context: {len(sources)} docs, {total_chars} chars")
-            context_str = "\n".join(context_parts)
-
-
-            # 3. Generate Answer
-            prompt = f"""
+        logger.info(f"Researching query: {query}")
+
+        strategy = self._select_retrieval_strategy(query)
+        # Citations resolve through the exact act/section index, so the
+        # semantic focus-query expansion is only needed for other queries.
+        if await asyncio.to_thread(self.retrieval_service.is_citation_query, query):
+            focus_queries = [query]
+        else:
+            focus_queries = self._build_focus_queries(query)
+        docs = await self.retrieval_service.aretrieve_documents_batch(
+            queries=focus_queries,
+            strategy=strategy,
+            k=max(k, 8),
+            filters=filters,
+        )
+        docs = self._dedupe_docs(docs)
+        docs = self._rerank_docs(query, docs, k=k)
+
+        if not docs:
+            return _PreparedAnswer(result={
+                "answer": "I couldn't find any specific legal documents in my database related to your query.",
+                "sources": []
+            })
+
+        source_ids = [source_key(doc) for doc in docs]
+        cache_scope = (self.retrieval_service.collection_name, self.retrieval_service.corpus_version())
+        query_vector = None
+        if self.answer_cache.enabled:
+            query_vector = (await self.retrieval_service.aembed_queries([query]))[0]
+            cached = self.answer_cache.lookup(query_vector, source_ids, *cache_scope)
+            if cached is not None:
+                logger.info("Research answer served from the semantic cache")
+                return _PreparedAnswer(result={**cached, "cached": True})
+
+        # 2. Construct Context within the generation model's token budget:
+        # whole sentences, no overlapping chunks, best score per token.
+        packed = context_packer.pack(
+            [self._normalize_content(doc.page_content) for doc in docs[:k]],
+            budget=context_token_budget(),
+            max_tokens_per_passage=MAX_TOKENS_PER_DOC,
+        )
+
+        context_parts = []
+        sources = []
+
+        for i, (doc_idx, content) in enumerate(packed):
+            doc = docs[doc_idx]
+            metadata = doc.metadata
+            source_title = metadata.get("title") or metadata.get("act_name") or "Unknown Title"
+            if metadata.get("section"):
+                source_title = f"{source_title} - Section {metadata.get('section')}"
+            source_label = metadata.get("source") or metadata.get("doc_type") or "Unknown"
+            source_info = f"Source {i+1}: {source_title} (Source: {source_label})"
+            if metadata.get('url'):
+                source_info += f" - {metadata.get('url')}"
+
+            doc_text = f"--- {source_info} ---\n{content}\n"
+            context_parts.append(doc_text)
+
+            sources.append({
+                "title": metadata.get('title'),
+                "url": metadata.get('url'),
+                "source": metadata.get('source'),
+                "id": metadata.get('doc_id') or metadata.get('tid')
+            })
+
+        context_str = "\n".join(context_parts)
+        logger.info(f"Research context: {len(sources)} docs, {context_packer.count_tokens(context_str)} tokens")
+
+        # 3. Build the answer prompt
+        prompt = f"""
 You are a highly skilled Legal Research Assistant for DroitDraft, specializing in Indian Law. 
 Your task is to provide detailed, accurate, and grounded answers to legal queries based ONLY on the provided context.
 
@@ -219,12 +260,39 @@ Instructions:
 
 Answer:
 """
-            answer = await llm_client.generate(prompt)
+        return _PreparedAnswer(
+            prompt=prompt,
+            sources=sources,
+            query_vector=query_vector,
+            source_ids=source_ids,
+            cache_scope=cache_scope,
+        )
 
-            return {
-                "answer": answer,
-                "sources": sources
-            }
+    def _finish_answer(self, prepared: _PreparedAnswer, answer: str) -> Dict[str, Any]:
+        result = {
+            "answer": answer,
+            "sources": prepared.sources,
+            "cached": False,
+        }
+        if prepared.query_vector is not None and not answer.startswith("Error:"):
+            self.answer_cache.store(prepared.query_vector, prepared.source_ids, result, *prepared.cache_scope)
+        return result
+
+    async def answer_query(self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Answers a legal research query by retrieving context and generating a response.
+        `filters` (act_name, jurisdiction, doc_type, priority, section,
+        date_from, date_to) restrict retrieval to matching chunks.
+
+        A paraphrase of an earlier question that retrieved the same sources
+        is answered from the semantic answer cache (`cached` is then True).
+        """
+        try:
+            prepared = await self._prepare_answer(query, k, filters)
+            if prepared.result is not None:
+                return prepared.result
+            answer = await llm_client.generate(prepared.prompt, caller="research")
+            return self._finish_answer(prepared, answer)
 
         except Exception as e:
             logger.error(f"Error in LegalResearchAgent: {e}", exc_info=True)
@@ -232,3 +300,38 @@ Answer:
                 "answer": f"I encountered an error while performing research: {str(e)}",
                 "sources": []
             }
+
+    async def stream_answer(
+        self, query: str, k: int = 5, filters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `answer_query`. Yields ("sources", {...}) as
+        soon as retrieval finishes, then ("token", text) chunks as the LLM
+        produces them, then ("done", {...}); failures yield ("error", {...}).
+        """
+        try:
+            prepared = await self._prepare_answer(query, k, filters)
+        except Exception as e:
+            logger.error(f"Error in LegalResearchAgent: {e}", exc_info=True)
+            yield "error", {"detail": f"I encountered an error while performing research: {str(e)}"}
+            return
+
+        if prepared.result is not None:
+            cached = prepared.result.get("cached", False)
+            yield "sources", {"sources": prepared.result["sources"], "cached": cached}
+            yield "token", prepared.result["answer"]
+            yield "done", {"cached": cached}
+            return
+
+        yield "sources", {"sources": prepared.sources, "cached": False}
+        parts: List[str] = []
+        try:
+            async for chunk in llm_client.generate_stream(prepared.prompt, caller="research"):
+                parts.append(chunk)
+                yield "token", chunk
+        except Exception as e:
+            logger.error(f"Error streaming research answer: {e}", exc_info=True)
+            yield "error", {"detail": f"I encountered an error while generating the answer: {str(e)}"}
+            return
+        self._finish_answer(prepared, "".join(parts))
+        yield "done", {"cached": False}
@@ -0,0 +1,84 @@
+import re
+from html import unescape
+from typing import Any, FrozenSet, Mapping, NamedTuple
+
+# Metadata key written at ingestion so the research rerank never has to
+# re-tokenize chunk text. The normalized text itself is not stored; it is
+# derived from page_content where it is actually needed.
+SEARCH_TERMS_KEY = "search_terms"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Normalized characters past a window's cut that a truncated entity or
+# whitespace run can still affect.
+_PREFIX_SLACK = 10
+
+
+def normalize_content(raw_content: str) -> str:
+    """
+    Strips HTML tags and entities, collapses whitespace and drops non-ASCII
+    characters.
+    """
+    content = re.sub(r"<[^>]+>", " ", raw_content or "")
+    content = unescape(content)
+    content = re.sub(r"\s+", " ", content).strip()
+    return content.encode("ascii", errors="ignore").decode("ascii")
+
+
+def normalized_prefix(raw_content: str, length: int) -> str:
+    """
+    First `length` characters of `normalize_content(raw_content)`, without
+    normalizing more of the text than that needs.
+    """
+    raw_content = raw_content or ""
+    window = max(4 * length, 256)
+    while True:
+        head = raw_content[:window]
+        if window < len(raw_content) and head.rfind("<") > head.rfind(">"):
+            # Drop a tag cut off at the window edge.
+            head = head[:head.rfind("<")]
+        prefix = normalize_content(head)
+        if window >= len(raw_content) or len(prefix) >= length + _PREFIX_SLACK:
+            return prefix[:length]
+        window *= 4
+
+
+def term_set(text: str) -> FrozenSet[str]:
+    return frozenset(_TOKEN_PATTERN.findall((text or "").lower()))
+
+
+def search_terms(normalized_content: str) -> str:
+    """
+    Space-separated unique lowercase tokens of a chunk, in first-seen order.
+    Stored as a string because vector-store metadata values must be scalars.
+    """
+    return " ".join(dict.fromkeys(_TOKEN_PATTERN.findall(normalized_content.lower())))
+
+
+def content_fields(raw_content: str) -> dict:
+    return {SEARCH_TERMS_KEY: search_terms(normalize_content(raw_content))}
+
+
+class SearchFields(NamedTuple):
+    content_terms: FrozenSet[str]
+    act_terms: FrozenSet[str]
+    title_terms: FrozenSet[str]
+    section: str
+
+
+def doc_search_fields(doc: Any) -> SearchFields:
+    """
+    Rerank inputs for a retrieved chunk, read from the term set stored at
+    ingestion; chunks ingested before it existed are tokenized here.
+    """
+    metadata: Mapping[str, Any] = getattr(doc, "metadata", None) or {}
+    stored_terms = metadata.get(SEARCH_TERMS_KEY)
+    if isinstance(stored_terms, str):
+        content_terms = frozenset(stored_terms.split())
+    else:
+        content_terms = term_set(normalize_content(getattr(doc, "page_content", "")))
+    return SearchFields(
+        content_terms=content_terms,
+        act_terms=term_set(str(metadata.get("act_name", ""))),
+        title_terms=term_set(str(metadata.get("title", ""))),
+        section=str(metadata.get("section", "")).lower(),
+    )
@@ -0,0 +1,71 @@
+import glob
+import json
+import os
+from typing import Any, List
+
+# A delta log is merged into its index's base segment once it holds this
+# many documents, or this fraction of the base, whichever is larger.
+DELTA_MERGE_MIN_DOCS = 20000
+DELTA_MERGE_RATIO = 0.25
+
+
+def should_merge(delta_docs: int, base_docs: int) -> bool:
+    return delta_docs >= max(DELTA_MERGE_MIN_DOCS, DELTA_MERGE_RATIO * base_docs)
+
+
+def delta_log_path(prefix: str, generation: int) -> str:
+    return f"{prefix}.delta-{generation}.jsonl"
+
+
+def remove_delta_logs(prefix: str) -> None:
+    for path in glob.glob(f"{glob.escape(prefix)}.delta-*.jsonl"):
+        os.remove(path)
+
+
+class DeltaLog:
+    """
+    Append-only JSON-lines log of the additions made to an index since its
+    base segment was last written, one line per `append`.
+
+    Adding a batch costs O(batch) for the writer, and readers in other
+    processes pick up only the lines appended since their last read. Each
+    base segment records its generation, and the log is named after it, so
+    a reader never replays lines that a merge already folded into the base.
+    Assumes a single writing process per index, as ingestion does.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.offset = 0
+
+    def append(self, record: Any) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n")
+            self.offset = f.tell()
+
+    def read_new(self) -> List[Any]:
+        """
+        Records appended since the last read; a partially written last line
+        is left for the next call.
+        """
+        try:
+            if os.path.getsize(self.path) <= self.offset:
+                return []
+            with open(self.path, "rb") as f:
+                f.seek(self.offset)
+                data = f.read()
+        except OSError:
+            return []
+        end = data.rfind(b"\n")
+        if end < 0:
+            return []
+        self.offset += end + 1
+        return [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.offset = 0
@@ -1,9 +1,21 @@
 import os
 from typing import List, Dict, Any, Optional
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import SentenceTransformerEmbeddings
 from langchain_core.documents import Document
 
+from app.agents.legal_research.content_normalization import content_fields
+from app.agents.legal_research.metadata_index import (
+    DATE_ORDINAL_KEY,
+    get_metadata_index,
+    metadata_date_ordinal,
+)
+from app.agents.legal_research.section_index import get_section_index
+from app.agents.legal_research.sparse_index import get_sparse_index
+from app.core.config import settings
+from app.db.local_vector_store import create_local_vector_store
+from app.services.embedding_registry import get_embedding_model
+from app.services.retrieval_cache import get_corpus_version
+
 
 def _coerce_metadata_value(value: Any) -> Optional[str | int | float | bool]:
     if value is None:
@@ -37,6 +49,11 @@ def _build_chroma_metadata(
         if coerced is not None:
             metadata[key] = coerced
 
+    # Numeric date copy so vector stores can range-filter on it.
+    ordinal = metadata_date_ordinal(metadata)
+    if ordinal is not None:
+        metadata[DATE_ORDINAL_KEY] = ordinal
+
     return metadata
 
 class DocumentStore:
@@ -61,19 +78,31 @@ class DocumentStore:
         self.persist_directory = persist_directory
         self.collection_name = collection_name
         
-        # Initialize Embeddings (using local HuggingFaceEmbeddings model)
-        try:
-            from langchain_huggingface import HuggingFaceEmbeddings
-        except ImportError:
-            raise ImportError("langchain_huggingface is required for embeddings")
-        self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        # Shared, process-wide embeddings model (loaded once by the registry)
+        self.embeddings = get_embedding_model()
         
-        # Initialize Chroma
-        self.vector_store = Chroma(
-            collection_name=self.collection_name,
-            embedding_function=self.embeddings,
-            persist_directory=self.persist_directory
-        )
+        # Initialize the configured vector store (Chroma or the built-in engine)
+        if settings.VECTOR_STORE_BACKEND == "local":
+            self.vector_store = create_local_vector_store(
+                self.collection_name, self.embeddings, self.persist_directory
+            )
+        else:
+            from app.db.vector_db import chroma_client_options
+
+            self.vector_store = Chroma(
+                collection_name=self.collection_name,
+                embedding_function=self.embeddings,
+                **chroma_client_options(self.persist_directory)
+            )
+
+        # Lexical and exact-citation indexes over the same collection, kept in
+        # sync on every write
+        self.sparse_index = get_sparse_index(self.persist_directory, self.collection_name)
+        self.section_index = get_section_index(self.persist_directory, self.collection_name)
+        self.metadata_index = get_metadata_index(self.persist_directory, self.collection_name)
+
+        # Bumped on every write so cached retrieval results are invalidated
+        self.corpus_version = get_corpus_version(self.persist_directory, self.collection_name)
 
     def add_documents(self, documents: List[Dict[str, Any]], content_key: str = "content", metadata_exclude_keys: List[str] = None):
         """
@@ -95,11 +124,57 @@ class DocumentStore:
                 content_key=content_key,
                 metadata_exclude_keys=metadata_exclude_keys,
             )
+            # Token set for the research rerank, computed once here instead
+            # of on every query.
+            metadata.update(content_fields(content))
 
             langchain_docs.append(Document(page_content=content, metadata=metadata))
         
         if langchain_docs:
-            self.vector_store.add_documents(langchain_docs)
+            ids = self.vector_store.add_documents(langchain_docs)
+            # Each index appends this batch to its delta log (O(batch));
+            # `compact_indexes` merges the logs at the end of ingestion.
+            self.sparse_index.add(ids, [doc.page_content for doc in langchain_docs])
+            self.sparse_index.flush()
+            self.section_index.add(ids, [doc.metadata for doc in langchain_docs])
+            self.section_index.flush()
+            self.metadata_index.add(ids, [doc.metadata for doc in langchain_docs])
+            self.metadata_index.flush()
+            self.corpus_version.bump()
+
+    def compact_indexes(self) -> None:
+        """
+        Merges the BM25, section and metadata delta logs into their base
+        segments. Call once at the end of an ingestion run.
+        """
+        self.sparse_index.save()
+        self.section_index.save()
+        self.metadata_index.save()
+
+    def rebuild_sparse_index(self, batch_size: int = 1000) -> int:
+        """
+        Rebuilds the BM25, (act, section) and metadata filter indexes from
+        everything already stored in the collection. Needed once for
+        collections ingested before the indexes existed.
+        """
+        self.sparse_index.clear()
+        self.section_index.clear()
+        self.metadata_index.clear()
+        offset = 0
+        while True:
+            batch = self.vector_store.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+            ids = batch.get("ids") or []
+            if not ids:
+                break
+            self.sparse_index.add(ids, [text or "" for text in batch.get("documents") or []])
+            self.section_index.add(ids, batch.get("metadatas") or [])
+            self.metadata_index.add(ids, batch.get("metadatas") or [])
+            offset += len(ids)
+        self.sparse_index.save()
+        self.section_index.save()
+        self.metadata_index.save()
+        self.corpus_version.bump()
+        return len(self.sparse_index)
 
     def search(self, query: str, k: int = 5) -> List[Document]:
         """
@@ -118,3 +193,7 @@ class DocumentStore:
         Deletes the entire collection. Use with caution.
         """
         self.vector_store.delete_collection()
+        self.sparse_index.clear()
+        self.section_index.clear()
+        self.metadata_index.clear()
+        self.corpus_version.bump()
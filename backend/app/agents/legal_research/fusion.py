@@ -0,0 +1,208 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+
+DATE_METADATA_KEYS = ("judgment_date", "publication_date", "date")
+# Numeric YYYYMMDD copy of a chunk's date, written at ingestion so that
+# Chroma's `where` (numeric comparisons only) can range-filter on it and
+# recency boosts compare integers instead of parsing date strings.
+DATE_ORDINAL_KEY = "date_ordinal"
+# Added to the fused score of candidates from pinned lists; larger than any
+# achievable RRF score, so pinned candidates always rank first.
+PINNED_SCORE_OFFSET = 1000.0
+
+
+def weighted_rrf(rank_matrix: np.ndarray, weights: np.ndarray, rrf_k: float = 60.0) -> np.ndarray:
+    """
+    Weighted reciprocal rank fusion over a (n_lists, n_candidates) matrix of
+    0-based ranks, where -1 marks a candidate absent from that list.
+
+        score(d) = sum_i weight_i / (rrf_k + rank_i(d) + 1)
+    """
+    present = rank_matrix >= 0
+    contributions = np.where(present, 1.0 / (rrf_k + rank_matrix + 1.0), 0.0)
+    return weights @ contributions
+
+
+def parse_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str) or not value:
+        return None
+    return _parse_iso_date(value[:10])
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso_date(value: str) -> Optional[date]:
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        return None
+
+
+def metadata_date(metadata: Mapping[str, Any]) -> Optional[date]:
+    """
+    First parseable date among DATE_METADATA_KEYS, or None.
+    """
+    return next(
+        (parsed for parsed in (parse_date(metadata.get(key)) for key in DATE_METADATA_KEYS) if parsed),
+        None,
+    )
+
+
+def date_ordinal(value: Any) -> Optional[int]:
+    parsed = value if isinstance(value, date) else parse_date(value)
+    return parsed.year * 10000 + parsed.month * 100 + parsed.day if parsed else None
+
+
+def metadata_date_ordinal(metadata: Mapping[str, Any]) -> Optional[int]:
+    ordinal = metadata.get(DATE_ORDINAL_KEY)
+    if isinstance(ordinal, int):
+        return ordinal
+    return date_ordinal(metadata_date(metadata))
+
+
+def compute_boosts(
+    metadatas: Sequence[Mapping[str, Any]],
+    boost_factors: Mapping[str, Any],
+    today: Optional[date] = None,
+) -> np.ndarray:
+    """
+    Multiplicative per-candidate boosts from HYBRID_SEARCH_CONFIG["boost_factors"]:
+    a jurisdiction match and, for dated material, recency within `recency_days`.
+
+    Each metadata field is gathered into one array and compared in a single
+    vectorized step; dates come from the ingestion-time DATE_ORDINAL_KEY,
+    and are parsed (with a cache) only for chunks stored without it.
+    """
+    n_docs = len(metadatas)
+    boosts = np.ones(n_docs, dtype=np.float64)
+    if not boost_factors or not n_docs:
+        return boosts
+
+    jurisdiction = str(boost_factors.get("jurisdiction") or "").lower()
+    if jurisdiction:
+        jurisdictions = np.array([str(metadata.get("jurisdiction", "")).lower() for metadata in metadatas])
+        matches = jurisdictions == jurisdiction
+        boosts *= np.where(matches, float(boost_factors.get("jurisdiction_boost", 1.0)), 1.0)
+
+    recency_days = boost_factors.get("recency_days")
+    if recency_days:
+        cutoff = date_ordinal((today or date.today()) - timedelta(days=int(recency_days)))
+        ordinals = np.fromiter(
+            (metadata_date_ordinal(metadata) or 0 for metadata in metadatas),
+            dtype=np.int64,
+            count=n_docs,
+        )
+        boosts *= np.where(ordinals >= cutoff, float(boost_factors.get("recency_boost", 1.0)), 1.0)
+    return boosts
+
+
+def fuse_ranked_keys(
+    ranked_keys: Mapping[str, Sequence[Hashable]],
+    weights: Mapping[str, float],
+    rrf_k: float = 60.0,
+    boosts: Optional[Callable[[List[Hashable]], np.ndarray]] = None,
+    pinned: Sequence[str] = (),
+) -> Tuple[List[Hashable], np.ndarray]:
+    """
+    Fuses named ranked lists of candidate keys (e.g. "dense", "sparse",
+    "exact") into one ordering. Returns the keys sorted by fused score and
+    the matching score array.
+
+    Lists missing from `weights` get weight 1.0. `boosts`, if given, receives
+    the candidate keys in column order and returns multiplicative boosts.
+    Candidates appearing in any `pinned` list are ranked ahead of all others.
+    """
+    list_names = [name for name, keys in ranked_keys.items() if keys]
+    columns: Dict[Hashable, int] = {}
+    for name in list_names:
+        for key in ranked_keys[name]:
+            if key not in columns:
+                columns[key] = len(columns)
+    if not columns:
+        return [], np.zeros(0)
+
+    rank_matrix = np.full((len(list_names), len(columns)), -1, dtype=np.int64)
+    for row, name in enumerate(list_names):
+        keys = ranked_keys[name]
+        cols = np.fromiter((columns[key] for key in keys), dtype=np.int64, count=len(keys))
+        # Keep the best (first) rank if a list repeats a key.
+        ranks = np.arange(len(keys), dtype=np.int64)
+        rank_matrix[row, cols[::-1]] = ranks[::-1]
+
+    weight_vector = np.array([float(weights.get(name, 1.0)) for name in list_names])
+    scores = weighted_rrf(rank_matrix, weight_vector, rrf_k)
+
+    keys_in_order = list(columns)
+    if boosts is not None:
+        scores = scores * boosts(keys_in_order)
+
+    pinned_rows = [row for row, name in enumerate(list_names) if name in pinned]
+    if pinned_rows:
+        pinned_mask = (rank_matrix[pinned_rows] >= 0).any(axis=0)
+        scores = scores + PINNED_SCORE_OFFSET * pinned_mask
+
+    # Stable sort so ties keep first-seen order (dense before sparse, etc.).
+    order = np.argsort(-scores, kind="stable")
+    return [keys_in_order[i] for i in order], scores[order]
+
+
+def fuse_documents(
+    ranked_docs: Mapping[str, Sequence[Any]],
+    config: Mapping[str, Any],
+    key_fn: Callable[[Any], Hashable],
+    k: Optional[int] = None,
+    pinned: Sequence[str] = ("exact",),
+) -> List[Any]:
+    """
+    Document-level wrapper around `fuse_ranked_keys` driven by a
+    HYBRID_SEARCH_CONFIG-shaped dict. Exact act/section matches are pinned
+    to the top by default.
+    """
+    docs_by_key: Dict[Hashable, Any] = {}
+    ranked_keys: Dict[str, List[Hashable]] = {}
+    for name, docs in ranked_docs.items():
+        keys = []
+        for doc in docs:
+            key = key_fn(doc)
+            docs_by_key.setdefault(key, doc)
+            keys.append(key)
+        ranked_keys[name] = keys
+
+    weights = {
+        "sparse": config.get("keyword_weight", 0.6),
+        "dense": config.get("semantic_weight", 0.4),
+        **config.get("list_weights", {}),
+    }
+    boost_factors = config.get("boost_factors") or {}
+
+    def _boosts(keys: List[Hashable]) -> np.ndarray:
+        return compute_boosts(
+            [getattr(docs_by_key[key], "metadata", None) or {} for key in keys],
+            boost_factors,
+        )
+
+    fused_keys, _scores = fuse_ranked_keys(
+        ranked_keys,
+        weights,
+        rrf_k=float(config.get("rrf_k", 60)),
+        boosts=_boosts if boost_factors else None,
+        pinned=pinned,
+    )
+    fused = [docs_by_key[key] for key in fused_keys]
+    return fused[:k] if k is not None else fused
@@ -0,0 +1,262 @@
+import bisect
+import json
+import os
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+from app.agents.legal_research.delta_log import (
+    DeltaLog,
+    delta_log_path,
+    remove_delta_logs,
+    should_merge,
+)
+from app.agents.legal_research.fusion import (
+    DATE_ORDINAL_KEY,
+    date_ordinal,
+    metadata_date_ordinal,
+)
+
+FILTERABLE_FIELDS = ("act_name", "jurisdiction", "doc_type", "priority", "section")
+
+
+class MetadataFilter:
+    """
+    Normalized retrieval filters: exact-match values per metadata field
+    (any of several values), plus an inclusive date range.
+
+        MetadataFilter.from_mapping({"jurisdiction": "Maharashtra", "date_from": "2020-01-01"})
+    """
+
+    def __init__(
+        self,
+        fields: Mapping[str, Sequence[str]],
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+    ):
+        self.fields = {field: tuple(values) for field, values in sorted(fields.items())}
+        self.date_from = date_from
+        self.date_to = date_to
+
+    @classmethod
+    def from_mapping(cls, filters: Optional[Mapping[str, Any]]) -> Optional["MetadataFilter"]:
+        """
+        Validates a request-level filter dict; returns None when it filters
+        nothing. Raises ValueError for unknown fields or unparseable dates.
+        """
+        if not filters:
+            return None
+        fields: Dict[str, Tuple[str, ...]] = {}
+        dates: Dict[str, Optional[int]] = {"date_from": None, "date_to": None}
+        for key, value in filters.items():
+            if value is None or value == [] or value == "":
+                continue
+            if key in dates:
+                dates[key] = date_ordinal(value)
+                if dates[key] is None:
+                    raise ValueError(f"Invalid date for filter {key!r}: {value!r}")
+            elif key in FILTERABLE_FIELDS:
+                values = [value] if isinstance(value, (str, int, float)) else list(value)
+                fields[key] = tuple(dict.fromkeys(str(item) for item in values))
+            else:
+                raise ValueError(f"Unsupported filter {key!r}; expected one of {FILTERABLE_FIELDS + tuple(dates)}")
+        if not fields and dates["date_from"] is None and dates["date_to"] is None:
+            return None
+        return cls(fields, **dates)
+
+    def matches(self, metadata: Mapping[str, Any]) -> bool:
+        for field, values in self.fields.items():
+            if str(metadata.get(field)) not in values:
+                return False
+        if self.date_from is None and self.date_to is None:
+            return True
+        ordinal = metadata_date_ordinal(metadata)
+        if ordinal is None:
+            return False
+        return (self.date_from is None or ordinal >= self.date_from) and (
+            self.date_to is None or ordinal <= self.date_to
+        )
+
+    def token(self) -> str:
+        return json.dumps([self.fields, self.date_from, self.date_to], sort_keys=True)
+
+    def to_where(self) -> Dict[str, Any]:
+        """
+        Chroma `where` clause; also understood by the local vector engine.
+        """
+        clauses: List[Dict[str, Any]] = [
+            {field: {"$in": list(values)}} if len(values) > 1 else {field: values[0]}
+            for field, values in self.fields.items()
+        ]
+        if self.date_from is not None:
+            clauses.append({DATE_ORDINAL_KEY: {"$gte": self.date_from}})
+        if self.date_to is not None:
+            clauses.append({DATE_ORDINAL_KEY: {"$lte": self.date_to}})
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+class MetadataIndex:
+    """
+    Posting lists (field -> value -> chunk ids) over the filterable metadata
+    fields, plus chunk dates kept sorted for range lookups.
+
+    Used to restrict BM25 and exact-citation candidates to a filter without
+    touching the vector store; dense search applies the same filter through
+    the store's `where` support, which the local engine answers from this
+    index too.
+
+    Like BM25Index, additions are flushed to a delta log next to the JSON
+    file and only merged into it once the log is large.
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self._reset_state()
+        self._loaded_mtime: Optional[float] = None
+        self.load()
+
+    def _reset_state(self) -> None:
+        self._postings: Dict[str, Dict[str, List[str]]] = {}
+        self._dates: Dict[str, int] = {}
+        self._sorted_dates: Optional[Tuple[List[int], List[str]]] = None
+        self._unflushed: List[List[Any]] = []
+        self._delta_count = 0
+        self._generation = 0
+        self._log = DeltaLog(delta_log_path(self.index_path, 0))
+
+    @property
+    def is_built(self) -> bool:
+        return bool(self._postings or self._dates)
+
+    def load(self) -> None:
+        with self._lock:
+            self._reset_state()
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                self._postings = payload.get("postings", {})
+                self._dates = payload.get("dates", {})
+                self._generation = int(payload.get("generation", 0))
+                self._log = DeltaLog(delta_log_path(self.index_path, self._generation))
+                self._loaded_mtime = os.path.getmtime(self.index_path)
+            else:
+                self._loaded_mtime = None
+            self._replay_log()
+
+    def _replay_log(self) -> None:
+        for record in self._log.read_new():
+            for doc_id, fields, ordinal in record:
+                self._add_entry(doc_id, fields, ordinal)
+
+    def refresh_if_stale(self) -> None:
+        if self._unflushed:
+            return
+        mtime = os.path.getmtime(self.index_path) if os.path.exists(self.index_path) else None
+        with self._lock:
+            if mtime != self._loaded_mtime:
+                self.load()
+            else:
+                self._replay_log()
+
+    def _add_entry(self, doc_id: str, fields: Mapping[str, str], ordinal: Optional[int]) -> None:
+        for field, value in fields.items():
+            posting = self._postings.setdefault(field, {}).setdefault(value, [])
+            if not posting or posting[-1] != doc_id:
+                posting.append(doc_id)
+        if ordinal is not None:
+            self._dates[doc_id] = ordinal
+            self._sorted_dates = None
+        self._delta_count += 1
+
+    def add(self, ids: Sequence[str], metadatas: Sequence[Mapping[str, Any]]) -> None:
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                metadata = metadata or {}
+                fields = {
+                    field: str(metadata[field])
+                    for field in FILTERABLE_FIELDS
+                    if metadata.get(field) is not None and metadata.get(field) != ""
+                }
+                ordinal = metadata_date_ordinal(metadata)
+                if not fields and ordinal is None:
+                    continue
+                self._add_entry(str(doc_id), fields, ordinal)
+                self._unflushed.append([str(doc_id), fields, ordinal])
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._unflushed:
+                self._log.append(self._unflushed)
+                self._unflushed = []
+            if should_merge(self._delta_count, len(self._dates)):
+                self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._delta_count and self._loaded_mtime is not None:
+                return
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"generation": self._generation + 1, "postings": self._postings, "dates": self._dates}, f)
+            os.replace(tmp_path, self.index_path)
+            self._log.remove()
+            self.load()
+
+    def clear(self) -> None:
+        with self._lock:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            remove_delta_logs(self.index_path)
+            self._reset_state()
+            self._loaded_mtime = None
+
+    def ids_with_values(self, field: str, values: Sequence[str]) -> Set[str]:
+        with self._lock:
+            postings = self._postings.get(field, {})
+            return {doc_id for value in values for doc_id in postings.get(value, ())}
+
+    def ids_in_date_range(self, date_from: Optional[int], date_to: Optional[int]) -> Set[str]:
+        with self._lock:
+            if self._sorted_dates is None:
+                ordered = sorted(self._dates.items(), key=lambda item: item[1])
+                self._sorted_dates = ([ordinal for _id, ordinal in ordered], [doc_id for doc_id, _ordinal in ordered])
+            ordinals, doc_ids = self._sorted_dates
+        start = bisect.bisect_left(ordinals, date_from) if date_from is not None else 0
+        end = bisect.bisect_right(ordinals, date_to) if date_to is not None else len(ordinals)
+        return set(doc_ids[start:end])
+
+    def matching_ids(self, metadata_filter: MetadataFilter) -> Set[str]:
+        """
+        Ids of chunks passing every clause: the union of the posting lists
+        of a field's values, intersected across fields (smallest first).
+        """
+        candidate_sets = [self.ids_with_values(field, values) for field, values in metadata_filter.fields.items()]
+        if metadata_filter.date_from is not None or metadata_filter.date_to is not None:
+            candidate_sets.append(self.ids_in_date_range(metadata_filter.date_from, metadata_filter.date_to))
+        if not candidate_sets:
+            return set()
+        candidate_sets.sort(key=len)
+        matching = candidate_sets[0]
+        for other in candidate_sets[1:]:
+            matching = matching & other
+        return matching
+
+
+_INDEXES: Dict[str, MetadataIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def metadata_index_path(persist_directory: str, collection_name: str) -> str:
+    return os.path.join(persist_directory, f"metadata_{collection_name}.json")
+
+
+def get_metadata_index(persist_directory: str, collection_name: str) -> MetadataIndex:
+    index_path = metadata_index_path(persist_directory, collection_name)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(index_path)
+        if index is None:
+            index = MetadataIndex(index_path)
+            _INDEXES[index_path] = index
+    index.refresh_if_stale()
+    return index
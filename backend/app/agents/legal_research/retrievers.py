@@ -12,7 +12,7 @@ try:
 except Exception:
     from typing import Any as Document  # type: ignore
 
-from typing import List
+from typing import List, Optional
 
 try:
     from langchain_community.vectorstores import Chroma  # type: ignore
@@ -34,33 +34,67 @@ except Exception:
             raise ImportError("langchain_huggingface is required for embeddings")
 
 
+try:
+    from app.services.embedding_registry import get_embedding_model  # type: ignore
+except Exception:
+    def get_embedding_model(model_name: Optional[str] = None, device: Optional[str] = None):  # type: ignore[misc]
+        return HuggingFaceEmbeddings(model_name=model_name or "all-MiniLM-L6-v2")
+
+
+try:
+    from app.agents.legal_research.fusion import fuse_ranked_keys  # type: ignore
+except Exception:
+    fuse_ranked_keys = None  # type: ignore[assignment]
+
+
+try:
+    from app.core.config import settings  # type: ignore
+    from app.db.local_vector_store import create_local_vector_store  # type: ignore
+except Exception:
+    settings = None  # type: ignore[assignment]
+    create_local_vector_store = None  # type: ignore[assignment]
+
+
 try:
     from langchain_classic.retrievers.ensemble import EnsembleRetriever  # type: ignore
 except Exception:
     class EnsembleRetriever:  # type: ignore[misc]
         """
         Lightweight fallback ensemble retriever used when langchain-classic
-        is unavailable in the runtime environment.
+        is unavailable in the runtime environment. Results are combined with
+        weighted reciprocal rank fusion when the fusion module is importable,
+        otherwise concatenated in retriever order.
         """
-        def __init__(self, retrievers: list, weights: list[float] | None = None):
+        def __init__(self, retrievers: list, weights: list[float] | None = None, c: int = 60):
             self.retrievers = retrievers
             self.weights = weights or [1.0 for _ in retrievers]
+            self.c = c
 
         def invoke(self, query: str, *args, **kwargs):
-            seen = set()
-            merged = []
-            for retriever in self.retrievers:
-                for doc in retriever.invoke(query):
+            docs_by_key = {}
+            ranked_keys = {}
+            for idx, retriever in enumerate(self.retrievers):
+                keys = []
+                for doc in retriever.invoke(query) or []:
                     doc_key = (getattr(doc, "page_content", None), str(getattr(doc, "metadata", {})))
-                    if doc_key not in seen:
-                        seen.add(doc_key)
-                        merged.append(doc)
-            return merged
+                    docs_by_key.setdefault(doc_key, doc)
+                    keys.append(doc_key)
+                ranked_keys[str(idx)] = keys
+
+            if fuse_ranked_keys is None:
+                merged_keys = list(docs_by_key)
+            else:
+                merged_keys, _scores = fuse_ranked_keys(
+                    ranked_keys,
+                    {str(idx): weight for idx, weight in enumerate(self.weights)},
+                    rrf_k=self.c,
+                )
+            return [docs_by_key[key] for key in merged_keys]
 
 
 def get_hybrid_retriever(
     documents: List[Document],
-    embedding_model: str = "all-MiniLM-L6-v2",
+    embedding_model: Optional[str] = None,
     k: int = 5,
     keyword_weight: float = 0.6,
     semantic_weight: float = 0.4,
@@ -71,7 +105,7 @@ def get_hybrid_retriever(
     This is primarily used for testing and local experimentation where a
     list of LangChain `Document` objects is already available.
     """
-    embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
+    embeddings = get_embedding_model(embedding_model)
 
     # Dense retriever via vector store
     vectorstore = Chroma.from_documents(documents, embeddings)
@@ -98,27 +132,60 @@ def get_hybrid_retriever(
     )
 
 
-def get_persistent_retriever(
-    persist_directory: str = "chroma_db",
-    collection_name: str = "legal_judgments",
-    k: int = 5,
-):
+def resolve_persist_directory(persist_directory: str) -> str:
     """
-    Returns a retriever connected to the persistent ChromaDB.
+    Resolves a relative Chroma directory against the backend root, matching
+    what DocumentStore does when it creates the collection.
     """
-    embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-    # Initialize connection to existing DB
-    # Note: We need to ensure we point to the same directory as DocumentStore
     import os
     if not os.path.isabs(persist_directory):
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
         persist_directory = os.path.join(base_dir, persist_directory)
+    return persist_directory
+
 
-    vectorstore = Chroma(
+def get_persistent_vectorstore(
+    persist_directory: str = "chroma_db",
+    collection_name: str = "legal_judgments",
+    embedding_model: Optional[str] = None,
+) -> Chroma:
+    """
+    Returns the LangChain wrapper for the persistent collection: Chroma, or
+    the built-in engine when VECTOR_STORE_BACKEND is "local".
+    """
+    embeddings = get_embedding_model(embedding_model)
+
+    if settings is not None and settings.VECTOR_STORE_BACKEND == "local":
+        return create_local_vector_store(collection_name, embeddings, resolve_persist_directory(persist_directory))
+
+    # Initialize connection to existing DB
+    # Note: We need to ensure we point to the same directory (or, with
+    # CHROMA_ASYNC_HTTP, the same server) as DocumentStore
+    if settings is not None:
+        from app.db.vector_db import chroma_client_options
+
+        client_options = chroma_client_options(resolve_persist_directory(persist_directory))
+    else:
+        client_options = {"persist_directory": resolve_persist_directory(persist_directory)}
+    return Chroma(
         collection_name=collection_name,
         embedding_function=embeddings,
-        persist_directory=persist_directory,
+        **client_options,
     )
 
+
+def get_persistent_retriever(
+    persist_directory: str = "chroma_db",
+    collection_name: str = "legal_judgments",
+    k: int = 5,
+    embedding_model: Optional[str] = None,
+):
+    """
+    Returns a retriever connected to the persistent ChromaDB.
+    """
+    vectorstore = get_persistent_vectorstore(
+        persist_directory=persist_directory,
+        collection_name=collection_name,
+        embedding_model=embedding_model,
+    )
     return vectorstore.as_retriever(search_kwargs={"k": k})
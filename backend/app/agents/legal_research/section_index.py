@@ -0,0 +1,189 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.agents.legal_research.delta_log import (
+    DeltaLog,
+    delta_log_path,
+    remove_delta_logs,
+    should_merge,
+)
+from app.services.legal_corpus_catalog import (
+    canonical_act_name,
+    match_act_in_text,
+    normalize_legal_title,
+)
+
+SECTION_REFERENCE_PATTERN = re.compile(r"\b(?:sections?|sec\.?|s\.)\s*(\d+[a-z]?)\b", re.IGNORECASE)
+UNINDEXED_SECTIONS = {"", "UNKNOWN", "PREAMBLE"}
+
+
+def normalize_section(section: Any) -> str:
+    value = str(section or "").strip().upper()
+    value = re.sub(r"^(?:SECTION|SEC\.?|S\.)\s*", "", value)
+    return value.rstrip(".")
+
+
+def section_key(act_name: str, section: Any) -> str:
+    return f"{normalize_legal_title(canonical_act_name(act_name))}|{normalize_section(section)}"
+
+
+def parse_citations(query: str) -> List[Tuple[str, str]]:
+    """
+    Extracts (catalog act name, section) pairs from citation-style queries
+    such as "Section 138 NI Act". Returns an empty list unless both an act
+    and at least one section number are present.
+    """
+    sections = [normalize_section(match) for match in SECTION_REFERENCE_PATTERN.findall(query or "")]
+    if not sections:
+        return []
+    act_entry = match_act_in_text(query)
+    if not act_entry:
+        return []
+    return [(act_entry["name"], section) for section in dict.fromkeys(sections)]
+
+
+class SectionIndex:
+    """
+    Exact (act, section) -> chunk-id lookup built from the `act_name` and
+    `section` metadata written by the statute ingestion scripts.
+
+    Keys use the catalog's canonical act name, so "NI Act" and
+    "Negotiable Instruments Act, 1881" resolve to the same chunks.
+
+    Like BM25Index, additions are flushed to a delta log next to the JSON
+    file and only merged into it once the log is large.
+    """
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self._lock = threading.RLock()
+        self._reset_state()
+        self._loaded_mtime: Optional[float] = None
+        self.load()
+
+    def _reset_state(self) -> None:
+        self._entries: Dict[str, List[str]] = {}
+        self._unflushed: List[List[str]] = []
+        self._delta_count = 0
+        self._generation = 0
+        self._log = DeltaLog(delta_log_path(self.index_path, 0))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> None:
+        with self._lock:
+            self._reset_state()
+            if os.path.exists(self.index_path):
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                # Files written before delta logs hold the bare entries.
+                if isinstance(payload.get("entries"), dict):
+                    self._entries = payload["entries"]
+                    self._generation = int(payload.get("generation", 0))
+                else:
+                    self._entries = payload
+                self._log = DeltaLog(delta_log_path(self.index_path, self._generation))
+                self._loaded_mtime = os.path.getmtime(self.index_path)
+            else:
+                self._loaded_mtime = None
+            self._replay_log()
+
+    def _replay_log(self) -> None:
+        for record in self._log.read_new():
+            for key, doc_id in record:
+                self._add_entry(key, doc_id)
+
+    def refresh_if_stale(self) -> None:
+        if self._unflushed:
+            return
+        mtime = os.path.getmtime(self.index_path) if os.path.exists(self.index_path) else None
+        with self._lock:
+            if mtime != self._loaded_mtime:
+                self.load()
+            else:
+                self._replay_log()
+
+    def _add_entry(self, key: str, doc_id: str) -> bool:
+        chunk_ids = self._entries.setdefault(key, [])
+        if doc_id in chunk_ids:
+            return False
+        chunk_ids.append(doc_id)
+        self._delta_count += 1
+        return True
+
+    def add(self, ids: Sequence[str], metadatas: Sequence[Mapping[str, Any]]) -> None:
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                metadata = metadata or {}
+                act_name = metadata.get("act_name")
+                section = normalize_section(metadata.get("section"))
+                if not act_name or section in UNINDEXED_SECTIONS:
+                    continue
+                key = section_key(act_name, section)
+                if self._add_entry(key, str(doc_id)):
+                    self._unflushed.append([key, str(doc_id)])
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._unflushed:
+                self._log.append(self._unflushed)
+                self._unflushed = []
+            if should_merge(self._delta_count, len(self._entries)):
+                self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._delta_count and self._loaded_mtime is not None:
+                return
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"generation": self._generation + 1, "entries": self._entries}, f)
+            os.replace(tmp_path, self.index_path)
+            self._log.remove()
+            self.load()
+
+    def clear(self) -> None:
+        with self._lock:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            remove_delta_logs(self.index_path)
+            self._reset_state()
+            self._loaded_mtime = None
+
+    def lookup(self, act_name: str, section: Any) -> List[str]:
+        return list(self._entries.get(section_key(act_name, section), []))
+
+    def lookup_query(self, query: str) -> List[str]:
+        """
+        Chunk ids for every (act, section) cited in `query`, in citation order.
+        """
+        chunk_ids: List[str] = []
+        for act_name, section in parse_citations(query):
+            for chunk_id in self.lookup(act_name, section):
+                if chunk_id not in chunk_ids:
+                    chunk_ids.append(chunk_id)
+        return chunk_ids
+
+
+_INDEXES: Dict[str, SectionIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def section_index_path(persist_directory: str, collection_name: str) -> str:
+    return os.path.join(persist_directory, f"sections_{collection_name}.json")
+
+
+def get_section_index(persist_directory: str, collection_name: str) -> SectionIndex:
+    index_path = section_index_path(persist_directory, collection_name)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(index_path)
+        if index is None:
+            index = SectionIndex(index_path)
+            _INDEXES[index_path] = index
+    index.refresh_if_stale()
+    return index
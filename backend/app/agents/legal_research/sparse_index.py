@@ -0,0 +1,400 @@
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.agents.legal_research.delta_log import (
+    DeltaLog,
+    delta_log_path,
+    remove_delta_logs,
+    should_merge,
+)
+
+logger = logging.getLogger(__name__)
+
+BM25_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have",
+    "in", "is", "it", "its", "of", "on", "or", "shall", "that", "the", "this",
+    "to", "was", "were", "which", "with",
+}
+
+_META_FILE = "meta.json"
+# Data files carry the generation that wrote them, e.g. postings_docs.3.npy;
+# meta.json names the live generation's files.
+_DATA_FILES = {
+    "doc_ids": "doc_ids.{}.json",
+    "posting_docs": "postings_docs.{}.npy",
+    "posting_tfs": "postings_tfs.{}.npy",
+    "doc_lengths": "doc_lengths.{}.npy",
+}
+_DATA_FILE_PATTERN = re.compile(r"^(?:doc_ids|postings_docs|postings_tfs|doc_lengths)\.(\d+)\.(?:json|npy)$")
+
+
+def tokenize(text: str) -> List[str]:
+    text = re.sub(r"<[^>]+>", " ", text or "")
+    return [
+        token
+        for token in re.findall(r"[a-z0-9]+", text.lower())
+        if token not in BM25_STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    On-disk Okapi BM25 inverted index over a vector-store collection.
+
+    The persisted segment is stored as CSR-style postings (one contiguous
+    doc-id array and one term-frequency array, sliced per term through the
+    offsets in meta.json) and is opened with `np.load(mmap_mode="r")`, so a
+    process only pages in the postings of the terms it actually queries.
+    Each `save()` writes a new generation of data files next to the old
+    ones and then swaps meta.json, which names them; readers open data files
+    only through meta.json, so they always see one consistent generation.
+    Documents added since the last `save()` live in an in-memory delta
+    segment that is searched alongside the persisted one; `flush()` appends
+    them to an on-disk delta log that other processes replay, and merges
+    them into the postings only once the log is large (see `should_merge`).
+
+    Index rows map back to the ids of the owning vector store, so callers
+    resolve hits to full documents with a single `get(ids=...)` round trip.
+    """
+
+    def __init__(self, index_dir: str, k1: float = 1.5, b: float = 0.75):
+        self.index_dir = index_dir
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._loaded_mtime: Optional[float] = None
+        self._reset_state()
+        self.load()
+
+    def _reset_state(self) -> None:
+        self._terms: Dict[str, Tuple[int, int]] = {}
+        self._doc_ids: List[str] = []
+        self._posting_docs = np.zeros(0, dtype=np.int32)
+        self._posting_tfs = np.zeros(0, dtype=np.float32)
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._total_length = 0.0
+        self._pending_postings: Dict[str, Tuple[List[int], List[float]]] = defaultdict(lambda: ([], []))
+        self._pending_doc_ids: List[str] = []
+        self._pending_lengths: List[float] = []
+        self._unflushed: List[Tuple[str, Dict[str, int]]] = []
+        self._row_by_id: Optional[Tuple[Dict[str, int], int]] = None
+        self._generation = 0
+        self._log = DeltaLog(delta_log_path(self._path("postings"), 0))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def __len__(self) -> int:
+        return len(self._doc_ids) + len(self._pending_doc_ids)
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending_doc_ids)
+
+    def load(self) -> None:
+        """
+        Maps the persisted segment and replays its delta log. Unflushed
+        documents are dropped.
+        """
+        meta_path = self._path(_META_FILE)
+        with self._lock:
+            self._reset_state()
+            if os.path.exists(meta_path):
+                # A writer may prune the generation between reading meta.json
+                # and opening its files; the new meta.json then names newer ones.
+                for attempt in range(3):
+                    mtime = os.path.getmtime(meta_path)
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    try:
+                        self._load_generation(meta)
+                        break
+                    except FileNotFoundError:
+                        if attempt == 2:
+                            raise
+                        self._reset_state()
+                self._loaded_mtime = mtime
+            else:
+                self._loaded_mtime = None
+            self._replay_log()
+
+    def _load_generation(self, meta: Dict) -> None:
+        files = meta["files"]
+        with open(self._path(files["doc_ids"]), "r", encoding="utf-8") as f:
+            self._doc_ids = json.load(f)
+        self._posting_docs = np.load(self._path(files["posting_docs"]), mmap_mode="r")
+        self._posting_tfs = np.load(self._path(files["posting_tfs"]), mmap_mode="r")
+        self._doc_lengths = np.load(self._path(files["doc_lengths"]), mmap_mode="r")
+
+        self.k1 = meta.get("k1", self.k1)
+        self.b = meta.get("b", self.b)
+        self._total_length = float(meta.get("total_length", 0.0))
+        self._terms = {term: (int(span[0]), int(span[1])) for term, span in meta["terms"].items()}
+        self._generation = int(meta.get("generation", 0))
+        self._log = DeltaLog(delta_log_path(self._path("postings"), self._generation))
+
+    def _replay_log(self) -> None:
+        for record in self._log.read_new():
+            for doc_id, term_counts in zip(record["ids"], record["terms"]):
+                self._add_counts(doc_id, term_counts)
+
+    def refresh_if_stale(self) -> None:
+        """
+        Reloads the persisted segment when another process (e.g. an ingest
+        script) has merged a newer version, and otherwise replays whatever
+        it appended to the delta log. No-op while local writes are unflushed.
+        """
+        if self._unflushed:
+            return
+        meta_path = self._path(_META_FILE)
+        mtime = os.path.getmtime(meta_path) if os.path.exists(meta_path) else None
+        with self._lock:
+            if mtime != self._loaded_mtime:
+                self.load()
+            else:
+                self._replay_log()
+
+    def add(self, ids: Sequence[str], texts: Sequence[str]) -> None:
+        """
+        Tokenizes new documents into the in-memory delta segment.
+        """
+        with self._lock:
+            for doc_id, text in zip(ids, texts):
+                term_counts = dict(Counter(tokenize(text)))
+                self._add_counts(str(doc_id), term_counts)
+                self._unflushed.append((str(doc_id), term_counts))
+
+    def _add_counts(self, doc_id: str, term_counts: Dict[str, int]) -> None:
+        row = len(self)
+        for term, tf in term_counts.items():
+            rows, tfs = self._pending_postings[term]
+            rows.append(row)
+            tfs.append(float(tf))
+        length = float(sum(term_counts.values()))
+        self._pending_doc_ids.append(doc_id)
+        self._pending_lengths.append(length)
+        self._total_length += length
+
+    def flush(self) -> None:
+        """
+        Persists documents added since the last flush as one delta-log line,
+        merging the log into the postings once it is large enough.
+        """
+        with self._lock:
+            if self._unflushed:
+                self._log.append(
+                    {
+                        "ids": [doc_id for doc_id, _counts in self._unflushed],
+                        "terms": [counts for _doc_id, counts in self._unflushed],
+                    }
+                )
+                self._unflushed = []
+            if should_merge(len(self._pending_doc_ids), len(self._doc_ids)):
+                self.save()
+
+    def save(self) -> None:
+        """
+        Merges the delta segment into the persisted postings and remaps them.
+        The merged segment is written as a new generation of data files and
+        published by swapping meta.json, so concurrent readers never pair one
+        generation's term offsets with another's postings. Generations older
+        than the one being replaced are then deleted.
+        """
+        with self._lock:
+            if not self.has_pending and self._loaded_mtime is not None:
+                return
+            os.makedirs(self.index_dir, exist_ok=True)
+
+            merged_terms: Dict[str, Tuple[int, int]] = {}
+            doc_chunks: List[np.ndarray] = []
+            tf_chunks: List[np.ndarray] = []
+            offset = 0
+            for term in sorted(set(self._terms) | set(self._pending_postings)):
+                term_docs: List[np.ndarray] = []
+                term_tfs: List[np.ndarray] = []
+                if term in self._terms:
+                    start, length = self._terms[term]
+                    term_docs.append(np.asarray(self._posting_docs[start:start + length]))
+                    term_tfs.append(np.asarray(self._posting_tfs[start:start + length]))
+                if term in self._pending_postings:
+                    rows, tfs = self._pending_postings[term]
+                    term_docs.append(np.asarray(rows, dtype=np.int32))
+                    term_tfs.append(np.asarray(tfs, dtype=np.float32))
+                length = int(sum(len(chunk) for chunk in term_docs))
+                merged_terms[term] = (offset, length)
+                doc_chunks.extend(term_docs)
+                tf_chunks.extend(term_tfs)
+                offset += length
+
+            posting_docs = np.concatenate(doc_chunks).astype(np.int32) if doc_chunks else np.zeros(0, dtype=np.int32)
+            posting_tfs = np.concatenate(tf_chunks).astype(np.float32) if tf_chunks else np.zeros(0, dtype=np.float32)
+            doc_lengths = np.concatenate(
+                [np.asarray(self._doc_lengths, dtype=np.float32), np.asarray(self._pending_lengths, dtype=np.float32)]
+            )
+            doc_ids = [*self._doc_ids, *self._pending_doc_ids]
+
+            generation = self._generation + 1
+            files = {key: pattern.format(generation) for key, pattern in _DATA_FILES.items()}
+            self._write_npy(files["posting_docs"], posting_docs)
+            self._write_npy(files["posting_tfs"], posting_tfs)
+            self._write_npy(files["doc_lengths"], doc_lengths)
+            self._write_json(files["doc_ids"], doc_ids)
+            self._write_json(
+                _META_FILE,
+                {
+                    "k1": self.k1,
+                    "b": self.b,
+                    "n_docs": len(doc_ids),
+                    "total_length": self._total_length,
+                    "generation": generation,
+                    "files": files,
+                    "terms": {term: list(span) for term, span in merged_terms.items()},
+                },
+            )
+            logger.info("Saved BM25 index with %s documents to %s", len(doc_ids), self.index_dir)
+            # The new base already holds everything in the old log. Readers
+            # still on the previous generation keep its files until the next
+            # save; mapped files stay readable after deletion anyway.
+            self._log.remove()
+            self._remove_generations(below=generation - 1)
+            self.load()
+
+    def _remove_generations(self, below: Optional[int] = None) -> None:
+        for name in os.listdir(self.index_dir):
+            match = _DATA_FILE_PATTERN.match(name)
+            if match and (below is None or int(match.group(1)) < below):
+                os.remove(self._path(name))
+
+    def _write_npy(self, name: str, array: np.ndarray) -> None:
+        tmp_path = self._path(f"{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, self._path(name))
+
+    def _write_json(self, name: str, payload) -> None:
+        tmp_path = self._path(f"{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._path(name))
+
+    def clear(self) -> None:
+        with self._lock:
+            if os.path.exists(self._path(_META_FILE)):
+                os.remove(self._path(_META_FILE))
+            if os.path.isdir(self.index_dir):
+                self._remove_generations()
+                remove_delta_logs(self._path("postings"))
+            self._reset_state()
+            self._loaded_mtime = None
+
+    def _term_postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        doc_parts: List[np.ndarray] = []
+        tf_parts: List[np.ndarray] = []
+        span = self._terms.get(term)
+        if span:
+            start, length = span
+            doc_parts.append(self._posting_docs[start:start + length])
+            tf_parts.append(self._posting_tfs[start:start + length])
+        pending = self._pending_postings.get(term)
+        if pending:
+            doc_parts.append(np.asarray(pending[0], dtype=np.int32))
+            tf_parts.append(np.asarray(pending[1], dtype=np.float32))
+        if not doc_parts:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if len(doc_parts) == 1:
+            return doc_parts[0], tf_parts[0]
+        return np.concatenate(doc_parts), np.concatenate(tf_parts)
+
+    def score(self, query: str) -> np.ndarray:
+        """
+        BM25 scores for every indexed row (zeros for rows without a match).
+        """
+        n_docs = len(self)
+        scores = np.zeros(n_docs, dtype=np.float32)
+        if not n_docs:
+            return scores
+
+        with self._lock:
+            if self._pending_lengths:
+                doc_lengths = np.concatenate(
+                    [np.asarray(self._doc_lengths), np.asarray(self._pending_lengths, dtype=np.float32)]
+                )
+            else:
+                doc_lengths = self._doc_lengths
+            avg_length = self._total_length / n_docs or 1.0
+
+            for term in set(tokenize(query)):
+                rows, tfs = self._term_postings(term)
+                if not len(rows):
+                    continue
+                df = len(rows)
+                idf = np.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+                norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[rows] / avg_length)
+                # Postings hold each row at most once per term, so fancy-index
+                # accumulation is safe here.
+                scores[rows] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+        return scores
+
+    def rows_for_ids(self, doc_ids: Iterable[str]) -> np.ndarray:
+        with self._lock:
+            n_docs = len(self)
+            if self._row_by_id is None or self._row_by_id[1] != n_docs:
+                all_ids = [*self._doc_ids, *self._pending_doc_ids]
+                self._row_by_id = ({doc_id: row for row, doc_id in enumerate(all_ids)}, n_docs)
+            row_by_id = self._row_by_id[0]
+        return np.fromiter((row_by_id[doc_id] for doc_id in doc_ids if doc_id in row_by_id), dtype=np.int64)
+
+    def search(self, query: str, k: int = 10, doc_ids: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Returns up to `k` (doc_id, score) pairs in descending score order,
+        ranking only `doc_ids` when given (e.g. a metadata filter's matches).
+        """
+        scores = self.score(query)
+        rows = np.arange(len(scores)) if doc_ids is None else self.rows_for_ids(doc_ids)
+        if not len(rows) or k <= 0:
+            return []
+        candidate_scores = scores[rows]
+        k = min(k, len(rows))
+        top = np.argpartition(-candidate_scores, k - 1)[:k]
+        top = top[np.argsort(-candidate_scores[top])]
+        all_ids = self._doc_ids
+        pending_ids = self._pending_doc_ids
+        base_count = len(all_ids)
+        hits = []
+        for row, score in zip(rows[top], candidate_scores[top]):
+            if score <= 0:
+                break
+            doc_id = all_ids[row] if row < base_count else pending_ids[row - base_count]
+            hits.append((doc_id, float(score)))
+        return hits
+
+
+_INDEXES: Dict[str, BM25Index] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def sparse_index_dir(persist_directory: str, collection_name: str) -> str:
+    return os.path.join(persist_directory, f"bm25_{collection_name}")
+
+
+def get_sparse_index(persist_directory: str, collection_name: str) -> BM25Index:
+    """
+    Process-wide BM25 index per collection, refreshed if another process has
+    saved a newer version to disk.
+    """
+    index_dir = sparse_index_dir(persist_directory, collection_name)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(index_dir)
+        if index is None:
+            index = BM25Index(index_dir)
+            _INDEXES[index_dir] = index
+    index.refresh_if_stale()
+    return index
+
@@ -2,9 +2,10 @@
 This file contains authentication dependencies (get_current_user, get_current_active_user).
 '''
 
-from typing import Generator
+import asyncio
+from typing import Awaitable, Generator, TypeVar
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
@@ -19,6 +20,9 @@ reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
 )
 
+T = TypeVar("T")
+CLIENT_CLOSED_REQUEST = 499
+
 def get_db() -> Generator:
     try:
         db = SessionLocal()
@@ -53,3 +57,22 @@ def get_current_active_user(
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[T], poll_interval: float = 0.25) -> T:
+    """
+    Runs `awaitable` as a task and cancels it if the client disconnects first,
+    so abandoned requests stop consuming retrieval and LLM capacity.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _pending = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -4,7 +4,7 @@ This file combines all the routers.
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, templates, documents, orchestrator, documents_crud, upload, research, documents_export #, livelaw, corpus
+from app.api.v1.endpoints import auth, templates, documents, orchestrator, documents_crud, upload, research, documents_export, metrics #, livelaw, corpus
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -14,6 +14,7 @@ api_router.include_router(documents_crud.router, prefix="/documents", tags=["doc
 api_router.include_router(documents_export.router, prefix="/documents", tags=["documents_export"])
 api_router.include_router(upload.router, prefix="/upload", tags=["upload"])
 api_router.include_router(research.router, prefix="/research", tags=["research"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
 
 # api_router.include_router(livelaw.router, prefix="/livelaw", tags=["livelaw"])
 # api_router.include_router(corpus.router, prefix="/corpus", tags=["corpus"])
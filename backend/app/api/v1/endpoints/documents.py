@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import re
 from fastapi import APIRouter, Depends, HTTPException
@@ -8,7 +9,7 @@ from app.models.models import User  # Import User explicitly
 from app.schemas import document as schemas_document
 from app.schemas.document import DocumentGenerate, GhostSuggestRequest, GhostSuggestResponse
 from app.api import deps
-from app.agents.document_generator.assembly_engine import assembly_engine
+from app.agents.document_generator.assembly_engine import SectionGenerationError, assembly_engine
 from app.agents.document_generator.agentic_policy import should_escalate_agentic
 from app.agents.document_generator.legal_validation import (
     build_citation_checks,
@@ -18,11 +19,15 @@ from app.agents.document_generator.legal_validation import (
 )
 from app.agents.document_generator.ghost_typing import ghost_typing_engine
 from app.integrations.indiankanoon.data_processor import IndianKanoonDataProcessor
+from app.core.config import settings
+from app.services.context_packer import context_packer, context_token_budget
 from app.services.retrieval_service import RetrievalService
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+GROUNDING_TOKENS_PER_SNIPPET = 300
+
 
 def _build_retrieval_query(case_facts: dict) -> str:
     """
@@ -59,12 +64,13 @@ def _select_retrieval_strategy(query: str, case_facts: dict) -> dict:
     return {"strategy": "dense", "k": 5, "reason": "default_dense_path"}
 
 
-def _fetch_grounded_legal_context(query: str, strategy: str = "dense", k: int = 5) -> tuple[str, list[dict]]:
+async def _fetch_grounded_legal_context(query: str, strategy: str = "dense", k: int = 5) -> tuple[str, list[dict]]:
     """
     Retrieve supporting legal snippets and source metadata for generation grounding.
-    Compatible with both RetrievalService APIs:
-    - retrieve_documents(query, strategy, k)
-    - get_persistent_retriever(k).invoke(query)
+    Compatible with all RetrievalService APIs, preferring the non-blocking one:
+    - aretrieve_documents(query, strategy, k)
+    - retrieve_documents(query, strategy, k), run off the event loop
+    - get_persistent_retriever(k).invoke(query), run off the event loop
     """
     if not query:
         return "", []
@@ -73,23 +79,30 @@ def _fetch_grounded_legal_context(query: str, strategy: str = "dense", k: int =
         retrieval_service = RetrievalService()
 
         # Prefer richer API if present
-        if hasattr(retrieval_service, "retrieve_documents"):
-            docs = retrieval_service.retrieve_documents(query=query, strategy=strategy, k=k)
+        if hasattr(retrieval_service, "aretrieve_documents"):
+            docs = await retrieval_service.aretrieve_documents(query=query, strategy=strategy, k=k)
+        elif hasattr(retrieval_service, "retrieve_documents"):
+            docs = await asyncio.to_thread(retrieval_service.retrieve_documents, query=query, strategy=strategy, k=k)
         else:
             retriever = retrieval_service.get_persistent_retriever(k=k)
-            docs = retriever.invoke(query)
+            docs = await asyncio.to_thread(retriever.invoke, query)
     except Exception as e:
         logger.warning("Retrieval failed (strategy=%s, k=%s): %s", strategy, k, e)
         return "", []
 
+    docs = list(docs or [])
+    # Whole-sentence snippets (~1200 characters each) within the grounding
+    # share of the prompt, skipping chunks that overlap a better one.
+    packed = context_packer.pack(
+        [(getattr(doc, "page_content", "") or "") for doc in docs],
+        budget=min(settings.GROUNDING_CONTEXT_TOKENS, context_token_budget()),
+        max_tokens_per_passage=GROUNDING_TOKENS_PER_SNIPPET,
+    )
+
     context_blocks = []
     sources = []
-    for idx, doc in enumerate(docs or []):
-        content = (getattr(doc, "page_content", "") or "").strip()
-        if not content:
-            continue
-
-        snippet = content[:1200]
+    for idx, (doc_idx, snippet) in enumerate(packed):
+        doc = docs[doc_idx]
         metadata = getattr(doc, "metadata", {}) or {}
         title = metadata.get("title") or "Unknown Title"
         source = metadata.get("source") or "Unknown Source"
@@ -169,7 +182,7 @@ async def generate_document(
     # 4) Retrieve supporting legal context
     retrieval_query = _build_retrieval_query(merged_facts)
     retrieval_strategy = _select_retrieval_strategy(retrieval_query, merged_facts)
-    legal_context, legal_sources = _fetch_grounded_legal_context(
+    legal_context, legal_sources = await _fetch_grounded_legal_context(
         retrieval_query,
         strategy=retrieval_strategy["strategy"],
         k=retrieval_strategy["k"],
@@ -188,6 +201,9 @@ async def generate_document(
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except SectionGenerationError as e:
+        # Never persist a draft with sections left as raw template text.
+        raise HTTPException(status_code=502, detail=str(e))
 
     retrieval_sources = legal_sources if retrieval_query else []
     clause_traceability = build_clause_traceability(generated_content, retrieval_sources)
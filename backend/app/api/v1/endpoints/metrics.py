@@ -0,0 +1,53 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.agents.document_generator.llm_client import llm_client
+from app.api import deps
+from app.models.models import User
+from app.services.llm_cache import llm_response_cache
+from app.services.retrieval_cache import retrieval_cache
+from app.services.single_flight import llm_single_flight, retrieval_single_flight
+
+router = APIRouter()
+
+@router.get("/retrieval-cache")
+def retrieval_cache_metrics(
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Hit/miss counters for the retrieval result cache.
+    """
+    return retrieval_cache.metrics()
+
+
+@router.get("/llm-cache")
+def llm_cache_metrics(
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    LLM response cache hits, misses and bypasses per caller. Ghost typing
+    and generation opt out of the cache, so they report only bypasses.
+    """
+    return llm_response_cache.stats()
+
+
+@router.get("/llm-queue")
+def llm_queue_metrics(
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Queue-wait time per LLM priority class and per-key Groq budgets.
+    """
+    scheduler = llm_client.groq_scheduler
+    return {"priorities": scheduler.queue_stats(), "keys": scheduler.stats()}
+
+
+@router.get("/single-flight")
+def single_flight_metrics(
+    current_user: User = Depends(deps.get_current_active_user)
+) -> Any:
+    """
+    Calls coalesced onto an identical in-flight LLM or retrieval call.
+    """
+    return {"llm": llm_single_flight.stats(), "retrieval": retrieval_single_flight.stats()}
@@ -1,5 +1,7 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from typing import Any, AsyncIterator
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.api import deps
@@ -13,6 +15,7 @@ research_agent = LegalResearchAgent()
 @router.post("/query", response_model=ResearchResponse)
 async def research_query(
     *,
+    request: Request,
     db: Session = Depends(deps.get_db),
     query_in: ResearchQuery,
     current_user: User = Depends(deps.get_current_active_user)
@@ -21,7 +24,49 @@ async def research_query(
     Perform legal research using the RAG agent.
     """
     try:
-        result = await research_agent.answer_query(query_in.query, k=query_in.limit)
+        result = await deps.run_until_disconnected(
+            request,
+            research_agent.answer_query(
+                query_in.query,
+                k=query_in.limit,
+                filters=query_in.filters.model_dump(exclude_none=True) if query_in.filters else None,
+            ),
+        )
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/query/stream")
+async def research_query_stream(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    query_in: ResearchQuery,
+    current_user: User = Depends(deps.get_current_active_user)
+) -> StreamingResponse:
+    """
+    Streaming legal research as server-sent events: a `sources` event once
+    retrieval finishes, `token` events as the answer is generated, then
+    `done` (or `error`).
+    """
+    filters = query_in.filters.model_dump(exclude_none=True) if query_in.filters else None
+
+    async def _events() -> AsyncIterator[str]:
+        async for event, data in research_agent.stream_answer(query_in.query, k=query_in.limit, filters=filters):
+            if await request.is_disconnected():
+                break
+            yield _sse_event(event, data)
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -22,6 +22,22 @@ class Settings(BaseSettings):
 
     CHROMA_HOST: str
     CHROMA_PORT: int
+    # "chroma" (persistent dir / HTTP server) or "local" (built-in numpy engine)
+    VECTOR_STORE_BACKEND: str = "chroma"
+    LOCAL_VECTOR_STORE_DTYPE: str = "float32"
+    # Local engine index: "flat" (exact) or "ivf" (approximate, trained once
+    # the corpus is large enough). IVF_NLIST=0 picks ~4*sqrt(rows) lists;
+    # IVF_NPROBE trades recall for latency at query time.
+    VECTOR_INDEX_TYPE: str = "flat"
+    IVF_NLIST: int = 0
+    IVF_NPROBE: int = 8
+    # Local engine first-stage codes: "none", "int8" (4x smaller) or "binary"
+    # (32x smaller); top candidates are re-scored with the float vectors.
+    # QUANTIZED_RESCORE_FACTOR=0 uses the per-mode default (4 / 16).
+    # Keep "none" until `benchmark_retrieval.py --eval-mrr` shows the mode
+    # within 1% of float32 MRR on a real collection (not yet measured).
+    VECTOR_QUANTIZATION: str = "none"
+    QUANTIZED_RESCORE_FACTOR: int = 0
 
     GROQ_API_KEY: Optional[str] = None
     GROQ_API_KEY_2: Optional[str] = None
@@ -29,6 +45,20 @@ class Settings(BaseSettings):
     GROQ_API_KEY_4: Optional[str] = None
     GROQ_API_KEY_5: Optional[str] = None
     GROQ_API_KEY_PROJECT: Optional[str] = None
+    # Per-key Groq quotas enforced by the client-side scheduler
+    GROQ_REQUESTS_PER_MINUTE: int = 25
+    GROQ_TOKENS_PER_MINUTE: int = 12000
+    # Hard share of each key's quota for separate background processes
+    # (evaluation runs), which the API server's scheduler cannot see
+    GROQ_BACKGROUND_PROCESS_SHARE: float = 0.25
+    # Connection pool shared by all Groq keys (HTTP/2 needs the h2 package)
+    GROQ_HTTP2: bool = True
+    GROQ_MAX_CONNECTIONS: int = 20
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    GROQ_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    GROQ_TIMEOUT_SECONDS: float = 60.0
+    # Template sections drafted concurrently per document
+    SECTION_GENERATION_CONCURRENCY: int = 4
     GEMINI_API_KEY: str
     INDIAN_KANOON_API_KEY: str
     REDIS_HOST: str
@@ -36,6 +66,62 @@ class Settings(BaseSettings):
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
 
+    # Embeddings (shared by every retriever/store via the embedding registry)
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_DEVICE: str = "cpu"
+    EMBEDDING_WARMUP_ON_STARTUP: bool = True
+    # On-disk embedding cache shared by all workers on the host
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = "embedding_cache"
+    # Vectors kept per model (~1.5 KB each at 384 dims); least recently used
+    # entries are evicted past this
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500000
+
+    # Async retrieval: embedding/BM25 work runs on a bounded thread pool, and
+    # vector-store I/O goes through Chroma's async HTTP client when enabled.
+    # CHROMA_ASYNC_HTTP moves the whole collection (ingestion and sync reads
+    # included) to the CHROMA_HOST server, so both paths search one corpus
+    RETRIEVAL_MAX_WORKERS: int = 4
+    CHROMA_ASYNC_HTTP: bool = False
+
+    # Retrieval result cache ("local" in-process LRU, or "redis" shared by workers)
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_BACKEND: str = "local"
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 1024
+    RETRIEVAL_CACHE_TTL_SECONDS: int = 900
+    RETRIEVAL_CACHE_REDIS_DB: int = 2
+
+    # Optional cross-encoder rerank of the top fused candidates. Queries that
+    # cannot be scored within the time budget keep their fused order. Off
+    # until its MRR gain and latency cost have been measured on a real
+    # collection (`benchmark_retrieval.py --eval-mrr --rerank`).
+    RERANKER_ENABLED: bool = False
+    RERANKER_MODEL_NAME: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_CANDIDATES: int = 20
+    RERANKER_BATCH_SIZE: int = 16
+    RERANKER_MAX_LENGTH: int = 256
+    RERANKER_TIME_BUDGET_MS: float = 300.0
+    RERANKER_CACHE_MAX_ENTRIES: int = 8192
+
+    # Retrieved-context token budgets. CONTEXT_TOKEN_BUDGET=0 uses the
+    # generation model's budget from app.services.context_packer; drafting
+    # grounding gets its own smaller share of the prompt.
+    CONTEXT_TOKEN_BUDGET: int = 0
+    GROUNDING_CONTEXT_TOKENS: int = 2000
+
+    # LLM response cache (SQLite file shared by every worker on the host)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "llm_cache/responses.sqlite"
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    LLM_CACHE_TTL_SECONDS: int = 604800
+
+    # Research answers reused for paraphrased questions that retrieve the
+    # same sources (cosine similarity of the query embeddings >= threshold)
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.88
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 512
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+
     UPLOAD_DIR: str
     PROCESSED_DIR: str
 
@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_CENTROIDS_FILE = "ivf_centroids.npy"
+_ASSIGNMENTS_FILE = "ivf_assignments.npy"
+_META_FILE = "ivf_meta.json"
+
+# Training points per list; k-means quality flattens out well before this.
+TRAIN_POINTS_PER_LIST = 64
+MIN_POINTS_PER_LIST = 39
+
+
+def default_nlist(n_rows: int) -> int:
+    return max(1, min(n_rows, int(4 * np.sqrt(n_rows))))
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def spherical_kmeans(vectors: np.ndarray, nlist: int, n_iter: int = 12, seed: int = 0) -> np.ndarray:
+    """
+    K-means on unit vectors with cosine assignment; returns unit centroids.
+    Empty clusters are re-seeded from random points.
+    """
+    rng = np.random.default_rng(seed)
+    vectors = normalize_rows(vectors)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        counts = np.bincount(assignments, minlength=nlist)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over a LocalCollection's rows.
+
+    Rows are clustered into `nlist` cells by spherical k-means; a query
+    scores only the rows in its `nprobe` closest cells, so `nprobe` trades
+    recall for latency at query time. New rows are assigned to their
+    nearest centroid on insert without retraining; retrain with `train()`
+    after the corpus has grown substantially.
+    """
+
+    def __init__(self, path: str, nlist: int = 0, nprobe: int = 8):
+        self.path = path
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._lists: List[np.ndarray] = []
+        self.load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def __len__(self) -> int:
+        return len(self._assignments)
+
+    def min_train_rows(self, n_rows: int) -> int:
+        return (self.nlist or default_nlist(n_rows)) * MIN_POINTS_PER_LIST
+
+    def load(self) -> None:
+        with self._lock:
+            self._centroids = None
+            self._assignments = np.zeros(0, dtype=np.int32)
+            self._lists = []
+            if not os.path.exists(self._file(_META_FILE)):
+                return
+            with open(self._file(_META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.nlist = meta["nlist"]
+            self._centroids = np.load(self._file(_CENTROIDS_FILE))
+            self._assignments = np.load(self._file(_ASSIGNMENTS_FILE))
+            self._rebuild_lists()
+
+    def _rebuild_lists(self) -> None:
+        order = np.argsort(self._assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(self._assignments, minlength=len(self._centroids))
+        self._lists = np.split(order, np.cumsum(counts)[:-1])
+
+    def save(self) -> None:
+        with self._lock:
+            if not self.is_trained:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            for name, array in ((_CENTROIDS_FILE, self._centroids), (_ASSIGNMENTS_FILE, self._assignments)):
+                tmp_path = self._file(f"{name}.tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp_path, self._file(name))
+            tmp_path = self._file(f"{_META_FILE}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"nlist": int(len(self._centroids)), "n_rows": len(self._assignments)}, f)
+            os.replace(tmp_path, self._file(_META_FILE))
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in (_CENTROIDS_FILE, _ASSIGNMENTS_FILE, _META_FILE):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            self._centroids = None
+            self._assignments = np.zeros(0, dtype=np.int32)
+            self._lists = []
+
+    def train(self, vectors: np.ndarray, assign_block_rows: int = 32768, seed: int = 0) -> None:
+        """
+        Trains centroids on a sample of `vectors` (any array-like, e.g. a
+        memmap) and assigns every row.
+        """
+        n_rows = len(vectors)
+        nlist = min(self.nlist or default_nlist(n_rows), n_rows)
+        rng = np.random.default_rng(seed)
+        sample_size = min(n_rows, nlist * TRAIN_POINTS_PER_LIST)
+        sample_rows = np.sort(rng.choice(n_rows, size=sample_size, replace=False))
+        centroids = spherical_kmeans(np.asarray(vectors[sample_rows], dtype=np.float32), nlist, seed=seed)
+
+        assignments = np.empty(n_rows, dtype=np.int32)
+        for start in range(0, n_rows, assign_block_rows):
+            block = np.asarray(vectors[start:start + assign_block_rows], dtype=np.float32)
+            assignments[start:start + len(block)] = np.argmax(normalize_rows(block) @ centroids.T, axis=1)
+
+        with self._lock:
+            self._centroids = centroids
+            self._assignments = assignments
+            self._rebuild_lists()
+        logger.info("Trained IVF index with %s lists over %s rows", nlist, n_rows)
+
+    def add(self, vectors: np.ndarray) -> None:
+        """
+        Assigns rows appended to the collection (in row order) to their
+        nearest existing centroid.
+        """
+        if not self.is_trained or not len(vectors):
+            return
+        with self._lock:
+            start_row = len(self._assignments)
+            new_assignments = np.argmax(normalize_rows(vectors) @ self._centroids.T, axis=1).astype(np.int32)
+            self._assignments = np.concatenate([self._assignments, new_assignments])
+            new_rows = np.arange(start_row, start_row + len(new_assignments), dtype=np.int64)
+            for list_id in np.unique(new_assignments):
+                self._lists[list_id] = np.concatenate([self._lists[list_id], new_rows[new_assignments == list_id]])
+
+    def candidates(self, queries: np.ndarray, nprobe: Optional[int] = None) -> List[np.ndarray]:
+        """
+        Row ids in the `nprobe` closest lists of each (unit-normalized) query.
+        """
+        nprobe = max(1, min(nprobe or self.nprobe, len(self._centroids)))
+        centroid_sims = queries @ self._centroids.T
+        probe = np.argpartition(-centroid_sims, nprobe - 1, axis=1)[:, :nprobe]
+        return [np.concatenate([self._lists[list_id] for list_id in lists]) for lists in probe]
+
+    def stats(self) -> dict:
+        sizes = np.array([len(rows) for rows in self._lists]) if self._lists else np.zeros(0)
+        return {
+            "trained": self.is_trained,
+            "nlist": int(len(self._centroids)) if self.is_trained else self.nlist,
+            "nprobe": self.nprobe,
+            "rows": len(self._assignments),
+            "max_list_size": int(sizes.max()) if len(sizes) else 0,
+        }
+
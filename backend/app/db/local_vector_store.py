@@ -0,0 +1,802 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from app.agents.legal_research.metadata_index import (
+    DATE_ORDINAL_KEY,
+    FILTERABLE_FIELDS,
+    MetadataIndex,
+    get_metadata_index,
+)
+from app.db.ivf_index import IVFIndex, normalize_rows
+from app.db.quantization import (
+    DEFAULT_RESCORE_FACTORS,
+    QUANTIZATION_MODES,
+    QuantizedCodes,
+)
+
+logger = logging.getLogger(__name__)
+
+_META_FILE = "meta.json"
+_ROWS_FILE = "rows.jsonl"
+_VECTORS_FILE = "vectors.bin"
+# Sidecars of collections written before rows.jsonl; read once and
+# converted on the next add.
+_LEGACY_FILES = ("ids.json", "documents.json", "metadata_columns.json")
+
+# Rows scored per matrix multiply; bounds the temporary similarity matrix.
+SEARCH_BLOCK_ROWS = 32768
+SUPPORTED_DTYPES = {"float32": np.float32, "float16": np.float16}
+_RANGE_OPERATORS = {"$gt": np.greater, "$gte": np.greater_equal, "$lt": np.less, "$lte": np.less_equal}
+
+
+class LocalCollection:
+    """
+    Built-in vector store engine with the subset of the Chroma collection API
+    the retrieval path uses (`add`, `query`, `get`, `count`).
+
+    Embeddings live in one contiguous float32/float16 matrix in a raw file
+    opened with `np.memmap`; ids, documents and metadata live in a JSON-lines
+    sidecar with one row per line. Both files are only appended to, so an
+    add costs O(batch), and `meta.json` records how much of them readers may
+    trust. Queries are exact cosine top-k computed with one matrix multiply
+    per block of rows for the whole query batch, and distances are reported
+    as `1 - cosine similarity`.
+
+    With `index_type="ivf"` an inverted-file index (see `IVFIndex`) is
+    trained once the collection is large enough, and queries then score only
+    the rows in their `nprobe` closest clusters.
+
+    With `quantization="int8"` or `"binary"` the first search stage scores
+    compact in-memory codes (see `QuantizedCodes`) and only the best
+    `k * rescore_factor` candidates are re-scored with the float vectors,
+    which stay on disk behind the memmap.
+
+    `where` filters (Chroma syntax) on the filterable fields and the date
+    ordinal are answered from the collection's `MetadataIndex`, which
+    DocumentStore keeps in sync on every write; other fields, or a
+    collection without a built index, are matched by scanning the metadata
+    columns. The search then scores only the matching rows.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        name: str = "",
+        dtype: str = "float32",
+        index_type: str = "flat",
+        nlist: int = 0,
+        nprobe: int = 8,
+        quantization: str = "none",
+        rescore_factor: int = 0,
+        metadata_index: Optional[MetadataIndex] = None,
+    ):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype {dtype!r}; expected one of {sorted(SUPPORTED_DTYPES)}")
+        if index_type not in ("flat", "ivf"):
+            raise ValueError(f"Unsupported index type {index_type!r}; expected 'flat' or 'ivf'")
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unsupported quantization {quantization!r}; expected one of {QUANTIZATION_MODES}")
+        self.path = path
+        self.name = name
+        self._lock = threading.RLock()
+        self._dtype_name = dtype
+        self._loaded_mtime: Optional[float] = None
+        self._ivf = IVFIndex(path, nlist=nlist, nprobe=nprobe) if index_type == "ivf" else None
+        self._codes = QuantizedCodes(path, quantization) if quantization != "none" else None
+        self.rescore_factor = rescore_factor or DEFAULT_RESCORE_FACTORS.get(quantization, 1)
+        self.metadata_index = metadata_index
+        self._reset_state()
+        self.load()
+
+    def _reset_state(self) -> None:
+        self.dim: Optional[int] = None
+        self._ids: List[str] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._documents: List[str] = []
+        self._columns: Dict[str, List[Any]] = {}
+        self._vectors = np.zeros((0, 0), dtype=SUPPORTED_DTYPES[self._dtype_name])
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._rows_bytes = 0
+        self._epoch: Optional[str] = None
+        self._legacy = False
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def dtype(self):
+        return SUPPORTED_DTYPES[self._dtype_name]
+
+    def count(self) -> int:
+        self.refresh_if_stale()
+        return len(self._ids)
+
+    def load(self) -> None:
+        with self._lock:
+            self._reset_state()
+            if not os.path.exists(self._file(_META_FILE)):
+                self._loaded_mtime = None
+                return
+            self._loaded_mtime = os.path.getmtime(self._file(_META_FILE))
+            with open(self._file(_META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self._dtype_name = meta["dtype"]
+            self.dim = meta["dim"]
+            self._epoch = meta.get("epoch")
+            if "rows_bytes" in meta:
+                self._read_rows(meta["rows_bytes"])
+            else:
+                self._load_legacy_sidecars()
+            self._map_vectors()
+            if self._ivf is not None:
+                self._ivf.load()
+
+    def _load_legacy_sidecars(self) -> None:
+        ids_file, documents_file, metadata_file = (self._file(name) for name in _LEGACY_FILES)
+        with open(ids_file, "r", encoding="utf-8") as f:
+            self._ids = json.load(f)
+        with open(documents_file, "r", encoding="utf-8") as f:
+            self._documents = json.load(f)
+        with open(metadata_file, "r", encoding="utf-8") as f:
+            self._columns = json.load(f)
+        self._row_by_id = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        self._legacy = True
+
+    def refresh_if_stale(self) -> None:
+        """
+        Catches up when another process (e.g. an ingest script) has written
+        to the collection since it was loaded. Rows appended since then are
+        read incrementally; a cleared or converted collection is reloaded.
+        """
+        meta_path = self._file(_META_FILE)
+        if not os.path.exists(meta_path) or os.path.getmtime(meta_path) == self._loaded_mtime:
+            return
+        with self._lock:
+            mtime = os.path.getmtime(meta_path)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if self._legacy or self._epoch is None or meta.get("epoch") != self._epoch or meta.get("rows_bytes", -1) < self._rows_bytes:
+                self.load()
+                return
+            start_row = len(self._ids)
+            self._read_rows(meta["rows_bytes"])
+            self._loaded_mtime = mtime
+            self._map_vectors(start_row)
+            if self._ivf is not None:
+                self._ivf.load()
+
+    def _read_rows(self, end: int) -> None:
+        """
+        Appends the rows stored in the sidecar between the bytes already
+        read and `end`.
+        """
+        with open(self._file(_ROWS_FILE), "rb") as f:
+            f.seek(self._rows_bytes)
+            data = f.read(end - self._rows_bytes)
+        rows = [json.loads(line) for line in data.splitlines() if line.strip()]
+        self._rows_bytes = end
+        self._append_rows([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows])
+
+    def _append_rows(self, ids: Sequence[str], documents: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        start_row = len(self._ids)
+        for doc_id in ids:
+            self._row_by_id[doc_id] = len(self._ids)
+            self._ids.append(doc_id)
+        self._documents.extend(documents)
+        for field in {key for metadata in metadatas for key in metadata}:
+            self._columns.setdefault(field, [None] * start_row)
+        for field, column in self._columns.items():
+            column.extend(metadata.get(field) for metadata in metadatas)
+
+    def _map_vectors(self, start_row: int = 0) -> None:
+        """
+        Maps the vector file and computes norms (and quantized codes) for the
+        rows from `start_row` on; earlier rows keep theirs.
+        """
+        if not self._ids:
+            return
+        n_rows = len(self._ids)
+        self._vectors = np.memmap(self._file(_VECTORS_FILE), dtype=self.dtype, mode="r", shape=(n_rows, self.dim))
+        norms = np.empty(n_rows - start_row, dtype=np.float32)
+        for start in range(start_row, n_rows, SEARCH_BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            norms[start - start_row:start - start_row + len(block)] = np.linalg.norm(block, axis=1)
+        norms[norms == 0] = 1.0
+        self._norms = np.concatenate([self._norms[:start_row], norms])
+        if self._codes is not None:
+            if start_row == 0:
+                self._codes.load(self._vectors)
+            else:
+                self._codes.extend(self._vectors)
+
+    def _write_json(self, name: str, payload: Any) -> None:
+        tmp_path = self._file(f"{name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._file(name))
+
+    def _append_file(self, name: str, length: int, data: bytes) -> None:
+        """
+        Writes `data` after the first `length` bytes of a file, dropping
+        anything past them that a crashed writer left unaccounted for.
+        """
+        with open(self._file(name), "ab") as f:
+            f.truncate(length)
+            f.write(data)
+
+    @staticmethod
+    def _row_line(doc_id: str, document: str, metadata: Dict[str, Any]) -> bytes:
+        return json.dumps([doc_id, document, metadata], separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def _convert_legacy_sidecars(self) -> None:
+        """
+        Writes every row loaded from the old JSON sidecars to the row file;
+        done once, on the first add after loading such a collection.
+        """
+        data = b"".join(
+            self._row_line(doc_id, self._documents[row], self._metadata(row)) for row, doc_id in enumerate(self._ids)
+        )
+        tmp_path = self._file(f"{_ROWS_FILE}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._file(_ROWS_FILE))
+        self._rows_bytes = len(data)
+        self._epoch = None
+        self._legacy = False
+
+    def add(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        """
+        Appends rows; ids that already exist are skipped, as in Chroma.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("Expected one embedding per id")
+        documents = list(documents) if documents is not None else [""] * len(ids)
+        metadatas = list(metadatas) if metadatas is not None else [None] * len(ids)
+
+        with self._lock:
+            self.refresh_if_stale()
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match collection dimension {self.dim}")
+
+            keep: List[int] = []
+            seen = set()
+            for position, doc_id in enumerate(ids):
+                if doc_id in self._row_by_id or doc_id in seen:
+                    logger.warning("Skipping existing id %s in local collection %s", doc_id, self.name)
+                    continue
+                seen.add(doc_id)
+                keep.append(position)
+            if not keep:
+                return
+            new_ids = [ids[position] for position in keep]
+            new_documents = [documents[position] or "" for position in keep]
+            new_metadatas = [metadatas[position] or {} for position in keep]
+            start_row = len(self._ids)
+
+            os.makedirs(self.path, exist_ok=True)
+            converted = self._legacy
+            if converted:
+                self._convert_legacy_sidecars()
+            rows = b"".join(map(self._row_line, new_ids, new_documents, new_metadatas))
+            row_bytes = self.dim * np.dtype(self.dtype).itemsize
+            self._append_file(_VECTORS_FILE, start_row * row_bytes, matrix[keep].astype(self.dtype).tobytes())
+            self._append_file(_ROWS_FILE, self._rows_bytes, rows)
+            self._append_rows(new_ids, new_documents, new_metadatas)
+            self._rows_bytes += len(rows)
+            if self._codes is not None:
+                self._codes.append(matrix[keep], start_row)
+            if self._epoch is None:
+                self._epoch = uuid.uuid4().hex
+            # meta.json last: readers only trust rows it accounts for.
+            self._write_json(
+                _META_FILE,
+                {
+                    "dim": self.dim,
+                    "dtype": self._dtype_name,
+                    "count": len(self._ids),
+                    "rows_bytes": self._rows_bytes,
+                    "epoch": self._epoch,
+                },
+            )
+            self._loaded_mtime = os.path.getmtime(self._file(_META_FILE))
+            if converted:
+                for name in _LEGACY_FILES:
+                    os.remove(self._file(name))
+            self._map_vectors(start_row)
+            self._update_ann_index(start_row, matrix[keep])
+
+    def _update_ann_index(self, start_row: int, vectors: np.ndarray) -> None:
+        if self._ivf is None:
+            return
+        if not self._ivf.is_trained:
+            if len(self._ids) >= self._ivf.min_train_rows(len(self._ids)):
+                self.build_ann_index()
+            return
+        if len(self._ivf) == start_row:
+            self._ivf.add(vectors)
+            self._ivf.save()
+        # Otherwise the index is behind (e.g. mid-reload); rows it does not
+        # cover yet are scored exactly at query time.
+
+    def build_ann_index(self, nlist: Optional[int] = None) -> dict:
+        """
+        (Re)trains the IVF index over every row. Call after large ingests to
+        rebalance clusters that incremental inserts have skewed.
+        """
+        with self._lock:
+            if self._ivf is None:
+                self._ivf = IVFIndex(self.path)
+            if nlist is not None:
+                self._ivf.nlist = nlist
+            if self._ids:
+                self._ivf.train(self._vectors)
+                self._ivf.save()
+            return self._ivf.stats()
+
+    def ann_stats(self) -> Optional[dict]:
+        return self._ivf.stats() if self._ivf is not None else None
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Bytes of vector data searched in RAM versus kept on disk for
+        re-scoring.
+        """
+        float_bytes = len(self._ids) * (self.dim or 0) * np.dtype(self.dtype).itemsize
+        return {
+            "quantization": self._codes.mode if self._codes is not None else "none",
+            "float_vector_bytes": float_bytes,
+            "code_bytes": self._codes.nbytes if self._codes is not None else 0,
+            "norm_bytes": int(self._norms.nbytes),
+        }
+
+    def _metadata(self, row: int) -> Dict[str, Any]:
+        return {
+            field: column[row]
+            for field, column in self._columns.items()
+            if row < len(column) and column[row] is not None
+        }
+
+    def _columns_for(self, rows: Iterable[int], include: Sequence[str]) -> Dict[str, List[Any]]:
+        rows = list(rows)
+        result: Dict[str, List[Any]] = {"ids": [self._ids[row] for row in rows]}
+        result["documents"] = [self._documents[row] for row in rows] if "documents" in include else None
+        result["metadatas"] = [self._metadata(row) for row in rows] if "metadatas" in include else None
+        if "embeddings" in include:
+            result["embeddings"] = (
+                np.asarray(self._vectors[rows], dtype=np.float32) if rows else np.zeros((0, self.dim or 0), dtype=np.float32)
+            )
+        else:
+            result["embeddings"] = None
+        return result
+
+    def _rows_of(self, ids: Iterable[str]) -> np.ndarray:
+        return np.asarray([self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id], dtype=np.int64)
+
+    def _indexed(self, field: str) -> bool:
+        return (
+            self.metadata_index is not None
+            and self.metadata_index.is_built
+            and (field in FILTERABLE_FIELDS or field == DATE_ORDINAL_KEY)
+        )
+
+    def _value_rows(self, field: str, values: Sequence[Any]) -> np.ndarray:
+        """
+        Rows whose `field` equals one of `values`.
+        """
+        if field != DATE_ORDINAL_KEY and self._indexed(field):
+            return self._rows_of(self.metadata_index.ids_with_values(field, [str(value) for value in values]))
+        wanted = set(values)
+        return np.asarray(
+            [row for row, item in enumerate(self._columns.get(field, ())) if item is not None and item in wanted],
+            dtype=np.int64,
+        )
+
+    def _range_mask(self, field: str, operator: str, operand: Any) -> np.ndarray:
+        if field == DATE_ORDINAL_KEY and self._indexed(field) and isinstance(operand, int):
+            date_from = {"$gt": operand + 1, "$gte": operand}.get(operator)
+            date_to = {"$lt": operand - 1, "$lte": operand}.get(operator)
+            mask = np.zeros(len(self._ids), dtype=bool)
+            mask[self._rows_of(self.metadata_index.ids_in_date_range(date_from, date_to))] = True
+            return mask
+        column = np.full(len(self._ids), np.nan)
+        for row, item in enumerate(self._columns.get(field, ())):
+            if isinstance(item, (int, float)) and not isinstance(item, bool):
+                column[row] = item
+        # Missing values are NaN and never satisfy a range.
+        with np.errstate(invalid="ignore"):
+            return _RANGE_OPERATORS[operator](column, operand)
+
+    def _condition_mask(self, field: str, operator: str, operand: Any) -> np.ndarray:
+        if operator in ("$eq", "$ne", "$in", "$nin"):
+            values = operand if operator in ("$in", "$nin") else [operand]
+            mask = np.zeros(len(self._ids), dtype=bool)
+            mask[self._value_rows(field, values)] = True
+            return ~mask if operator in ("$ne", "$nin") else mask
+        if operator in _RANGE_OPERATORS:
+            return self._range_mask(field, operator, operand)
+        raise ValueError(f"Unsupported where operator {operator!r}")
+
+    def _filter_mask(self, where: Mapping[str, Any]) -> np.ndarray:
+        if self.metadata_index is not None:
+            self.metadata_index.refresh_if_stale()
+        return self._where_mask(where)
+
+    def _where_mask(self, where: Mapping[str, Any]) -> np.ndarray:
+        """
+        Boolean row mask for a Chroma-style `where` clause: `$and`/`$or`,
+        `$eq`/`$ne`/`$in`/`$nin` and numeric `$gt`/`$gte`/`$lt`/`$lte`.
+        """
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                masks = [self._where_mask(clause) for clause in condition]
+                if masks:
+                    mask &= np.logical_and.reduce(masks) if key == "$and" else np.logical_or.reduce(masks)
+                continue
+            if not isinstance(condition, Mapping):
+                condition = {"$eq": condition}
+            for operator, operand in condition.items():
+                mask &= self._condition_mask(key, operator, operand)
+        return mask
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        include: Sequence[str] = ("documents", "metadatas"),
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        self.refresh_if_stale()
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_by_id[doc_id] for doc_id in ids if doc_id in self._row_by_id]
+                if where:
+                    mask = self._filter_mask(where)
+                    rows = [row for row in rows if mask[row]]
+            else:
+                candidates = np.flatnonzero(self._filter_mask(where)) if where else range(len(self._ids))
+                end = None if limit is None else offset + limit
+                rows = [int(row) for row in candidates[offset:end]]
+            return self._columns_for(rows, include)
+
+    def _block_scores(self, queries: np.ndarray, start: int, end: int) -> np.ndarray:
+        if self._codes is not None:
+            return self._codes.scores(queries, start, end)
+        block = np.asarray(self._vectors[start:end], dtype=np.float32)
+        return (queries @ block.T) / self._norms[start:end]
+
+    def _top_k(self, queries: np.ndarray, k: int) -> Tuple[Sequence[np.ndarray], Sequence[np.ndarray]]:
+        """
+        Cosine top-k for every query, sorted by descending similarity:
+        exact over the float vectors, or over quantized codes followed by a
+        float re-scoring of the best candidates.
+        """
+        n_rows = len(self._ids)
+        queries = normalize_rows(queries)
+        first_k = k if self._codes is None else min(n_rows, k * self.rescore_factor)
+
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        best_sims = np.zeros((len(queries), 0), dtype=np.float32)
+        for start in range(0, n_rows, SEARCH_BLOCK_ROWS):
+            sims = self._block_scores(queries, start, min(start + SEARCH_BLOCK_ROWS, n_rows))
+            block_k = min(first_k, sims.shape[1])
+            top = np.argpartition(-sims, block_k - 1, axis=1)[:, :block_k]
+            best_rows = np.concatenate([best_rows, top + start], axis=1)
+            best_sims = np.concatenate([best_sims, np.take_along_axis(sims, top, axis=1)], axis=1)
+            if best_rows.shape[1] > first_k:
+                keep = np.argpartition(-best_sims, first_k - 1, axis=1)[:, :first_k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_sims = np.take_along_axis(best_sims, keep, axis=1)
+
+        if self._codes is not None:
+            results = [self._rescore(query, np.sort(rows), k) for query, rows in zip(queries, best_rows)]
+            return [rows for rows, _sims in results], [sims for _rows, sims in results]
+        order = np.argsort(-best_sims, axis=1, kind="stable")
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_sims, order, axis=1)
+
+    def _rescore(self, query: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact float top-k of one unit-normalized query over candidate rows
+        (sorted, so the memmap is read front to back).
+        """
+        sims = (np.asarray(self._vectors[rows], dtype=np.float32) @ query) / self._norms[rows]
+        top_k = min(k, len(rows))
+        if not top_k:
+            return rows[:0], sims[:0]
+        top = np.argpartition(-sims, top_k - 1)[:top_k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return rows[top], sims[top]
+
+    def _search_rows(self, query: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k of one unit-normalized query over candidate rows, pre-ranked
+        with the quantized codes when there are many candidates.
+        """
+        first_k = k * self.rescore_factor
+        if self._codes is not None and len(rows) > first_k:
+            approx = self._codes.scores(query[np.newaxis, :], rows=rows)[0]
+            rows = rows[np.argpartition(-approx, first_k - 1)[:first_k]]
+        return self._rescore(query, np.sort(rows), k)
+
+    def _top_k_rows(self, queries: np.ndarray, rows: np.ndarray, k: int) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        results = [self._search_rows(query, rows, k) for query in normalize_rows(queries)]
+        return [found for found, _sims in results], [sims for _found, sims in results]
+
+    def _top_k_ivf(
+        self,
+        queries: np.ndarray,
+        k: int,
+        nprobe: Optional[int],
+        allowed: Optional[np.ndarray] = None,
+    ) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """
+        Approximate top-k over the rows of each query's probed IVF lists,
+        plus any rows appended since the index last caught up. With a filter
+        (`allowed` rows), probed rows outside it are dropped, and a query
+        whose probes hold fewer than k allowed rows scans the whole subset.
+        """
+        queries = normalize_rows(queries)
+        tail = np.arange(len(self._ivf), len(self._ids), dtype=np.int64)
+        fallback = allowed if allowed is not None else np.arange(len(self._ids), dtype=np.int64)
+        allowed_mask = None
+        if allowed is not None:
+            allowed_mask = np.zeros(len(self._ids), dtype=bool)
+            allowed_mask[allowed] = True
+        all_rows, all_sims = [], []
+        for query, rows in zip(queries, self._ivf.candidates(queries, nprobe)):
+            rows = np.concatenate([rows, tail]) if len(tail) else rows
+            if allowed_mask is not None:
+                rows = rows[allowed_mask[rows]]
+            if len(rows) < k:
+                rows = fallback
+            rows, sims = self._search_rows(query, rows, k)
+            all_rows.append(rows)
+            all_sims.append(sims)
+        return all_rows, all_sims
+
+    def query(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        n_results: int = 10,
+        include: Sequence[str] = ("documents", "metadatas", "distances"),
+        nprobe: Optional[int] = None,
+        exact: bool = False,
+        where: Optional[Mapping[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Chroma-compatible query. `where` restricts the search to matching
+        rows; `nprobe` overrides the IVF probe count for this call and
+        `exact=True` bypasses the ANN index.
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[np.newaxis, :]
+
+        self.refresh_if_stale()
+        with self._lock:
+            allowed = np.flatnonzero(self._filter_mask(where)) if where else None
+            k = min(n_results, len(self._ids) if allowed is None else len(allowed))
+            use_ivf = self._ivf is not None and self._ivf.is_trained and not exact
+            if k <= 0:
+                rows = np.zeros((len(queries), 0), dtype=np.int64)
+                sims = np.zeros((len(queries), 0), dtype=np.float32)
+            elif use_ivf:
+                rows, sims = self._top_k_ivf(queries, k, nprobe, allowed)
+            elif allowed is not None:
+                rows, sims = self._top_k_rows(queries, allowed, k)
+            else:
+                rows, sims = self._top_k(queries, k)
+
+            result: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": [], "embeddings": [], "distances": []}
+            for query_rows, query_sims in zip(rows, sims):
+                columns = self._columns_for(query_rows.tolist(), include)
+                for key in ("ids", "documents", "metadatas", "embeddings"):
+                    result[key].append(columns[key])
+                result["distances"].append((1.0 - query_sims).tolist())
+
+        for key in ("documents", "metadatas", "embeddings", "distances"):
+            if key not in include:
+                result[key] = None
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in (_META_FILE, _ROWS_FILE, _VECTORS_FILE, *_LEGACY_FILES):
+                if os.path.exists(self._file(name)):
+                    os.remove(self._file(name))
+            if self._ivf is not None:
+                self._ivf.clear()
+            if self._codes is not None:
+                self._codes.clear()
+            self._reset_state()
+            self._loaded_mtime = None
+
+
+def local_collection_path(persist_directory: str, collection_name: str) -> str:
+    return os.path.join(persist_directory, f"local_{collection_name}")
+
+
+def local_collection_options() -> Dict[str, Any]:
+    """
+    Engine options from settings, shared by every place that opens a
+    local collection.
+    """
+    from app.core.config import settings
+
+    return {
+        "dtype": settings.LOCAL_VECTOR_STORE_DTYPE,
+        "index_type": settings.VECTOR_INDEX_TYPE,
+        "nlist": settings.IVF_NLIST,
+        "nprobe": settings.IVF_NPROBE,
+        "quantization": settings.VECTOR_QUANTIZATION,
+        "rescore_factor": settings.QUANTIZED_RESCORE_FACTOR,
+    }
+
+
+def create_local_vector_store(
+    collection_name: str, embedding_function: Embeddings, persist_directory: str
+) -> "LocalVectorStore":
+    return LocalVectorStore(
+        collection_name=collection_name,
+        embedding_function=embedding_function,
+        persist_directory=persist_directory,
+        metadata_index=get_metadata_index(persist_directory, collection_name),
+        **local_collection_options(),
+    )
+
+
+def create_local_vector_client(persist_directory: str) -> "LocalVectorClient":
+    return LocalVectorClient(persist_directory, use_metadata_index=True, **local_collection_options())
+
+
+class LocalVectorClient:
+    """
+    Stand-in for `chromadb.HttpClient` backed by `LocalCollection`s on disk.
+    With `use_metadata_index`, each collection answers `where` filters from
+    the metadata index DocumentStore keeps next to it.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str,
+        dtype: str = "float32",
+        use_metadata_index: bool = False,
+        **collection_options: Any,
+    ):
+        self.persist_directory = persist_directory
+        self.dtype = dtype
+        self.use_metadata_index = use_metadata_index
+        self.collection_options = collection_options
+        self._collections: Dict[str, LocalCollection] = {}
+        self._lock = threading.Lock()
+
+    def get_or_create_collection(self, name: str, **_kwargs) -> LocalCollection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = LocalCollection(
+                    local_collection_path(self.persist_directory, name),
+                    name=name,
+                    dtype=self.dtype,
+                    metadata_index=(
+                        get_metadata_index(self.persist_directory, name) if self.use_metadata_index else None
+                    ),
+                    **self.collection_options,
+                )
+                self._collections[name] = collection
+        return collection
+
+    def get_collection(self, name: str, **kwargs) -> LocalCollection:
+        return self.get_or_create_collection(name, **kwargs)
+
+    def delete_collection(self, name: str) -> None:
+        self.get_or_create_collection(name).clear()
+
+
+class LocalVectorStore(VectorStore):
+    """
+    LangChain adapter over `LocalCollection`, mirroring the Chroma wrapper:
+    the raw collection is exposed as `_collection` so RetrievalService can
+    query stored embeddings directly.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        embedding_function: Embeddings,
+        persist_directory: str,
+        dtype: str = "float32",
+        **collection_options: Any,
+    ):
+        self.collection_name = collection_name
+        self._embedding_function = embedding_function
+        self._collection = LocalCollection(
+            local_collection_path(persist_directory, collection_name),
+            name=collection_name,
+            dtype=dtype,
+            **collection_options,
+        )
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = [doc_id or str(uuid.uuid4()) for doc_id in (ids or [None] * len(texts))]
+        if not texts:
+            return []
+        embeddings = self._embedding_function.embed_documents(texts)
+        self._collection.add(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        return ids
+
+    def similarity_search_by_vector_with_score(
+        self, embedding: List[float], k: int = 4, **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        result = self._collection.query(
+            [embedding], n_results=k, include=["documents", "metadatas", "distances"], where=kwargs.get("filter")
+        )
+        return [
+            (Document(id=doc_id, page_content=content, metadata=metadata), distance)
+            for doc_id, content, metadata, distance in zip(
+                result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0]
+            )
+        ]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding_function.embed_query(query), k=k, **kwargs)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _distance in self.similarity_search_by_vector_with_score(embedding, k=k, **kwargs)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _distance in self.similarity_search_with_score(query, k=k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+    def get(self, **kwargs: Any) -> Dict[str, Any]:
+        return self._collection.get(**kwargs)
+
+    def delete_collection(self) -> None:
+        self._collection.clear()
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        collection_name: str = "langchain",
+        persist_directory: str = "chroma_db",
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(collection_name=collection_name, embedding_function=embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
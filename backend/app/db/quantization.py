@@ -0,0 +1,159 @@
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+
+from app.db.ivf_index import normalize_rows
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+# First-stage candidates kept per result before float re-scoring.
+DEFAULT_RESCORE_FACTORS = {"int8": 4, "binary": 16}
+_INT8_CHUNK_ROWS = 2048
+
+
+def _as_words(codes: np.ndarray) -> np.ndarray:
+    # XOR/popcount 8 bytes at a time when the code width allows it.
+    codes = np.ascontiguousarray(codes)
+    return codes.view(np.uint64) if codes.shape[-1] % 8 == 0 else codes
+
+
+def encode_int8(vectors: np.ndarray) -> np.ndarray:
+    """
+    Symmetric scalar quantization of unit-normalized rows: one int8 per
+    dimension (4x smaller than float32). A unit query's dot product with a
+    code is 127x its cosine similarity, up to rounding error.
+    """
+    return np.clip(np.rint(normalize_rows(vectors) * 127.0), -127, 127).astype(np.int8)
+
+
+def encode_binary(vectors: np.ndarray) -> np.ndarray:
+    """
+    Sign bits packed 8 per byte (32x smaller than float32); Hamming
+    distance between codes approximates angular distance.
+    """
+    return np.packbits(np.asarray(vectors) > 0, axis=1)
+
+
+class QuantizedCodes:
+    """
+    In-memory int8 or binary codes for a LocalCollection's rows, persisted
+    to `codes_<mode>.bin` next to the float vectors. Scores are only good
+    for ranking candidates; the caller re-scores the best ones with the
+    float vectors.
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in ("int8", "binary"):
+            raise ValueError(f"Unsupported quantization {mode!r}; expected 'int8' or 'binary'")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.RLock()
+        self._codes: Optional[np.ndarray] = None
+        self._persisted_rows = 0
+
+    @property
+    def file_path(self) -> str:
+        return os.path.join(self.path, f"codes_{self.mode}.bin")
+
+    def __len__(self) -> int:
+        return 0 if self._codes is None else len(self._codes)
+
+    @property
+    def nbytes(self) -> int:
+        return 0 if self._codes is None else int(self._codes.nbytes)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return encode_int8(vectors) if self.mode == "int8" else encode_binary(vectors)
+
+    def _code_width(self, dim: int) -> int:
+        return dim if self.mode == "int8" else (dim + 7) // 8
+
+    def load(self, vectors: np.ndarray, block_rows: int = 32768) -> None:
+        """
+        Reads persisted codes for the first `len(vectors)` rows and encodes
+        any rows the file does not cover yet (e.g. a collection written
+        before quantization was enabled) in memory.
+        """
+        with self._lock:
+            self._codes = None
+            self._persisted_rows = 0
+            self.extend(vectors, block_rows)
+
+    def extend(self, vectors: np.ndarray, block_rows: int = 32768) -> None:
+        """
+        Like `load`, but only for the rows past those already in memory, as
+        when another process has appended to the collection.
+        """
+        n_rows, dim = vectors.shape
+        width = self._code_width(dim)
+        dtype = np.int8 if self.mode == "int8" else np.uint8
+        with self._lock:
+            current = self._codes if self._codes is not None else np.zeros((0, width), dtype=dtype)
+            start_row = len(current)
+            if start_row >= n_rows:
+                return
+            codes = np.zeros((0, width), dtype=dtype)
+            if os.path.exists(self.file_path) and self._persisted_rows == start_row:
+                with open(self.file_path, "rb") as f:
+                    f.seek(start_row * width * np.dtype(dtype).itemsize)
+                    codes = np.fromfile(f, dtype=dtype, count=(n_rows - start_row) * width)
+                codes = codes[: (len(codes) // width) * width].reshape(-1, width)
+                self._persisted_rows += len(codes)
+            missing = [
+                self.encode(np.asarray(vectors[start:min(start + block_rows, n_rows)], dtype=np.float32))
+                for start in range(start_row + len(codes), n_rows, block_rows)
+            ]
+            self._codes = np.concatenate([current, codes, *missing])
+
+    def append(self, vectors: np.ndarray, start_row: int) -> None:
+        """
+        Encodes rows appended at `start_row` and persists them. If the file
+        lags behind (codes built in memory on load), it is rewritten whole.
+        """
+        new_codes = self.encode(vectors)
+        with self._lock:
+            existing = self._codes[:start_row] if self._codes is not None else new_codes[:0]
+            self._codes = np.concatenate([existing, new_codes])
+            os.makedirs(self.path, exist_ok=True)
+            if self._persisted_rows == start_row:
+                with open(self.file_path, "ab") as f:
+                    f.write(new_codes.tobytes())
+            else:
+                tmp_path = f"{self.file_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(self._codes.tobytes())
+                os.replace(tmp_path, self.file_path)
+            self._persisted_rows = len(self._codes)
+
+    def scores(self, queries: np.ndarray, start: int = 0, end: Optional[int] = None, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Approximate similarities (higher is better) of unit-normalized
+        `queries` against a row range or an explicit row array; shaped
+        (n_queries, n_rows).
+        """
+        codes = self._codes[rows] if rows is not None else self._codes[start:end]
+        if self.mode == "int8":
+            # Asymmetric: float query against int8 codes, upcast in
+            # cache-sized chunks rather than one large float copy.
+            queries = normalize_rows(queries)
+            return np.concatenate(
+                [
+                    queries @ codes[chunk:chunk + _INT8_CHUNK_ROWS].T.astype(np.float32)
+                    for chunk in range(0, len(codes), _INT8_CHUNK_ROWS)
+                ],
+                axis=1,
+            )
+        codes = _as_words(codes)
+        query_codes = _as_words(encode_binary(queries))
+        distances = np.stack(
+            [np.bitwise_count(np.bitwise_xor(codes, query_code)).sum(axis=1, dtype=np.int32) for query_code in query_codes]
+        )
+        return -distances.astype(np.float32)
+
+    def clear(self) -> None:
+        with self._lock:
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+            self._codes = None
+            self._persisted_rows = 0
@@ -1,10 +1,42 @@
+from typing import Any, Dict
+
 import chromadb
+
 from app.core.config import settings
+from app.db.local_vector_store import create_local_vector_client
 
 client = None
 
 def get_vector_db():
     global client
     if client is None:
-        client = chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+        if settings.VECTOR_STORE_BACKEND == "local":
+            from app.agents.legal_research.retrievers import resolve_persist_directory
+
+            client = create_local_vector_client(resolve_persist_directory("chroma_db"))
+        else:
+            client = chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
     return client
+
+
+def chroma_client_options(persist_directory: str) -> Dict[str, Any]:
+    """
+    Where LangChain's Chroma wrapper reads and writes a collection. With
+    CHROMA_ASYNC_HTTP on, async retrieval queries the CHROMA_HOST server,
+    so ingestion and the sync path go through that server too; otherwise
+    the collection lives in `persist_directory`. The BM25, section and
+    metadata indexes stay in `persist_directory` either way and are written
+    by the same DocumentStore calls, so their ids match the server's.
+    """
+    if settings.CHROMA_ASYNC_HTTP and settings.VECTOR_STORE_BACKEND != "local":
+        return {"client": get_vector_db()}
+    return {"persist_directory": persist_directory}
+
+
+async_client = None
+
+async def get_async_vector_db():
+    global async_client
+    if async_client is None:
+        async_client = await chromadb.AsyncHttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+    return async_client
@@ -3,6 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
 from app.db.database import engine, Base
 from app.services.storage import get_storage
+from app.services.embedding_registry import embedding_registry
+from app.agents.document_generator.llm_client import llm_client
 from app.core.config import settings
 
 Base.metadata.create_all(bind=engine)
@@ -31,6 +33,20 @@ def startup_event():
     except Exception as e:
         print(f"Warning: Could not initialize storage bucket: {e}")
 
+    if settings.EMBEDDING_WARMUP_ON_STARTUP:
+        try:
+            usage = embedding_registry.warmup()
+            print(
+                f"Embedding model warmed up: {usage['loaded_models']} model(s), "
+                f"{usage['total_parameter_bytes'] / (1024 * 1024):.1f} MiB of weights"
+            )
+        except Exception as e:
+            print(f"Warning: Could not warm up embedding model: {e}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await llm_client.aclose()
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
@@ -1,9 +1,20 @@
-from typing import List, Optional, Dict, Any
+from datetime import date
+from typing import List, Optional, Dict, Any, Union
 from pydantic import BaseModel
 
+class ResearchFilters(BaseModel):
+    act_name: Optional[Union[str, List[str]]] = None
+    jurisdiction: Optional[Union[str, List[str]]] = None
+    doc_type: Optional[Union[str, List[str]]] = None
+    priority: Optional[Union[str, List[str]]] = None
+    section: Optional[Union[str, List[str]]] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
 class ResearchQuery(BaseModel):
     query: str
     limit: Optional[int] = 5
+    filters: Optional[ResearchFilters] = None
 
 class ResearchSource(BaseModel):
     title: Optional[str]
@@ -14,3 +25,5 @@ class ResearchSource(BaseModel):
 class ResearchResponse(BaseModel):
     answer: str
     sources: List[ResearchSource]
+    # True when served from the semantic answer cache.
+    cached: bool = False
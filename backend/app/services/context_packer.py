@@ -0,0 +1,141 @@
+import logging
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Retrieved-context token budget per generation model: what is left of the
+# model's window (or the provider's per-request token limit) after the
+# prompt template and the answer.
+MODEL_CONTEXT_TOKEN_BUDGETS = {
+    "llama-3.3-70b-versatile": 12000,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 12000
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# A passage whose word shingles are mostly already in the packed context
+# (e.g. a neighbouring chunk's overlap window) is dropped.
+DUPLICATE_OVERLAP = 0.6
+_SHINGLE_WORDS = 8
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.;:?!])\s+|\n+")
+
+
+def context_token_budget(model: Optional[str] = None) -> int:
+    if settings.CONTEXT_TOKEN_BUDGET > 0:
+        return settings.CONTEXT_TOKEN_BUDGET
+    return MODEL_CONTEXT_TOKEN_BUDGETS.get(model or DEFAULT_MODEL, DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+class _ApproximateEncoding:
+    """
+    ~4 characters per token; only used when the tiktoken vocabulary cannot
+    be loaded (it is downloaded on first use).
+    """
+
+    def encode(self, text: str) -> List[str]:
+        return [text[start:start + 4] for start in range(0, len(text), 4)]
+
+    def decode(self, tokens: Sequence[str]) -> str:
+        return "".join(tokens)
+
+
+def _shingles(text: str) -> set:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) <= _SHINGLE_WORDS:
+        return {tuple(words)} if words else set()
+    return {tuple(words[start:start + _SHINGLE_WORDS]) for start in range(len(words) - _SHINGLE_WORDS + 1)}
+
+
+class ContextPacker:
+    """
+    Packs ranked passages into a prompt's token budget.
+
+    Passages are cut to whole sentences, near-duplicates of higher-ranked
+    passages are dropped, and the rest are chosen greedily by score per
+    token until the budget is spent. Tokens are counted with the same
+    tiktoken encoding as `TokenUsageTracker`.
+    """
+
+    def __init__(self, encoding: Any = None):
+        self._encoding = encoding
+
+    @property
+    def encoding(self) -> Any:
+        if self._encoding is None:
+            try:
+                from app.services.llm_service import TokenUsageTracker
+
+                self._encoding = TokenUsageTracker().encoding
+            except Exception as e:
+                logger.warning("tiktoken encoding unavailable, approximating token counts: %s", e)
+                self._encoding = _ApproximateEncoding()
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode(text))
+
+    def trim_to_sentences(self, text: str, max_tokens: int) -> str:
+        """
+        Longest run of leading sentences within `max_tokens`. A first
+        sentence that is longer than that on its own is cut at a word
+        boundary instead.
+        """
+        text = (text or "").strip()
+        if self.count_tokens(text) <= max_tokens:
+            return text
+        kept: List[str] = []
+        used = 0
+        for sentence in _SENTENCE_BOUNDARY.split(text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            tokens = self.count_tokens(sentence) + (1 if kept else 0)
+            if used + tokens > max_tokens:
+                break
+            kept.append(sentence)
+            used += tokens
+        if kept:
+            return " ".join(kept)
+        head = self.encoding.decode(self.encoding.encode(text)[:max_tokens])
+        return head.rsplit(" ", 1)[0] if " " in head else head
+
+    def pack(
+        self,
+        texts: Sequence[str],
+        budget: int,
+        max_tokens_per_passage: int,
+        scores: Optional[Sequence[float]] = None,
+        overhead_tokens: int = 24,
+    ) -> List[Tuple[int, str]]:
+        """
+        Chooses passages from `texts` (best first) for a `budget`-token
+        context. `scores` default to reciprocal rank; `overhead_tokens`
+        covers each passage's source header. Returns (input index, trimmed
+        text) pairs in input order.
+        """
+        candidates = []
+        seen_shingles: set = set()
+        for idx, text in enumerate(texts):
+            trimmed = self.trim_to_sentences(text, max_tokens_per_passage)
+            if not trimmed:
+                continue
+            shingles = _shingles(trimmed)
+            if shingles and len(shingles & seen_shingles) >= DUPLICATE_OVERLAP * len(shingles):
+                continue
+            seen_shingles |= shingles
+            score = scores[idx] if scores is not None else 1.0 / (idx + 1)
+            cost = self.count_tokens(trimmed) + overhead_tokens
+            candidates.append((score / cost, idx, trimmed, cost))
+
+        selected = []
+        remaining = budget
+        for _density, idx, trimmed, cost in sorted(candidates, key=lambda item: (-item[0], item[1])):
+            if cost <= remaining:
+                selected.append((idx, trimmed))
+                remaining -= cost
+        return sorted(selected)
+
+
+context_packer = ContextPacker()
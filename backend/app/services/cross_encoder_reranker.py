@@ -0,0 +1,187 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+from app.services.retrieval_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+def _default_model_factory(model_name: str, device: str, max_length: int) -> Any:
+    try:
+        from sentence_transformers import CrossEncoder
+    except ImportError:
+        raise ImportError("sentence_transformers is required for cross-encoder reranking")
+    return CrossEncoder(model_name, device=device, max_length=max_length)
+
+
+def _query_hash(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+def _chunk_id(doc: Document) -> str:
+    # Index hits carry ids; fall back to a content hash for the rest.
+    if getattr(doc, "id", None):
+        return str(doc.id)
+    raw = f"{doc.page_content}|{sorted((doc.metadata or {}).items())}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CrossEncoderReranker:
+    """
+    Optional second-stage reranker: a CPU cross-encoder scores (query,
+    chunk) pairs for the top fused candidates.
+
+    Pairs are scored in batches of `batch_size`, truncated to `max_length`
+    tokens, under a per-call time budget. Queries whose candidates are not
+    all scored when the budget runs out keep their fused order. Scores are
+    cached per (query hash, chunk id), so repeated queries and overlapping
+    focus queries only pay for new pairs.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        device: str = "cpu",
+        enabled: bool = False,
+        candidates: int = 20,
+        batch_size: int = 16,
+        max_length: int = 256,
+        time_budget_ms: float = 300.0,
+        cache_max_entries: int = 8192,
+        model_factory: Optional[Callable[[str, str, int], Any]] = None,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.enabled = enabled
+        self.candidates = candidates
+        self.batch_size = max(1, batch_size)
+        self.max_length = max_length
+        self.time_budget_ms = time_budget_ms
+        self.cache_max_entries = cache_max_entries
+        self._factory = model_factory or _default_model_factory
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._scores_lock = threading.Lock()
+        self.cache_hits = 0
+        self.pairs_scored = 0
+        self.budget_fallbacks = 0
+
+    def depth(self, k: int) -> int:
+        """
+        Fused candidates to retrieve so the reranker can promote chunks
+        from below the top k.
+        """
+        return max(k, self.candidates) if self.enabled else k
+
+    def get_model(self) -> Any:
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    self._model = self._factory(self.model_name, self.device, self.max_length)
+                    logger.info(
+                        "Loaded cross-encoder %s on %s in %.2fs",
+                        self.model_name,
+                        self.device,
+                        time.perf_counter() - started,
+                    )
+        return self._model
+
+    def _cached_score(self, key: Tuple[str, str]) -> Optional[float]:
+        with self._scores_lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+            return score
+
+    def _store_scores(self, keys: Sequence[Tuple[str, str]], scores: Sequence[float]) -> None:
+        with self._scores_lock:
+            for key, score in zip(keys, scores):
+                self._scores[key] = float(score)
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.cache_max_entries:
+                self._scores.popitem(last=False)
+
+    def rerank_batch(
+        self, queries: Sequence[str], ranked_lists: Sequence[List[Document]], k: int
+    ) -> List[List[Document]]:
+        """
+        Reorders each query's candidates by cross-encoder score and keeps
+        the top k. One time budget covers the whole call.
+        """
+        if not self.enabled:
+            return [list(docs[:k]) for docs in ranked_lists]
+
+        scores: List[Dict[str, float]] = [{} for _ in queries]
+        pending: List[Tuple[int, Tuple[str, str], str, str]] = []
+        for row, (query, docs) in enumerate(zip(queries, ranked_lists)):
+            query_hash = _query_hash(query)
+            for doc in docs[: self.candidates]:
+                key = (query_hash, _chunk_id(doc))
+                cached = self._cached_score(key)
+                if cached is not None:
+                    self.cache_hits += 1
+                    scores[row][key[1]] = cached
+                else:
+                    pending.append((row, key, query, doc.page_content or ""))
+
+        model = self.get_model() if pending else None
+        # The budget covers scoring only, not the one-off model load above.
+        deadline = time.perf_counter() + self.time_budget_ms / 1000.0
+        for start in range(0, len(pending), self.batch_size):
+            if time.perf_counter() >= deadline:
+                self.budget_fallbacks += 1
+                logger.info("Cross-encoder budget of %.0fms exhausted; keeping fused order", self.time_budget_ms)
+                break
+            batch = pending[start:start + self.batch_size]
+            batch_scores = model.predict([(query, text) for _row, _key, query, text in batch])
+            self._store_scores([key for _row, key, _query, _text in batch], batch_scores)
+            self.pairs_scored += len(batch)
+            for (row, key, _query, _text), score in zip(batch, batch_scores):
+                scores[row][key[1]] = float(score)
+
+        reranked = []
+        for row, docs in enumerate(ranked_lists):
+            head = docs[: self.candidates]
+            chunk_ids = [_chunk_id(doc) for doc in head]
+            if not all(chunk_id in scores[row] for chunk_id in chunk_ids):
+                reranked.append(list(docs[:k]))
+                continue
+            # Stable: ties keep their fused order.
+            order = sorted(range(len(head)), key=lambda idx: -scores[row][chunk_ids[idx]])
+            reranked.append([head[idx] for idx in order][:k])
+        return reranked
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "model_name": self.model_name,
+            "cached_scores": len(self._scores),
+            "cache_hits": self.cache_hits,
+            "pairs_scored": self.pairs_scored,
+            "budget_fallbacks": self.budget_fallbacks,
+        }
+
+    def clear(self) -> None:
+        with self._scores_lock:
+            self._scores.clear()
+
+
+cross_encoder_reranker = CrossEncoderReranker(
+    model_name=settings.RERANKER_MODEL_NAME,
+    device=settings.EMBEDDING_DEVICE,
+    enabled=settings.RERANKER_ENABLED,
+    candidates=settings.RERANKER_CANDIDATES,
+    batch_size=settings.RERANKER_BATCH_SIZE,
+    max_length=settings.RERANKER_MAX_LENGTH,
+    time_budget_ms=settings.RERANKER_TIME_BUDGET_MS,
+    cache_max_entries=settings.RERANKER_CACHE_MAX_ENTRIES,
+)
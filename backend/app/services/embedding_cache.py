@@ -0,0 +1,352 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILE = "vectors.f32"
+_INDEX_FILE = "index.sqlite"
+_LOCK_FILE = ".lock"
+_SQLITE_MAX_PARAMS = 500
+# Once the vector file holds more than `max_entries` rows, the least
+# recently used entries are evicted down to this fraction of the bound.
+EVICT_TO_FRACTION = 0.9
+EMBED_KINDS = ("documents", "query")
+
+
+def _safe_name(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, on-disk embedding cache for one model.
+
+    Vectors are appended to a raw float32 file that readers open with
+    `np.memmap`, and a SQLite index maps sha256(model name + embed kind +
+    text) to the vector's row. Appends take an exclusive file lock and write
+    vectors before committing their index rows, so every worker on the host
+    can share the cache and readers never see a row that is not on disk yet.
+
+    Query and document embeddings are cached separately, since models such
+    as e5 or bge embed a query differently from the same text as a passage.
+
+    At most `max_entries` vectors are kept. Hits are remembered in memory
+    and written with the next `put_many`; when an append pushes the file
+    past the bound, the least recently used entries are dropped and the
+    survivors are copied to a new vector file whose generation is recorded
+    in the index, so readers remap instead of reading stale rows.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, max_entries: int = 500000):
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.cache_dir = os.path.join(cache_dir, _safe_name(model_name))
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.cache_dir, _INDEX_FILE), check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            columns = {column[1] for column in self._conn.execute("PRAGMA table_info(entries)")}
+            if "used" not in columns:
+                self._conn.execute("ALTER TABLE entries ADD COLUMN used REAL NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+            self._conn.commit()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_generation = 0
+        self._dim: Optional[int] = None
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str, kind: str = "documents") -> str:
+        if kind not in EMBED_KINDS:
+            raise ValueError(f"Unsupported embed kind {kind!r}; expected one of {EMBED_KINDS}")
+        return hashlib.sha256(f"{self.model_name}\0{kind}\0{text}".encode("utf-8")).hexdigest()
+
+    def vectors_path(self, generation: int) -> str:
+        name = _VECTORS_FILE if generation == 0 else f"vectors-{generation}.f32"
+        return os.path.join(self.cache_dir, name)
+
+    @property
+    def dim(self) -> Optional[int]:
+        if self._dim is None:
+            with self._lock:
+                row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            self._dim = int(row[0]) if row else None
+        return self._dim
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _generation_unlocked(self) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _lookup_rows(self, keys: Sequence[str]) -> Tuple[Dict[str, int], int]:
+        with self._lock:
+            return self._lookup_rows_unlocked(keys)
+
+    def _lookup_rows_unlocked(self, keys: Sequence[str]) -> Tuple[Dict[str, int], int]:
+        """
+        Rows of the cached keys, and the generation of the vector file they
+        index; both come from the same statement, so they agree even while
+        another worker compacts the cache.
+        """
+        rows: Dict[str, int] = {}
+        generation = None
+        unique_keys = list(dict.fromkeys(keys))
+        for start in range(0, len(unique_keys), _SQLITE_MAX_PARAMS):
+            chunk = unique_keys[start:start + _SQLITE_MAX_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            for key, row, chunk_generation in self._conn.execute(
+                "SELECT key, row, (SELECT value FROM meta WHERE name = 'generation') "
+                f"FROM entries WHERE key IN ({placeholders})",
+                chunk,
+            ):
+                rows[key] = row
+                generation = int(chunk_generation or 0)
+        return rows, generation if generation is not None else 0
+
+    def _vectors(self, min_rows: int, generation: int) -> np.ndarray:
+        """
+        Memory-mapped view of the vector file, remapped when other workers
+        have appended rows we need or compacted the cache.
+        """
+        if self._matrix is None or self._matrix_generation != generation or self._matrix.shape[0] < min_rows:
+            dim = self.dim
+            path = self.vectors_path(generation)
+            n_rows = os.path.getsize(path) // (dim * 4)
+            self._matrix = np.memmap(path, dtype=np.float32, mode="r", shape=(n_rows, dim))
+            self._matrix_generation = generation
+        return self._matrix
+
+    def get_many(self, texts: Sequence[str], kind: str = "documents") -> List[Optional[np.ndarray]]:
+        if not texts or self.dim is None:
+            self.misses += len(texts)
+            return [None] * len(texts)
+        keys = [self.key(text, kind) for text in texts]
+        rows, generation = self._lookup_rows(keys)
+        if not rows:
+            self.misses += len(texts)
+            return [None] * len(texts)
+
+        matrix = self._vectors(max(rows.values()) + 1, generation)
+        results: List[Optional[np.ndarray]] = []
+        for key in keys:
+            row = rows.get(key)
+            results.append(np.array(matrix[row]) if row is not None else None)
+        now = time.time()
+        with self._lock:
+            self._touched.update((key, now) for key in rows)
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(texts) - hits
+        return results
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.cache_dir, _LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]], kind: str = "documents") -> None:
+        if not texts:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(texts):
+            raise ValueError("Expected one vector per text")
+
+        keys = [self.key(text, kind) for text in texts]
+        with self._write_lock():
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+            if row is None:
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(matrix.shape[1]),))
+                self._conn.commit()
+                self._dim = matrix.shape[1]
+            elif int(row[0]) != matrix.shape[1]:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match cache dimension {row[0]}")
+
+            if self._touched:
+                self._conn.executemany(
+                    "UPDATE entries SET used = ? WHERE key = ?", [(used, key) for key, used in self._touched.items()]
+                )
+                self._touched = {}
+
+            existing, _generation = self._lookup_rows_unlocked(keys)
+            new_positions: Dict[str, int] = {}
+            for position, key in enumerate(keys):
+                if key not in existing and key not in new_positions:
+                    new_positions[key] = position
+            if not new_positions:
+                self._conn.commit()
+                return
+
+            generation = self._generation_unlocked()
+            row_bytes = matrix.shape[1] * 4
+            with open(self.vectors_path(generation), "ab") as f:
+                size = f.seek(0, os.SEEK_END)
+                if size % row_bytes:
+                    # Pad over a torn write so rows stay aligned.
+                    f.write(b"\0" * (row_bytes - size % row_bytes))
+                start_row = f.tell() // row_bytes
+                f.write(matrix[list(new_positions.values())].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            now = time.time()
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (key, row, used) VALUES (?, ?, ?)",
+                [(key, start_row + offset, now) for offset, key in enumerate(new_positions)],
+            )
+            self._conn.commit()
+            if start_row + len(new_positions) > self.max_entries:
+                self._evict(generation, matrix.shape[1])
+
+    def _evict(self, generation: int, dim: int) -> None:
+        """
+        Keeps the most recently used entries (up to EVICT_TO_FRACTION of the
+        bound), copying their vectors to the next generation's file. Called
+        under the write lock.
+        """
+        keep = max(1, int(self.max_entries * EVICT_TO_FRACTION))
+        survivors = self._conn.execute(
+            "SELECT key, row, used FROM entries ORDER BY used DESC, row DESC LIMIT ?", (keep,)
+        ).fetchall()
+        survivors.sort(key=lambda entry: entry[1])
+        old_path = self.vectors_path(generation)
+        new_path = self.vectors_path(generation + 1)
+        old_vectors = np.memmap(old_path, dtype=np.float32, mode="r", shape=(os.path.getsize(old_path) // (dim * 4), dim))
+        with open(new_path, "wb") as f:
+            for start in range(0, len(survivors), _SQLITE_MAX_PARAMS):
+                rows = [row for _key, row, _used in survivors[start:start + _SQLITE_MAX_PARAMS]]
+                f.write(np.asarray(old_vectors[rows], dtype=np.float32).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        del old_vectors
+
+        with self._conn:
+            total = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            self._conn.execute("DELETE FROM entries")
+            self._conn.executemany(
+                "INSERT INTO entries (key, row, used) VALUES (?, ?, ?)",
+                [(key, new_row, used) for new_row, (key, _row, used) in enumerate(survivors)],
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)", (str(generation + 1),)
+            )
+        os.remove(old_path)
+        self._matrix = None
+        self.evictions += total - len(survivors)
+        logger.info(
+            "Evicted %d embeddings from cache %s; %d kept", total - len(survivors), self.cache_dir, len(survivors)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that reads through an `EmbeddingCache`, so only texts
+    never seen before reach the model. Cache failures fall back to the model.
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache):
+        self.base = base
+        self.cache = cache
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's attributes (model_name, _client, ...).
+        base = self.__dict__.get("base")
+        if base is None:
+            raise AttributeError(name)
+        return getattr(base, name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        try:
+            cached = self.cache.get_many(texts)
+        except Exception as e:
+            logger.warning("Embedding cache read failed: %s", e)
+            return self.base.embed_documents(texts)
+
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, cached) if vector is None))
+        if missing_texts:
+            computed = self.base.embed_documents(missing_texts)
+            try:
+                self.cache.put_many(missing_texts, computed)
+            except Exception as e:
+                logger.warning("Embedding cache write failed: %s", e)
+            by_text = dict(zip(missing_texts, computed))
+            cached = [vector if vector is not None else by_text[text] for text, vector in zip(texts, cached)]
+        return [np.asarray(vector, dtype=np.float32).tolist() for vector in cached]
+
+    def embed_query(self, text: str) -> List[float]:
+        try:
+            vector = self.cache.get_many([text], kind="query")[0]
+        except Exception as e:
+            logger.warning("Embedding cache read failed: %s", e)
+            vector = None
+        if vector is not None:
+            return vector.tolist()
+
+        computed = self.base.embed_query(text)
+        try:
+            self.cache.put_many([text], [computed], kind="query")
+        except Exception as e:
+            logger.warning("Embedding cache write failed: %s", e)
+        return computed
+
+
+_CACHES: Dict[str, EmbeddingCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def resolve_cache_dir(cache_dir: str) -> str:
+    if not os.path.isabs(cache_dir):
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        cache_dir = os.path.join(base_dir, cache_dir)
+    return cache_dir
+
+
+def get_embedding_cache(cache_dir: str, model_name: str, max_entries: int = 500000) -> EmbeddingCache:
+    path = os.path.join(resolve_cache_dir(cache_dir), _safe_name(model_name))
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = EmbeddingCache(resolve_cache_dir(cache_dir), model_name, max_entries=max_entries)
+            _CACHES[path] = cache
+    return cache
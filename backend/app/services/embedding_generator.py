@@ -1,11 +1,11 @@
+from typing import List, Optional
 
+from app.services.embedding_registry import get_embedding_model
 
-from langchain_huggingface import HuggingFaceEmbeddings
-from typing import List
 
 class EmbeddingGenerator:
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
-        self.model = HuggingFaceEmbeddings(model_name=model_name)
+    def __init__(self, model_name: Optional[str] = None):
+        self.model = get_embedding_model(model_name)
 
     def generate_embeddings(self, chunks: List[str]) -> List[List[float]]:
         """Generates embeddings for a list of text chunks."""
@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.services.embedding_cache import CachedEmbeddings, get_embedding_cache
+
+logger = logging.getLogger(__name__)
+
+
+def _default_embeddings_factory(model_name: str, device: str) -> Any:
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:
+        raise ImportError("langchain_huggingface is required for embeddings")
+    embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": device})
+    if not settings.EMBEDDING_CACHE_ENABLED:
+        return embeddings
+    # Queries, ingestion and evaluation runs all share the on-disk cache.
+    cache = get_embedding_cache(
+        settings.EMBEDDING_CACHE_DIR, model_name, max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+    )
+    return CachedEmbeddings(embeddings, cache)
+
+
+def _estimate_model_bytes(embeddings: Any) -> int:
+    """
+    Best-effort size of the loaded weights. HuggingFaceEmbeddings keeps the
+    underlying SentenceTransformer on `_client` (older releases use `client`).
+    """
+    embeddings = getattr(embeddings, "base", embeddings)
+    model = getattr(embeddings, "_client", None) or getattr(embeddings, "client", None)
+    parameters = getattr(model, "parameters", None)
+    if not callable(parameters):
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in parameters())
+    except Exception:
+        return 0
+
+
+class EmbeddingModelRegistry:
+    """
+    Process-wide cache of embedding models.
+
+    Loading all-MiniLM-L6-v2 dominates cold retrieval latency, so every
+    retriever, store and indexer resolves its model through this registry
+    instead of constructing `HuggingFaceEmbeddings` directly. Models are keyed
+    by (model_name, device) and loaded at most once per process.
+    """
+
+    def __init__(
+        self,
+        default_model_name: str = "all-MiniLM-L6-v2",
+        default_device: str = "cpu",
+        factory: Optional[Callable[[str, str], Any]] = None,
+    ):
+        self.default_model_name = default_model_name
+        self.default_device = default_device
+        self._factory = factory or _default_embeddings_factory
+        self._models: Dict[Tuple[str, str], Any] = {}
+        self._load_seconds: Dict[Tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def _resolve_key(self, model_name: Optional[str], device: Optional[str]) -> Tuple[str, str]:
+        return (model_name or self.default_model_name, device or self.default_device)
+
+    def get(self, model_name: Optional[str] = None, device: Optional[str] = None) -> Any:
+        """
+        Returns the shared embeddings instance, loading it on first use.
+        """
+        key = self._resolve_key(model_name, device)
+        model = self._models.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited.
+            model = self._models.get(key)
+            if model is None:
+                started = time.perf_counter()
+                model = self._factory(*key)
+                self._load_seconds[key] = time.perf_counter() - started
+                self._models[key] = model
+                logger.info(
+                    "Loaded embedding model %s on %s in %.2fs",
+                    key[0],
+                    key[1],
+                    self._load_seconds[key],
+                )
+        return model
+
+    def warmup(self, model_name: Optional[str] = None, device: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Loads the model and runs a single forward pass so the first user
+        request does not pay for lazy initialisation.
+        """
+        model = self.get(model_name, device)
+        # Bypass the embedding cache so the forward pass really runs.
+        getattr(model, "base", model).embed_query("warmup")
+        return self.memory_usage()
+
+    def memory_usage(self) -> Dict[str, Any]:
+        models = []
+        for (model_name, device), model in list(self._models.items()):
+            models.append(
+                {
+                    "model_name": model_name,
+                    "device": device,
+                    "parameter_bytes": _estimate_model_bytes(model),
+                    "load_seconds": round(self._load_seconds.get((model_name, device), 0.0), 3),
+                }
+            )
+        return {
+            "loaded_models": len(models),
+            "total_parameter_bytes": sum(item["parameter_bytes"] for item in models),
+            "models": models,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+            self._load_seconds.clear()
+
+
+embedding_registry = EmbeddingModelRegistry(
+    default_model_name=settings.EMBEDDING_MODEL_NAME,
+    default_device=settings.EMBEDDING_DEVICE,
+)
+
+
+def get_embedding_model(model_name: Optional[str] = None, device: Optional[str] = None) -> Any:
+    return embedding_registry.get(model_name, device)
@@ -1,5 +1,7 @@
 import re
-from typing import Iterable
+import sys
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional, Sequence
 
 
 def normalize_legal_title(value: str) -> str:
@@ -200,20 +202,173 @@ def get_legal_research_act_catalog() -> list[dict]:
     return [dict(item) for item in LEGAL_RESEARCH_ACT_CATALOG]
 
 
+def catalog_chunk_metadata(entry: dict) -> dict[str, str]:
+    """
+    Catalog fields copied onto every chunk of an ingested act, so retrieval
+    can filter on them through the metadata index.
+    """
+    return {
+        "doc_type": entry.get("doc_type", "statute"),
+        "jurisdiction": entry.get("jurisdiction", "India"),
+        "priority": entry.get("priority", "Priority 1"),
+    }
+
+
+def catalog_priority(entry: dict) -> int:
+    """
+    Numeric rank of an entry's "Priority N" label (lower wins); entries
+    without one rank after every labelled entry.
+    """
+    match = re.search(r"\d+", str(entry.get("priority") or ""))
+    return int(match.group()) if match else sys.maxsize
+
+
+class ActMatch(NamedTuple):
+    entry: dict
+    alias: str
+    # Character offsets into normalize_legal_title(text).
+    start: int
+    end: int
+
+
+class ActMatcher:
+    """
+    Aho-Corasick automaton over the normalized names and aliases of a
+    catalog, with whole words as the alphabet so every hit is a whole-word
+    phrase. Built once per catalog; a query is matched in a single pass
+    over its words, independent of the number of acts and aliases.
+
+    When several acts claim one alias, or a text mentions several acts, the
+    longest match wins, then the lower `catalog_priority`, then the earlier
+    catalog position (the entry the old per-act scan reached first).
+    """
+
+    def __init__(self, entries: Sequence[dict]):
+        self.entries = [dict(entry) for entry in entries]
+        self._ranks = [(catalog_priority(entry), position) for position, entry in enumerate(self.entries)]
+        self.alias_index: dict[str, int] = {}
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # (catalog position, alias, alias length in words) per final state.
+        self._outputs: list[list[tuple[int, str, int]]] = [[]]
+        for position, entry in enumerate(self.entries):
+            for candidate in [entry["name"], *entry.get("aliases", [])]:
+                alias = normalize_legal_title(candidate)
+                if alias:
+                    current = self.alias_index.get(alias)
+                    if current is None or self._ranks[position] < self._ranks[current]:
+                        self.alias_index[alias] = position
+                    self._add_pattern(alias, position)
+        self._link_failures()
+
+    def _add_pattern(self, alias: str, position: int) -> None:
+        state = 0
+        words = alias.split()
+        for word in words:
+            next_state = self._goto[state].get(word)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][word] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append((position, alias, len(words)))
+
+    def _link_failures(self) -> None:
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(word, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+
+    def lookup(self, name: str) -> Optional[dict]:
+        position = self.alias_index.get(normalize_legal_title(name))
+        return self.entries[position] if position is not None else None
+
+    def _scan(self, text: str) -> list[tuple[int, int, int, str]]:
+        normalized = normalize_legal_title(text)
+        word_spans = [(match.start(), match.end()) for match in re.finditer(r"\S+", normalized)]
+        hits: list[tuple[int, int, int, str]] = []
+        state = 0
+        for index, (word_start, word_end) in enumerate(word_spans):
+            word = normalized[word_start:word_end]
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            for position, alias, length in self._outputs[state]:
+                hits.append((word_spans[index - length + 1][0], word_end, position, alias))
+        return hits
+
+    def find_all(self, text: str) -> list[ActMatch]:
+        """
+        Every name or alias occurrence in `text`, ordered by position, then
+        by longest alias first.
+        """
+        hits = sorted(self._scan(text), key=lambda hit: (hit[0], -hit[1], hit[2]))
+        return [ActMatch(dict(self.entries[position]), alias, start, end) for start, end, position, alias in hits]
+
+    def best_match(self, text: str) -> Optional[ActMatch]:
+        """
+        The preferred act mentioned in `text`: longest match first, then
+        catalog priority, then catalog order.
+        """
+        hits = self._scan(text)
+        if not hits:
+            return None
+        start, end, position, alias = min(hits, key=lambda hit: (hit[0] - hit[1], self._ranks[hit[2]]))
+        return ActMatch(dict(self.entries[position]), alias, start, end)
+
+    def match_entries(self, text: str) -> list[dict]:
+        """
+        Distinct catalog entries mentioned in `text`, in catalog order.
+        """
+        positions = sorted({position for _start, _end, position, _alias in self._scan(text)})
+        return [dict(self.entries[position]) for position in positions]
+
+
+@lru_cache(maxsize=1)
+def get_act_matcher() -> ActMatcher:
+    return ActMatcher(LEGAL_RESEARCH_ACT_CATALOG)
+
+
+def canonical_act_name(act_name: str) -> str:
+    """
+    Maps a catalog name or alias (e.g. "NI Act") to the catalog's display
+    name; unknown names are returned unchanged.
+    """
+    entry = get_act_matcher().lookup(act_name)
+    return entry["name"] if entry else act_name
+
+
+def match_act_in_text(text: str) -> Optional[dict]:
+    """
+    Returns the catalog entry whose name or alias appears in `text` as a
+    whole-word phrase, preferring the longest match (see ActMatcher).
+    """
+    match = get_act_matcher().best_match(text)
+    return match.entry if match else None
+
+
+def match_acts_in_text(text: str) -> list[ActMatch]:
+    """
+    All catalog name and alias occurrences in `text`, with their spans.
+    """
+    return get_act_matcher().find_all(text)
+
+
 def match_catalog_entries(requested_names: Iterable[str]) -> tuple[list[dict], list[str]]:
-    catalog = get_legal_research_act_catalog()
-    indexed: dict[str, dict] = {}
-    for entry in catalog:
-        candidates = [entry["name"], *entry.get("aliases", [])]
-        for candidate in candidates:
-            indexed[normalize_legal_title(candidate)] = entry
+    matcher = get_act_matcher()
 
     selected: list[dict] = []
     unresolved: list[str] = []
     seen_names: set[str] = set()
     for requested_name in requested_names:
-        normalized = normalize_legal_title(requested_name)
-        entry = indexed.get(normalized)
+        entry = matcher.lookup(requested_name)
         if not entry:
             unresolved.append(requested_name)
             continue
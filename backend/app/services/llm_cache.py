@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, Mapping, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Whitespace-insensitive form of a prompt: line endings unified, runs of
+    spaces and tabs collapsed, trailing spaces and blank-line runs dropped.
+    Case and wording are kept, since they change the answer.
+    """
+    text = (prompt or "").replace("\r\n", "\n").replace("\r", "\n")
+    lines = [re.sub(r"[ \t]+", " ", line).strip() for line in text.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed cache of LLM responses keyed by sha256(model, normalized
+    prompt, sampling parameters).
+
+    Entries expire after `ttl_seconds`, and the least recently used ones
+    are evicted beyond `max_entries`. The database is a single file, so
+    API workers and evaluation runs on one host share it. Lookups are
+    counted per caller (research, ghost typing, ...) for hit-rate
+    reporting, and calls that skip the cache (opted out at the call site,
+    or the cache is disabled) are counted as that caller's bypasses.
+    Failures are logged and treated as misses, so the cache can never fail
+    a generation.
+    """
+
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: float = 7 * 86400, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0, "bypasses": 0})
+        self.errors = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(model: str, prompt: str, params: Optional[Mapping[str, Any]] = None) -> str:
+        raw = json.dumps([model, normalize_prompt(prompt), dict(params or {})], sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def record_bypass(self, caller: str = "default") -> None:
+        """
+        Counts a call from `caller` that went to the model without a lookup.
+        """
+        self._counts[caller]["bypasses"] += 1
+
+    def get(self, key: str, caller: str = "default") -> Optional[str]:
+        if not self.enabled:
+            self.record_bypass(caller)
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                row = conn.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > self.ttl_seconds:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    row = None
+                if row is not None:
+                    conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("LLM cache read failed: %s", e)
+            row = None
+        self._counts[caller]["hits" if row is not None else "misses"] += 1
+        return row[0] if row is not None else None
+
+    def set(self, key: str, model: str, response: str) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, response, now, now),
+                )
+                overflow = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                        (overflow,),
+                    )
+                    self.evictions += overflow
+                conn.commit()
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning("LLM cache write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        callers = {}
+        for caller, counts in sorted(self._counts.items()):
+            lookups = counts["hits"] + counts["misses"]
+            callers[caller] = {**counts, "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0}
+        hits = sum(counts["hits"] for counts in self._counts.values())
+        lookups = hits + sum(counts["misses"] for counts in self._counts.values())
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": lookups - hits,
+            "bypasses": sum(counts["bypasses"] for counts in self._counts.values()),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "evictions": self.evictions,
+            "callers": callers,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM responses")
+            self._conn.commit()
+            self._counts.clear()
+
+
+llm_response_cache = LLMResponseCache(
+    path=settings.LLM_CACHE_PATH,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    enabled=settings.LLM_CACHE_ENABLED,
+)
@@ -0,0 +1,312 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+DEFAULT_COOLDOWN_SECONDS = 60.0
+
+# Highest priority first. A class's reserved share of every key's request
+# and token budget can only be spent by that class or higher ones:
+# interactive traffic always has 20% of the quota to itself, and
+# background work (ingestion, evaluation runs) only uses what the
+# interactive and standard reserves leave.
+PRIORITY_CLASSES = ("interactive", "standard", "background")
+RESERVED_SHARES = {"interactive": 0.2, "standard": 0.3, "background": 0.0}
+_WAIT_SAMPLES = 512
+
+_current_priority: ContextVar[Optional[str]] = ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """
+    Runs LLM calls made inside the block (including from tasks it starts)
+    in `priority`'s lane, e.g. `with llm_priority("background"):` around
+    an evaluation run.
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown LLM priority {priority!r}; expected one of {PRIORITY_CLASSES}")
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_llm_priority() -> Optional[str]:
+    return _current_priority.get()
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket: `capacity` units per minute. The level
+    may go negative when actual usage turns out above the estimate; the
+    debt is repaid by the refill before the bucket admits more work.
+    """
+
+    def __init__(self, capacity: float, now: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated_at = now
+
+    def resize(self, capacity: float, now: float) -> None:
+        self.refill(now)
+        self.capacity = float(capacity)
+        self.refill_per_second = self.capacity / 60.0
+        self.level = min(self.level, self.capacity)
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float, now: float, reserve: float = 0.0) -> float:
+        """
+        Time until `amount` can be taken while leaving `reserve` units in
+        the bucket.
+        """
+        self.refill(now)
+        # Requests larger than the usable bucket wait for a full one.
+        missing = min(amount, self.capacity - reserve) + reserve - self.level
+        return max(0.0, missing / self.refill_per_second) if self.refill_per_second else float("inf")
+
+    def consume(self, amount: float, now: float) -> None:
+        self.refill(now)
+        self.level -= amount
+
+
+class _KeyState:
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, now: float):
+        self.requests = TokenBucket(requests_per_minute, now)
+        self.tokens = TokenBucket(tokens_per_minute, now)
+        self.cooldown_until = 0.0
+        self.rate_limited = 0
+        self.dispatched = 0
+
+    def seconds_until_ready(self, estimated_tokens: float, now: float, reserve_share: float = 0.0) -> float:
+        return max(
+            self.cooldown_until - now,
+            # Requests are whole: a fraction of one is not worth holding back.
+            self.requests.seconds_until(1, now, math.floor(reserve_share * self.requests.capacity)),
+            self.tokens.seconds_until(estimated_tokens, now, reserve_share * self.tokens.capacity),
+        )
+
+    def headroom(self) -> float:
+        return min(self.requests.level / self.requests.capacity, self.tokens.level / self.tokens.capacity)
+
+
+class _Waiter:
+    __slots__ = ("lane", "seq", "estimated_tokens", "future", "enqueued_at")
+
+    def __init__(self, lane: int, seq: int, estimated_tokens: float, future: asyncio.Future, enqueued_at: float):
+        self.lane = lane
+        self.seq = seq
+        self.estimated_tokens = estimated_tokens
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.lane, self.seq) < (other.lane, other.seq)
+
+
+class LLMKeyScheduler:
+    """
+    Per-key token-bucket scheduler for a pool of provider API keys.
+
+    Each key has its own requests-per-minute and tokens-per-minute bucket.
+    `acquire` hands out the ready key with the most headroom, so the pool's
+    ceiling is the sum of its keys rather than a multiple of the slowest.
+    A 429 cools its key down for the server's `retry-after`.
+
+    Callers queue by priority class, then arrival, and sleep until woken
+    instead of polling: a new higher-class request goes ahead of every
+    queued lower-class one, and may use capacity reserved for its class
+    (RESERVED_SHARES) that lower classes are still waiting on.
+
+    Buckets, lanes and reserves are per process. A separate process on the
+    same keys (an evaluation run) is invisible to the API server's
+    scheduler, so its reserves cannot protect interactive traffic from it;
+    such processes call `cap_share` to take a hard fraction of each key's
+    quota instead, and any 429s that still occur cool the key down in both.
+    """
+
+    def __init__(
+        self,
+        n_keys: int,
+        requests_per_minute: float = 25,
+        tokens_per_minute: float = 12000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = asyncio.sleep,
+    ):
+        self._clock = clock
+        self._sleep = sleep
+        now = clock()
+        self._requests_per_minute = requests_per_minute
+        self._tokens_per_minute = tokens_per_minute
+        self._keys: List[_KeyState] = [_KeyState(requests_per_minute, tokens_per_minute, now) for _ in range(n_keys)]
+        # Share of each bucket a class must leave for the classes above it.
+        self._reserves = [
+            sum(RESERVED_SHARES[higher] for higher in PRIORITY_CLASSES[:lane]) for lane in range(len(PRIORITY_CLASSES))
+        ]
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Task] = None
+        self._waits: Dict[str, Deque[float]] = {name: deque(maxlen=_WAIT_SAMPLES) for name in PRIORITY_CLASSES}
+        self._granted: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def cap_share(self, share: float) -> None:
+        """
+        Limits this process to `share` of every key's configured request and
+        token budget.
+        """
+        if not 0 < share <= 1:
+            raise ValueError(f"share must be in (0, 1], got {share}")
+        now = self._clock()
+        for key in self._keys:
+            key.requests.resize(self._requests_per_minute * share, now)
+            key.tokens.resize(self._tokens_per_minute * share, now)
+
+    async def acquire(self, estimated_tokens: float = 0, priority: str = "standard") -> int:
+        """
+        Waits for a key that can take one more request of about
+        `estimated_tokens` tokens in `priority`'s lane, charges it, and
+        returns its index.
+        """
+        if not self._keys:
+            raise ValueError("No API keys configured")
+        if priority not in PRIORITY_CLASSES:
+            raise ValueError(f"Unknown LLM priority {priority!r}; expected one of {PRIORITY_CLASSES}")
+        waiter = _Waiter(
+            PRIORITY_CLASSES.index(priority),
+            next(self._seq),
+            estimated_tokens,
+            asyncio.get_running_loop().create_future(),
+            self._clock(),
+        )
+        heapq.heappush(self._waiters, waiter)
+        self._dispatch()
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            # Let the next caller in line take the slot.
+            self._dispatch()
+            raise
+
+    def _dispatch(self) -> None:
+        """
+        Grants keys to queued callers in priority order until the head of
+        the queue has to wait, then schedules a wakeup for when it can go.
+        """
+        while self._waiters:
+            waiter = self._waiters[0]
+            if waiter.future.done():
+                heapq.heappop(self._waiters)
+                continue
+            now = self._clock()
+            reserve = self._reserves[waiter.lane]
+            waits = [key.seconds_until_ready(waiter.estimated_tokens, now, reserve) for key in self._keys]
+            ready = [idx for idx, wait in enumerate(waits) if wait <= 0]
+            if not ready:
+                self._schedule_wakeup(min(waits))
+                return
+            best = max(ready, key=lambda idx: self._keys[idx].headroom())
+            key = self._keys[best]
+            key.requests.consume(1, now)
+            key.tokens.consume(waiter.estimated_tokens, now)
+            key.dispatched += 1
+            heapq.heappop(self._waiters)
+            name = PRIORITY_CLASSES[waiter.lane]
+            self._waits[name].append(now - waiter.enqueued_at)
+            self._granted[name] += 1
+            waiter.future.set_result(best)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.cancel()
+        self._wakeup = asyncio.get_running_loop().create_task(self._wake_after(delay))
+
+    async def _wake_after(self, delay: float) -> None:
+        await self._sleep(delay)
+        self._wakeup = None
+        self._dispatch()
+
+    def queue_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue-wait time per priority class over the last requests granted.
+        """
+        stats = {}
+        for lane, name in enumerate(PRIORITY_CLASSES):
+            waits = sorted(self._waits[name])
+            queued = sum(1 for waiter in self._waiters if waiter.lane == lane and not waiter.future.done())
+            stats[name] = {
+                "granted": self._granted[name],
+                "queued": queued,
+                "mean_wait_ms": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                "p95_wait_ms": round(1000 * waits[int(0.95 * (len(waits) - 1))], 1) if waits else 0.0,
+                "max_wait_ms": round(1000 * waits[-1], 1) if waits else 0.0,
+            }
+        return stats
+
+    def record_usage(self, key_index: int, actual_tokens: float, estimated_tokens: float) -> None:
+        """
+        Settles the difference between a request's estimate and the usage
+        the provider reported.
+        """
+        self._keys[key_index].tokens.consume(actual_tokens - estimated_tokens, self._clock())
+
+    def refund(self, key_index: int, estimated_tokens: float) -> None:
+        """
+        Returns the token estimate of a request the provider rejected
+        without serving it (a 429).
+        """
+        self._keys[key_index].tokens.consume(-estimated_tokens, self._clock())
+
+    def cool_down(self, key_index: int, retry_after: Optional[float] = None) -> None:
+        key = self._keys[key_index]
+        key.rate_limited += 1
+        seconds = retry_after if retry_after is not None and retry_after >= 0 else DEFAULT_COOLDOWN_SECONDS
+        key.cooldown_until = max(key.cooldown_until, self._clock() + seconds)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = self._clock()
+        stats = []
+        for idx, key in enumerate(self._keys):
+            key.requests.refill(now)
+            key.tokens.refill(now)
+            stats.append(
+                {
+                    "key": idx + 1,
+                    "requests_available": round(key.requests.level, 2),
+                    "tokens_available": round(key.tokens.level),
+                    "cooling_down_seconds": round(max(0.0, key.cooldown_until - now), 2),
+                    "dispatched": key.dispatched,
+                    "rate_limited": key.rate_limited,
+                }
+            )
+        return stats
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    `retry-after` (seconds) from a provider error's HTTP response, if any.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    error_str = str(error).lower()
+    return getattr(error, "status_code", None) == 429 or "rate_limit" in error_str or "429" in error_str
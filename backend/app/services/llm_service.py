@@ -32,7 +32,8 @@ class LLMService:
         prompt = create_generation_prompt(case_facts, template)
         self.token_tracker.track(prompt)  # Track input tokens
 
-        generated_text = await llm_client.generate(prompt, use_groq=use_groq)
+        # Drafts are sampled; regenerating must produce a fresh one.
+        generated_text = await llm_client.generate(prompt, use_groq=use_groq, caller="generation", use_cache=False)
         self.token_tracker.track(generated_text)  # Track output tokens
 
         parsed_document = parse_generated_document(generated_text)
@@ -0,0 +1,263 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from app.core.config import settings
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", (query or "").strip().lower())
+
+
+class CorpusVersion:
+    """
+    Monotonic per-collection counter persisted next to the vector store.
+
+    DocumentStore bumps it on every write, and the version is part of every
+    retrieval cache key, so entries computed against an older corpus are
+    never served again (they simply age out). Because the counter lives on
+    disk, writes from the ingest scripts invalidate caches in API workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._value = 0
+        self._loaded_mtime: Optional[float] = None
+
+    def _read(self) -> Optional[int]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return None
+
+    def get(self) -> int:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return 0
+        if mtime != self._loaded_mtime:
+            with self._lock:
+                value = self._read()
+                if value is None:
+                    return self._value
+                self._value = value
+                self._loaded_mtime = mtime
+        return self._value
+
+    def bump(self) -> int:
+        with self._lock:
+            # Read the file directly: another process may have bumped it,
+            # and `get` would take this (non-reentrant) lock again.
+            value = max(self._read() or 0, self._value) + 1
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(str(value))
+            os.replace(tmp_path, self.path)
+            self._value = value
+            self._loaded_mtime = os.path.getmtime(self.path)
+            return value
+
+
+_VERSIONS: Dict[str, CorpusVersion] = {}
+_VERSIONS_LOCK = threading.Lock()
+
+
+def corpus_version_path(persist_directory: str, collection_name: str) -> str:
+    return os.path.join(persist_directory, f"corpus_version_{collection_name}")
+
+
+def get_corpus_version(persist_directory: str, collection_name: str) -> CorpusVersion:
+    path = corpus_version_path(persist_directory, collection_name)
+    with _VERSIONS_LOCK:
+        version = _VERSIONS.get(path)
+        if version is None:
+            version = CorpusVersion(path)
+            _VERSIONS[path] = version
+    return version
+
+
+class LocalLRUCache:
+    """
+    In-process LRU with a per-entry TTL.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 900):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCacheBackend:
+    """
+    Redis-backed store shared by every worker. Values are JSON; eviction is
+    left to Redis (TTL plus the server's maxmemory policy).
+    """
+
+    def __init__(self, client: Any, ttl_seconds: float = 900, prefix: str = "retrieval:"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*"))
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key: str, value: Any) -> None:
+        self.client.set(self.prefix + key, json.dumps(value), ex=int(self.ttl_seconds))
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+class RetrievalCache:
+    """
+    Caches ranked retrieval results per (normalized query, strategy, k,
+    corpus version). Backend failures are counted and treated as misses so
+    the cache can never fail a request.
+    """
+
+    def __init__(self, backend: Any, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    @staticmethod
+    def make_key(
+        query: str,
+        strategy: str,
+        k: int,
+        corpus_version: int,
+        collection_name: str = "",
+        filters_token: str = "",
+    ) -> str:
+        raw = f"{collection_name}|{corpus_version}|{strategy}|{k}|{filters_token}|{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Document]]:
+        if not self.enabled:
+            return None
+        try:
+            payload = self.backend.get(key)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Retrieval cache read failed: %s", e)
+            payload = None
+        if payload is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [
+            Document(id=item.get("id"), page_content=item["page_content"], metadata=item.get("metadata") or {})
+            for item in payload
+        ]
+
+    def set(self, key: str, docs: List[Document]) -> None:
+        if not self.enabled:
+            return
+        payload = [
+            {"id": getattr(doc, "id", None), "page_content": doc.page_content, "metadata": doc.metadata or {}}
+            for doc in docs
+        ]
+        try:
+            self.backend.set(key, payload)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Retrieval cache write failed: %s", e)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        try:
+            size = len(self.backend)
+        except Exception:
+            size = None
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "evictions": getattr(self.backend, "evictions", 0),
+            "size": size,
+        }
+
+
+def _build_backend() -> Any:
+    ttl_seconds = settings.RETRIEVAL_CACHE_TTL_SECONDS
+    if settings.RETRIEVAL_CACHE_BACKEND == "redis":
+        if redis is None:
+            logger.warning("RETRIEVAL_CACHE_BACKEND=redis but the redis package is not installed; using local cache")
+        else:
+            try:
+                client = redis.Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.RETRIEVAL_CACHE_REDIS_DB,
+                )
+                client.ping()
+                return RedisCacheBackend(client, ttl_seconds=ttl_seconds)
+            except Exception as e:
+                logger.warning("Could not connect to Redis for retrieval cache, using local cache: %s", e)
+    return LocalLRUCache(max_entries=settings.RETRIEVAL_CACHE_MAX_ENTRIES, ttl_seconds=ttl_seconds)
+
+
+retrieval_cache = RetrievalCache(_build_backend(), enabled=settings.RETRIEVAL_CACHE_ENABLED)
@@ -1,15 +1,55 @@
+import asyncio
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from inspect import signature
-from typing import List, Optional
+from typing import Any, Callable, List, Mapping, Optional, Sequence, Set, Tuple
 
+import numpy as np
 from langchain_classic.retrievers.ensemble import EnsembleRetriever
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
 
+from app.agents.legal_research.fusion import fuse_documents
+from app.agents.legal_research.metadata_index import (
+    MetadataFilter,
+    MetadataIndex,
+    get_metadata_index,
+)
 from app.agents.legal_research.retrievers import (
     get_hybrid_retriever,
     get_persistent_retriever,
+    get_persistent_vectorstore,
+    resolve_persist_directory,
+)
+from app.agents.legal_research.section_index import SectionIndex, get_section_index
+from app.agents.legal_research.sparse_index import BM25Index, get_sparse_index
+from app.core.config import HYBRID_SEARCH_CONFIG, settings
+from app.db.local_vector_store import LocalCollection
+from app.services.cross_encoder_reranker import (
+    CrossEncoderReranker,
+    cross_encoder_reranker,
+)
+from app.services.embedding_registry import get_embedding_model
+from app.services.retrieval_cache import (
+    RetrievalCache,
+    get_corpus_version,
+    retrieval_cache,
+)
+from app.services.single_flight import SingleFlight, retrieval_single_flight
+
+logger = logging.getLogger(__name__)
+
+DENSE_INCLUDE = ["documents", "metadatas", "embeddings", "distances"]
+STORED_INCLUDE = ["documents", "metadatas", "embeddings"]
+
+# Shared by every RetrievalService so concurrent requests cannot spawn
+# unbounded embedding/BM25 threads.
+_RETRIEVAL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=max(1, settings.RETRIEVAL_MAX_WORKERS),
+    thread_name_prefix="retrieval",
 )
-from app.core.config import HYBRID_SEARCH_CONFIG
 
 
 class RetrievalService:
@@ -20,9 +60,25 @@ class RetrievalService:
     strategy (dense-only vs hybrid) without touching every caller.
     """
 
-    def __init__(self, persist_directory: str = "chroma_db", collection_name: str = "legal_judgments"):
+    def __init__(
+        self,
+        persist_directory: str = "chroma_db",
+        collection_name: str = "legal_judgments",
+        cache: Optional[RetrievalCache] = None,
+        nprobe: Optional[int] = None,
+        reranker: Optional[CrossEncoderReranker] = None,
+        single_flight: Optional[SingleFlight] = None,
+    ):
         self.persist_directory = persist_directory
         self.collection_name = collection_name
+        self.cache = cache if cache is not None else retrieval_cache
+        self.reranker = reranker if reranker is not None else cross_encoder_reranker
+        self.single_flight = single_flight if single_flight is not None else retrieval_single_flight
+        # IVF lists probed per dense query on the local engine (None keeps
+        # IVF_NPROBE). Chroma's HNSW ef is collection config on the server.
+        self.nprobe = nprobe
+        self._vectorstore = None
+        self._async_collection = None
 
     def get_persistent_retriever(self, k: int = 5) -> BaseRetriever:
         return get_persistent_retriever(
@@ -31,10 +87,165 @@ class RetrievalService:
             k=k,
         )
 
+    def get_vectorstore(self):
+        if self._vectorstore is None:
+            self._vectorstore = get_persistent_vectorstore(
+                persist_directory=self.persist_directory,
+                collection_name=self.collection_name,
+            )
+        return self._vectorstore
+
+    def get_sparse_index(self) -> BM25Index:
+        return get_sparse_index(resolve_persist_directory(self.persist_directory), self.collection_name)
+
+    def get_section_index(self) -> SectionIndex:
+        return get_section_index(resolve_persist_directory(self.persist_directory), self.collection_name)
+
+    def get_metadata_index(self) -> MetadataIndex:
+        return get_metadata_index(resolve_persist_directory(self.persist_directory), self.collection_name)
+
+    def resolve_filters(
+        self, filters: Optional[Mapping[str, Any]]
+    ) -> Tuple[Optional[MetadataFilter], Optional[Set[str]]]:
+        """
+        Validates request filters and resolves them to the set of matching
+        chunk ids through the metadata posting lists. The id set is None
+        when nothing is filtered, or when the collection predates the
+        metadata index (candidates are then checked one by one).
+        """
+        metadata_filter = MetadataFilter.from_mapping(filters)
+        if metadata_filter is None:
+            return None, None
+        index = self.get_metadata_index()
+        if not index.is_built:
+            return metadata_filter, None
+        return metadata_filter, index.matching_ids(metadata_filter)
+
+    def corpus_version(self) -> int:
+        """
+        Write counter of the collection; results computed under another
+        version must not be served.
+        """
+        try:
+            return get_corpus_version(resolve_persist_directory(self.persist_directory), self.collection_name).get()
+        except Exception:
+            return 0
+
+    def get_collection(self):
+        """
+        Raw collection behind the LangChain wrapper (Chroma or the built-in
+        local engine). Querying it directly lets us ask for stored embeddings
+        and distances alongside documents.
+        """
+        return self.get_vectorstore()._collection
+
+    def _ann_query_options(self, collection: Any) -> dict:
+        if self.nprobe is not None and isinstance(collection, LocalCollection):
+            return {"nprobe": self.nprobe}
+        return {}
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return np.asarray(get_embedding_model().embed_query(query), dtype=np.float32)
+
+    def embed_queries(self, queries: Sequence[str]) -> np.ndarray:
+        """
+        Embeds several queries in one forward pass.
+        """
+        if len(queries) == 1:
+            return self.embed_query(queries[0])[np.newaxis, :]
+        return np.asarray(get_embedding_model().embed_documents(list(queries)), dtype=np.float32)
+
+    def dense_search(
+        self, query_vector: np.ndarray, k: int = 5
+    ) -> Tuple[List[Document], np.ndarray, np.ndarray]:
+        """
+        Nearest-neighbour search that also returns the stored embedding and
+        distance of every hit, so later stages never re-embed candidates.
+        """
+        return self.dense_search_batch(np.asarray(query_vector)[np.newaxis, :], k=k)[0]
+
+    def dense_search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 5,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[Tuple[List[Document], np.ndarray, np.ndarray]]:
+        """
+        One multi-query request to the vector store; results are per query,
+        in the same order as `query_vectors`. A filter is pushed down as a
+        `where` clause, so the store searches only the matching subset.
+        """
+        collection = self.get_collection()
+        result = collection.query(
+            query_embeddings=np.asarray(query_vectors).tolist(),
+            n_results=k,
+            include=DENSE_INCLUDE,
+            **self._ann_query_options(collection),
+            **_where_options(metadata_filter),
+        )
+        return _split_query_result(result, len(query_vectors))
+
+    def sparse_search(self, query: str, k: int = 5) -> List[Document]:
+        """
+        BM25 top-k over the whole collection, resolved to stored documents.
+        """
+        docs, _embeddings = self._sparse_candidates_batch([query], k)[0]
+        return docs
+
+    def _sparse_candidates_batch(
+        self, queries: Sequence[str], k: int, allowed_ids: Optional[Set[str]] = None
+    ) -> List[Tuple[List[Document], np.ndarray]]:
+        """
+        BM25 hits for every query, resolved with a single `get()` for the
+        union of hit ids.
+        """
+        return self._fetch_by_ids(self._sparse_hit_ids(queries, k, allowed_ids))
+
+    def _sparse_hit_ids(
+        self, queries: Sequence[str], k: int, allowed_ids: Optional[Set[str]] = None
+    ) -> List[List[str]]:
+        index = self.get_sparse_index()
+        if allowed_ids is None:
+            return [[doc_id for doc_id, _score in index.search(query, k=k)] for query in queries]
+        return [[doc_id for doc_id, _score in index.search(query, k=k, doc_ids=allowed_ids)] for query in queries]
+
+    def _exact_ids_batch(
+        self, queries: Sequence[str], allowed_ids: Optional[Set[str]] = None
+    ) -> List[List[str]]:
+        """
+        Chunk ids for citation-style queries ("Section 138 NI Act") from the
+        exact act/section index; empty lists for everything else.
+        """
+        try:
+            index = self.get_section_index()
+            exact_ids = [index.lookup_query(query) for query in queries]
+        except Exception:
+            return [[] for _ in queries]
+        if allowed_ids is not None:
+            exact_ids = [[doc_id for doc_id in ids if doc_id in allowed_ids] for ids in exact_ids]
+        return exact_ids
+
+    def is_citation_query(self, query: str) -> bool:
+        return bool(self._exact_ids_batch([query])[0])
+
+    def _fetch_by_ids(
+        self, id_lists: Sequence[Sequence[str]]
+    ) -> List[Tuple[List[Document], np.ndarray]]:
+        """
+        Resolves several ranked id lists with one `get()` for their union,
+        keeping each list's order.
+        """
+        unique_ids = list(dict.fromkeys(doc_id for ids in id_lists for doc_id in ids))
+        if not unique_ids:
+            return [([], _EMPTY_MATRIX) for _ in id_lists]
+
+        stored = self.get_collection().get(ids=unique_ids, include=STORED_INCLUDE)
+        return _split_stored_result(stored, id_lists)
+
     def get_hybrid_retriever(
         self,
         documents: List[Document],
-        embedding_model: str = "all-MiniLM-L6-v2",
+        embedding_model: Optional[str] = None,
         k: int = 5,
         keyword_weight: Optional[float] = None,
         semantic_weight: Optional[float] = None,
@@ -69,27 +280,629 @@ class RetrievalService:
         query: str,
         strategy: str = "dense",
         k: int = 5,
+        filters: Optional[Mapping[str, Any]] = None,
     ) -> List[Document]:
         """
         Route retrieval by strategy with safe fallback to dense retrieval.
 
         Strategies:
         - dense: persistent vectorstore retrieval
-        - hybrid: dense candidate fetch + in-memory hybrid rerank
+        - hybrid: dense candidates + full-corpus BM25 candidates, fused with
+          weighted reciprocal rank fusion and the HYBRID_SEARCH_CONFIG boosts
+
+        `filters` restricts every candidate source to matching chunks, e.g.
+        {"jurisdiction": "Maharashtra", "doc_type": "statute"} or
+        {"date_from": "2020-01-01"}; see `MetadataFilter`.
+        """
+        return self.retrieve_ranked_lists([query], strategy=strategy, k=k, filters=filters)[0]
+
+    def retrieve_documents_batch(
+        self,
+        queries: Sequence[str],
+        strategy: str = "dense",
+        k: int = 5,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> List[Document]:
+        """
+        Retrieves for several queries (e.g. research focus queries) with one
+        embedding pass and one vector-store request, returning the per-query
+        results concatenated in query order and deduplicated.
+        """
+        return _dedupe_documents(self.retrieve_ranked_lists(queries, strategy=strategy, k=k, filters=filters))
+
+    def retrieve_ranked_lists(
+        self,
+        queries: Sequence[str],
+        strategy: str = "dense",
+        k: int = 5,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> List[List[Document]]:
+        """
+        Per-query ranked results, served from the retrieval cache where the
+        corpus has not changed since they were computed.
+
+        With the cross-encoder enabled, the cache holds the deeper fused
+        lists and the rerank runs on top (its pair scores are cached
+        separately), so a budget fallback is never cached.
+        """
+        queries = [query for query in queries if query and query.strip()]
+        if not queries:
+            return [[]]
+
+        depth = self.reranker.depth(k)
+        metadata_filter, allowed_ids = self.resolve_filters(filters)
+        keys, results, missing = self._cache_lookup(queries, strategy, depth, metadata_filter)
+        if missing:
+            computed = self._compute_ranked_lists(
+                [queries[idx] for idx in missing], strategy, depth, metadata_filter, allowed_ids
+            )
+            self._cache_store(keys, results, missing, computed)
+        return self._rerank(queries, results, k)
+
+    def _rerank(self, queries: Sequence[str], results: List[List[Document]], k: int) -> List[List[Document]]:
+        """
+        Cross-encoder pass over fused candidates. Citation queries keep their
+        pinned exact hits, and any reranker failure keeps the fused order.
         """
+        if not self.reranker.enabled:
+            return results
+        rows = [idx for idx, exact_ids in enumerate(self._exact_ids_batch(queries)) if not exact_ids]
+        reranked = [docs[:k] for docs in results]
+        if not rows:
+            return reranked
+        try:
+            ranked = self.reranker.rerank_batch([queries[idx] for idx in rows], [results[idx] for idx in rows], k)
+        except Exception as e:
+            logger.warning("Cross-encoder rerank failed; keeping fused order: %s", e)
+            return reranked
+        for idx, docs in zip(rows, ranked):
+            reranked[idx] = docs
+        return reranked
+
+    def _cache_lookup(
+        self,
+        queries: Sequence[str],
+        strategy: str,
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> Tuple[List[str], List[List[Document]], List[int]]:
+        version = self.corpus_version()
+        keys = [
+            self.cache.make_key(
+                query,
+                strategy,
+                k,
+                version,
+                self.collection_name,
+                filters_token=metadata_filter.token() if metadata_filter else "",
+            )
+            for query in queries
+        ]
+        results: List[List[Document]] = []
+        missing: List[int] = []
+        for idx, key in enumerate(keys):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.append(idx)
+                cached = []
+            results.append(cached)
+        return keys, results, missing
+
+    def _cache_store(
+        self,
+        keys: Sequence[str],
+        results: List[List[Document]],
+        missing: Sequence[int],
+        computed: Sequence[List[Document]],
+    ) -> None:
+        for idx, docs in zip(missing, computed):
+            results[idx] = docs
+            self.cache.set(keys[idx], docs)
+
+    def _compute_ranked_lists(
+        self,
+        queries: Sequence[str],
+        strategy: str = "dense",
+        k: int = 5,
+        metadata_filter: Optional[MetadataFilter] = None,
+        allowed_ids: Optional[Set[str]] = None,
+    ) -> List[List[Document]]:
+        """
+        Queries citing an indexed act and section are answered from the exact
+        index (pinned first) plus BM25, without touching the embedding model;
+        the rest share one embedding pass and one vector-store request.
+        """
+        queries = [query for query in queries if query and query.strip()]
+        if not queries:
+            return [[]]
+        if allowed_ids is not None and not allowed_ids:
+            return [[] for _ in queries]
+
         candidate_k = k if strategy != "hybrid" else max(k * 10, 40)
-        dense_retriever = self.get_persistent_retriever(k=candidate_k)
-        dense_docs = dense_retriever.invoke(query) or []
+        exact_ids = self._exact_ids_batch(queries, allowed_ids)
+        semantic_rows = [idx for idx, ids in enumerate(exact_ids) if not ids]
+        citation_rows = [idx for idx, ids in enumerate(exact_ids) if ids]
+
+        results: List[List[Document]] = [[] for _ in queries]
+        if citation_rows:
+            results_by_row = self._retrieve_citations(
+                [queries[idx] for idx in citation_rows],
+                [exact_ids[idx] for idx in citation_rows],
+                k=k,
+                candidate_k=candidate_k,
+                metadata_filter=metadata_filter,
+                allowed_ids=allowed_ids,
+            )
+            for idx, docs in zip(citation_rows, results_by_row):
+                results[idx] = docs
+        if not semantic_rows:
+            return results
+
+        semantic_queries = [queries[idx] for idx in semantic_rows]
+        query_vectors = self.embed_queries(semantic_queries)
+        dense_results = self.dense_search_batch(query_vectors, k=candidate_k, metadata_filter=metadata_filter)
 
         if strategy != "hybrid":
-            return dense_docs[:k]
+            for idx, (docs, _embeddings, _distances) in zip(semantic_rows, dense_results):
+                results[idx] = docs[:k]
+            return results
+
+        try:
+            sparse_results = self._sparse_candidates_batch(semantic_queries, k=candidate_k, allowed_ids=allowed_ids)
+            sparse_results = _apply_filter(sparse_results, metadata_filter, allowed_ids)
+        except Exception:
+            # A missing or unreadable index degrades to dense-only candidates.
+            sparse_results = [([], _EMPTY_MATRIX) for _ in semantic_queries]
+
+        for idx, query_vector, dense_result, sparse_result in zip(
+            semantic_rows, query_vectors, dense_results, sparse_results
+        ):
+            results[idx] = self._fuse_hybrid(query_vector, dense_result, sparse_result, k)
+        return results
+
+    def _retrieve_citations(
+        self,
+        queries: Sequence[str],
+        exact_ids: Sequence[Sequence[str]],
+        k: int,
+        candidate_k: int,
+        metadata_filter: Optional[MetadataFilter] = None,
+        allowed_ids: Optional[Set[str]] = None,
+    ) -> List[List[Document]]:
+        try:
+            sparse_ids = self._sparse_hit_ids(queries, candidate_k, allowed_ids)
+        except Exception:
+            sparse_ids = [[] for _ in queries]
+
+        # One round trip resolves the exact and BM25 hits of every query.
+        fetched = self._fetch_by_ids([*exact_ids, *sparse_ids])
+        return self._fuse_citations(_apply_filter(fetched, metadata_filter, allowed_ids), len(queries), k)
+
+    def _fuse_citations(
+        self,
+        fetched: Sequence[Tuple[List[Document], np.ndarray]],
+        n_queries: int,
+        k: int,
+    ) -> List[List[Document]]:
+        exact_results, sparse_results = fetched[:n_queries], fetched[n_queries:]
+        ranked = []
+        for (exact_docs, _exact_embeddings), (sparse_docs, _sparse_embeddings) in zip(exact_results, sparse_results):
+            try:
+                fused = fuse_documents(
+                    {"exact": exact_docs, "sparse": sparse_docs},
+                    HYBRID_SEARCH_CONFIG,
+                    key_fn=_candidate_key,
+                    k=k,
+                )
+            except Exception:
+                fused = _dedupe_documents([exact_docs, sparse_docs])[:k]
+            ranked.append(fused)
+        return ranked
+
+    # Async API: same pipeline as the sync methods above, but CPU-bound work
+    # (embedding, BM25, index lookups) runs on the shared bounded thread pool
+    # and vector-store requests use Chroma's async HTTP client when enabled.
+    # Cancelling the awaiting task (e.g. on client disconnect) abandons the
+    # remaining stages instead of blocking the event loop until they finish.
+
+    async def _run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_RETRIEVAL_EXECUTOR, functools.partial(func, *args, **kwargs))
+
+    async def get_async_collection(self):
+        """
+        Async Chroma collection, or None when the store is only reachable
+        through the local persistent client.
+        """
+        if not settings.CHROMA_ASYNC_HTTP or settings.VECTOR_STORE_BACKEND == "local":
+            return None
+        if self._async_collection is None:
+            from app.db.vector_db import get_async_vector_db
+
+            client = await get_async_vector_db()
+            self._async_collection = await client.get_collection(self.collection_name)
+        return self._async_collection
+
+    async def _aquery_collection(self, **kwargs: Any) -> Any:
+        collection = await self.get_async_collection()
+        if collection is None:
+            collection = self.get_collection()
+            return await self._run_blocking(
+                lambda: collection.query(**kwargs, **self._ann_query_options(collection))
+            )
+        return await collection.query(**kwargs)
+
+    async def _aget_from_collection(self, **kwargs) -> Any:
+        collection = await self.get_async_collection()
+        if collection is None:
+            return await self._run_blocking(lambda: self.get_collection().get(**kwargs))
+        return await collection.get(**kwargs)
+
+    async def aembed_queries(self, queries: Sequence[str]) -> np.ndarray:
+        return await self._run_blocking(self.embed_queries, queries)
+
+    async def adense_search_batch(
+        self,
+        query_vectors: np.ndarray,
+        k: int = 5,
+        metadata_filter: Optional[MetadataFilter] = None,
+    ) -> List[Tuple[List[Document], np.ndarray, np.ndarray]]:
+        result = await self._aquery_collection(
+            query_embeddings=np.asarray(query_vectors).tolist(),
+            n_results=k,
+            include=DENSE_INCLUDE,
+            **_where_options(metadata_filter),
+        )
+        return _split_query_result(result, len(query_vectors))
+
+    async def _afetch_by_ids(
+        self, id_lists: Sequence[Sequence[str]]
+    ) -> List[Tuple[List[Document], np.ndarray]]:
+        unique_ids = list(dict.fromkeys(doc_id for ids in id_lists for doc_id in ids))
+        if not unique_ids:
+            return [([], _EMPTY_MATRIX) for _ in id_lists]
+        stored = await self._aget_from_collection(ids=unique_ids, include=STORED_INCLUDE)
+        return _split_stored_result(stored, id_lists)
+
+    async def _asparse_candidates_batch(
+        self,
+        queries: Sequence[str],
+        k: int,
+        metadata_filter: Optional[MetadataFilter] = None,
+        allowed_ids: Optional[Set[str]] = None,
+    ) -> List[Tuple[List[Document], np.ndarray]]:
+        try:
+            hit_ids = await self._run_blocking(self._sparse_hit_ids, queries, k, allowed_ids)
+            return _apply_filter(await self._afetch_by_ids(hit_ids), metadata_filter, allowed_ids)
+        except Exception:
+            # A missing or unreadable index degrades to dense-only candidates.
+            return [([], _EMPTY_MATRIX) for _ in queries]
+
+    async def aretrieve_documents(
+        self,
+        query: str,
+        strategy: str = "dense",
+        k: int = 5,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> List[Document]:
+        return (await self.aretrieve_ranked_lists([query], strategy=strategy, k=k, filters=filters))[0]
+
+    async def aretrieve_documents_batch(
+        self,
+        queries: Sequence[str],
+        strategy: str = "dense",
+        k: int = 5,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> List[Document]:
+        return _dedupe_documents(
+            await self.aretrieve_ranked_lists(queries, strategy=strategy, k=k, filters=filters)
+        )
+
+    async def aretrieve_ranked_lists(
+        self,
+        queries: Sequence[str],
+        strategy: str = "dense",
+        k: int = 5,
+        filters: Optional[Mapping[str, Any]] = None,
+    ) -> List[List[Document]]:
+        """
+        Async `retrieve_ranked_lists`. Concurrent identical requests (same
+        queries, strategy, k and filters) share one retrieval; each caller
+        gets its own lists over the shared documents.
+        """
+        queries = [query for query in queries if query and query.strip()]
+        if not queries:
+            return [[]]
+
+        key = (
+            self.persist_directory,
+            self.collection_name,
+            tuple(queries),
+            strategy,
+            k,
+            json.dumps(dict(filters or {}), sort_keys=True, default=str),
+        )
+        results = await self.single_flight.do(
+            key, lambda: self._aretrieve_ranked_lists(queries, strategy, k, filters)
+        )
+        return [list(docs) for docs in results]
+
+    async def _aretrieve_ranked_lists(
+        self,
+        queries: Sequence[str],
+        strategy: str,
+        k: int,
+        filters: Optional[Mapping[str, Any]],
+    ) -> List[List[Document]]:
+        depth = self.reranker.depth(k)
+        metadata_filter, allowed_ids = await self._run_blocking(self.resolve_filters, filters)
+        # The cache may be Redis-backed, so keep its I/O off the event loop too.
+        keys, results, missing = await self._run_blocking(self._cache_lookup, queries, strategy, depth, metadata_filter)
+        if missing:
+            computed = await self._acompute_ranked_lists(
+                [queries[idx] for idx in missing], strategy, depth, metadata_filter, allowed_ids
+            )
+            await self._run_blocking(self._cache_store, keys, results, missing, computed)
+        if not self.reranker.enabled:
+            return results
+        return await self._run_blocking(self._rerank, queries, results, k)
+
+    async def _acompute_ranked_lists(
+        self,
+        queries: Sequence[str],
+        strategy: str = "dense",
+        k: int = 5,
+        metadata_filter: Optional[MetadataFilter] = None,
+        allowed_ids: Optional[Set[str]] = None,
+    ) -> List[List[Document]]:
+        queries = [query for query in queries if query and query.strip()]
+        if not queries:
+            return [[]]
+        if allowed_ids is not None and not allowed_ids:
+            return [[] for _ in queries]
+
+        candidate_k = k if strategy != "hybrid" else max(k * 10, 40)
+        exact_ids = await self._run_blocking(self._exact_ids_batch, queries, allowed_ids)
+        semantic_rows = [idx for idx, ids in enumerate(exact_ids) if not ids]
+        citation_rows = [idx for idx, ids in enumerate(exact_ids) if ids]
+        semantic_queries = [queries[idx] for idx in semantic_rows]
+
+        async def _citations() -> List[List[Document]]:
+            if not citation_rows:
+                return []
+            citation_queries = [queries[idx] for idx in citation_rows]
+            try:
+                sparse_ids = await self._run_blocking(
+                    self._sparse_hit_ids, citation_queries, candidate_k, allowed_ids
+                )
+            except Exception:
+                sparse_ids = [[] for _ in citation_queries]
+            fetched = await self._afetch_by_ids([*(exact_ids[idx] for idx in citation_rows), *sparse_ids])
+            return self._fuse_citations(
+                _apply_filter(fetched, metadata_filter, allowed_ids), len(citation_queries), k
+            )
 
-        if not dense_docs:
+        async def _semantic() -> List[List[Document]]:
+            if not semantic_rows:
+                return []
+            query_vectors = await self.aembed_queries(semantic_queries)
+            if strategy != "hybrid":
+                dense_results = await self.adense_search_batch(
+                    query_vectors, k=candidate_k, metadata_filter=metadata_filter
+                )
+                return [docs[:k] for docs, _embeddings, _distances in dense_results]
+
+            # Dense search and BM25 are independent; overlap them.
+            dense_results, sparse_results = await asyncio.gather(
+                self.adense_search_batch(query_vectors, k=candidate_k, metadata_filter=metadata_filter),
+                self._asparse_candidates_batch(
+                    semantic_queries, k=candidate_k, metadata_filter=metadata_filter, allowed_ids=allowed_ids
+                ),
+            )
+            return [
+                self._fuse_hybrid(query_vector, dense_result, sparse_result, k)
+                for query_vector, dense_result, sparse_result in zip(query_vectors, dense_results, sparse_results)
+            ]
+
+        citation_results, semantic_results = await asyncio.gather(_citations(), _semantic())
+
+        results: List[List[Document]] = [[] for _ in queries]
+        for idx, docs in zip(citation_rows, citation_results):
+            results[idx] = docs
+        for idx, docs in zip(semantic_rows, semantic_results):
+            results[idx] = docs
+        return results
+
+    def _fuse_hybrid(
+        self,
+        query_vector: np.ndarray,
+        dense_result: Tuple[List[Document], np.ndarray, np.ndarray],
+        sparse_result: Tuple[List[Document], np.ndarray],
+        k: int,
+    ) -> List[Document]:
+        dense_docs, dense_embeddings, _distances = dense_result
+        sparse_docs, sparse_embeddings = sparse_result
+
+        candidates, candidate_embeddings = _merge_candidates(
+            (dense_docs, dense_embeddings),
+            (sparse_docs, sparse_embeddings),
+        )
+        if not candidates:
             return []
 
         try:
-            hybrid_retriever = self.get_hybrid_retriever(documents=dense_docs, k=k)
-            return hybrid_retriever.invoke(query) or dense_docs
+            dense_ranked = _rank_by_cosine(query_vector, candidates, candidate_embeddings)
+        except Exception:
+            dense_ranked = dense_docs
+
+        try:
+            fused = fuse_documents(
+                {"dense": dense_ranked, "sparse": sparse_docs},
+                HYBRID_SEARCH_CONFIG,
+                key_fn=_candidate_key,
+                k=k,
+            )
+            return fused or candidates[:k]
         except Exception:
             # Guardrail: never fail request path due to hybrid rerank issues.
-            return dense_docs[:k]
+            return candidates[:k]
+
+
+_EMPTY_MATRIX = np.zeros((0, 0), dtype=np.float32)
+
+
+def _where_options(metadata_filter: Optional[MetadataFilter]) -> dict:
+    return {"where": metadata_filter.to_where()} if metadata_filter is not None else {}
+
+
+def _apply_filter(
+    fetched: Sequence[Tuple[List[Document], np.ndarray]],
+    metadata_filter: Optional[MetadataFilter],
+    allowed_ids: Optional[Set[str]],
+) -> List[Tuple[List[Document], np.ndarray]]:
+    """
+    Checks index hits against the filter's metadata when the id set was not
+    available (collections ingested before the metadata index existed).
+    """
+    if metadata_filter is None or allowed_ids is not None:
+        return list(fetched)
+    filtered = []
+    for docs, embeddings in fetched:
+        keep = [idx for idx, doc in enumerate(docs) if metadata_filter.matches(doc.metadata or {})]
+        kept_embeddings = embeddings[keep] if len(embeddings) == len(docs) and keep else _EMPTY_MATRIX
+        filtered.append(([docs[idx] for idx in keep], kept_embeddings))
+    return filtered
+
+
+def _none_to_empty(value: Any) -> Sequence:
+    # Chroma returns numpy arrays for embeddings, so avoid `value or []`.
+    return [] if value is None else value
+
+
+def _row(value: Sequence, row: int) -> Sequence:
+    return _none_to_empty(value[row]) if row < len(value) else []
+
+
+def _as_matrix(rows: Any, expected: int) -> np.ndarray:
+    rows = _none_to_empty(rows)
+    if len(rows) != expected or not expected:
+        return _EMPTY_MATRIX
+    return np.asarray(rows, dtype=np.float32)
+
+
+def _split_query_result(result: Any, n_queries: int) -> List[Tuple[List[Document], np.ndarray, np.ndarray]]:
+    ids = _none_to_empty(result.get("ids"))
+    documents = _none_to_empty(result.get("documents"))
+    metadatas = _none_to_empty(result.get("metadatas"))
+    embeddings = _none_to_empty(result.get("embeddings"))
+    distances = _none_to_empty(result.get("distances"))
+
+    per_query = []
+    for row in range(n_queries):
+        docs = _documents_from_columns(
+            _row(ids, row),
+            _row(documents, row),
+            _row(metadatas, row),
+        )
+        per_query.append(
+            (
+                docs,
+                _as_matrix(_row(embeddings, row), len(docs)),
+                np.asarray(_row(distances, row), dtype=np.float32),
+            )
+        )
+    return per_query
+
+
+def _split_stored_result(
+    stored: Any, id_lists: Sequence[Sequence[str]]
+) -> List[Tuple[List[Document], np.ndarray]]:
+    stored_ids = list(_none_to_empty(stored.get("ids")))
+    stored_docs = _documents_from_columns(
+        stored_ids,
+        _none_to_empty(stored.get("documents")),
+        _none_to_empty(stored.get("metadatas")),
+    )
+    stored_embeddings = _as_matrix(stored.get("embeddings"), len(stored_docs))
+
+    # Chroma's get() does not preserve the requested id order.
+    position = {doc_id: idx for idx, doc_id in enumerate(stored_ids)}
+    per_list = []
+    for ids in id_lists:
+        order = [position[doc_id] for doc_id in ids if doc_id in position]
+        docs = [stored_docs[idx] for idx in order]
+        embeddings = stored_embeddings[order] if len(stored_embeddings) else _EMPTY_MATRIX
+        per_list.append((docs, embeddings))
+    return per_list
+
+
+def _documents_from_columns(ids: Sequence, contents: Sequence, metadatas: Sequence) -> List[Document]:
+    return [
+        Document(id=doc_id, page_content=content or "", metadata=metadata or {})
+        for doc_id, content, metadata in zip(ids, contents, metadatas)
+    ]
+
+
+def _rank_by_cosine(
+    query_vector: np.ndarray,
+    candidates: List[Document],
+    embeddings: np.ndarray,
+) -> List[Document]:
+    """
+    Single matrix-vector pass over the stored candidate embeddings.
+    """
+    if embeddings.shape[0] != len(candidates):
+        raise ValueError("Candidate embeddings are missing or misaligned")
+    query_norm = np.linalg.norm(query_vector) or 1.0
+    row_norms = np.linalg.norm(embeddings, axis=1)
+    row_norms[row_norms == 0] = 1.0
+    similarities = (embeddings @ query_vector) / (row_norms * query_norm)
+    order = np.argsort(-similarities, kind="stable")
+    return [candidates[idx] for idx in order]
+
+
+def _candidate_key(doc: Document):
+    # Content + metadata rather than ids: LangChain retrievers do not always
+    # populate Document.id, while index hits always do.
+    return (getattr(doc, "page_content", None), str(getattr(doc, "metadata", {})))
+
+
+def _merge_candidates(
+    *ranked_lists: Tuple[List[Document], np.ndarray],
+) -> Tuple[List[Document], np.ndarray]:
+    """
+    Order-preserving union of candidate lists. Embedding rows follow their
+    documents; if any list lacks embeddings the returned matrix is empty.
+    """
+    seen = set()
+    merged: List[Document] = []
+    rows: List[np.ndarray] = []
+    has_embeddings = True
+    for docs, embeddings in ranked_lists:
+        list_has_embeddings = embeddings.shape[0] == len(docs)
+        has_embeddings = has_embeddings and (list_has_embeddings or not docs)
+        for idx, doc in enumerate(docs):
+            key = _candidate_key(doc)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(doc)
+            if list_has_embeddings:
+                rows.append(embeddings[idx])
+
+    if not has_embeddings or not rows:
+        return merged, _EMPTY_MATRIX
+    return merged, np.vstack(rows)
+
+
+def _dedupe_documents(ranked_lists: Sequence[List[Document]]) -> List[Document]:
+    seen = set()
+    unique_docs = []
+    for ranked in ranked_lists:
+        for doc in ranked:
+            key = _candidate_key(doc)
+            if key in seen:
+                continue
+            seen.add(key)
+            unique_docs.append(doc)
+    return unique_docs
@@ -0,0 +1,122 @@
+import copy
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def source_key(doc: Any) -> str:
+    """
+    Stable identity of a retrieved chunk: its vector-store id where set,
+    else its source document id plus section.
+    """
+    doc_id = getattr(doc, "id", None)
+    if doc_id:
+        return str(doc_id)
+    metadata = getattr(doc, "metadata", None) or {}
+    return f"{metadata.get('doc_id') or metadata.get('tid') or metadata.get('title')}#{metadata.get('section', '')}"
+
+
+class SemanticAnswerCache:
+    """
+    In-process cache of research answers for paraphrased questions.
+
+    A cached answer is reused when the new query's embedding is within
+    `threshold` cosine similarity of the cached query's AND retrieval
+    returned exactly the same sources, so the answer was grounded in the
+    same context. Entries are scoped to a (collection, corpus version):
+    any corpus write makes older answers unreachable.
+    """
+
+    def __init__(self, threshold: float = 0.88, max_entries: int = 512, ttl_seconds: float = 3600, enabled: bool = True):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._scope: Optional[tuple] = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._entries: List[Dict[str, Any]] = []
+        self.hits = 0
+        self.misses = 0
+
+    def _reset(self, scope: tuple) -> None:
+        self._scope = scope
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._entries = []
+
+    def lookup(
+        self, query_vector: np.ndarray, sources: Iterable[str], collection_name: str, corpus_version: int
+    ) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        wanted: FrozenSet[str] = frozenset(sources)
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        now = time.monotonic()
+        with self._lock:
+            if self._scope != (collection_name, corpus_version) or not self._entries:
+                self.misses += 1
+                return None
+            similarities = self._vectors @ query
+            for idx in np.argsort(-similarities, kind="stable"):
+                if similarities[idx] < self.threshold:
+                    break
+                entry = self._entries[idx]
+                if entry["sources"] == wanted and entry["expires_at"] > now:
+                    self.hits += 1
+                    return copy.deepcopy(entry["answer"])
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        query_vector: np.ndarray,
+        sources: Iterable[str],
+        answer: Dict[str, Any],
+        collection_name: str,
+        corpus_version: int,
+    ) -> None:
+        if not self.enabled:
+            return
+        vector = np.asarray(query_vector, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        now = time.monotonic()
+        with self._lock:
+            if self._scope != (collection_name, corpus_version):
+                self._reset((collection_name, corpus_version))
+            keep = [idx for idx, entry in enumerate(self._entries) if entry["expires_at"] > now]
+            keep = keep[-(self.max_entries - 1):] if self.max_entries > 1 else []
+            self._entries = [self._entries[idx] for idx in keep]
+            self._entries.append(
+                {"sources": frozenset(sources), "answer": copy.deepcopy(answer), "expires_at": now + self.ttl_seconds}
+            )
+            previous = self._vectors[keep] if len(keep) else np.zeros((0, len(vector)), dtype=np.float32)
+            self._vectors = np.vstack([previous, vector[np.newaxis, :]])
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scope = None
+            self._vectors = np.zeros((0, 0), dtype=np.float32)
+            self._entries = []
+
+
+semantic_answer_cache = SemanticAnswerCache(
+    threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+    enabled=settings.SEMANTIC_CACHE_ENABLED,
+)
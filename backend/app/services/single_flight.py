@@ -0,0 +1,68 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: while a call for `key` is in
+    flight, later callers await the same task instead of starting another,
+    and all of them get its result (or exception). Results are shared, so
+    callers must not mutate them.
+
+    The call runs in its own task. A cancelled caller stops waiting without
+    cancelling it for the others; the call is cancelled only when its last
+    caller goes away.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        # A flight left over from a closed event loop cannot be awaited here.
+        if flight is None or flight.task.get_loop() is not loop:
+            flight = _Flight(loop.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task: self._forget(key, flight))
+        else:
+            self.shared += 1
+        self.calls += 1
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Later callers must start a fresh call, not join this one.
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._flights),
+            "dedupe_rate": round(self.shared / self.calls, 4) if self.calls else 0.0,
+        }
+
+
+llm_single_flight = SingleFlight("llm")
+retrieval_single_flight = SingleFlight("retrieval")
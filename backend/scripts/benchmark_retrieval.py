@@ -0,0 +1,249 @@
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure backend root is in path
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# Explicitly load .env from the backend directory before importing app modules
+try:
+    from dotenv import load_dotenv
+    load_dotenv(BACKEND_DIR / ".env")
+except ImportError:
+    pass
+
+from app.db.local_vector_store import LocalCollection  # noqa: E402
+
+PAGE_SIZE = 5000
+
+
+def load_retrieval_queries(path: str) -> list[str]:
+    queries = []
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("task_type") == "retrieval" and record.get("query_or_prompt"):
+                queries.append(record["query_or_prompt"])
+    return queries
+
+
+def load_collection_vectors(persist_directory: str, collection_name: str) -> np.ndarray:
+    """
+    Pages every stored embedding out of the configured vector store.
+    """
+    from app.agents.legal_research.retrievers import get_persistent_vectorstore
+
+    collection = get_persistent_vectorstore(
+        persist_directory=persist_directory, collection_name=collection_name
+    )._collection
+    pages = []
+    offset = 0
+    while True:
+        page = collection.get(limit=PAGE_SIZE, offset=offset, include=["embeddings"])
+        embeddings = page.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            break
+        pages.append(np.asarray(embeddings, dtype=np.float32))
+        offset += len(embeddings)
+    if not pages:
+        raise SystemExit(f"Collection {collection_name!r} has no stored embeddings")
+    return np.vstack(pages)
+
+
+def synthetic_vectors(n_rows: int, dim: int, seed: int) -> np.ndarray:
+    # Clustered data; uniform random vectors make every ANN index look bad.
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, n_rows // 200), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=n_rows)
+    return centers[labels] + 0.35 * rng.normal(size=(n_rows, dim)).astype(np.float32)
+
+
+def timed_query(collection: LocalCollection, queries: np.ndarray, k: int, **kwargs) -> tuple[list[list[str]], np.ndarray]:
+    ids, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        result = collection.query([query.tolist()], n_results=k, include=[], **kwargs)
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        ids.append(result["ids"][0])
+    return ids, np.asarray(latencies)
+
+
+def recall_at_k(exact: list[list[str]], approximate: list[list[str]]) -> float:
+    scores = [len(set(truth) & set(found)) / len(truth) for truth, found in zip(exact, approximate) if truth]
+    return float(np.mean(scores)) if scores else 0.0
+
+
+# Quantized first-stage codes must keep MRR within this relative margin of
+# float32 ("none") before they are enabled.
+MRR_TOLERANCE = 0.01
+
+
+def evaluate_mrr(records_path: str, modes: list[str], rerank: bool = False) -> None:
+    """
+    Runs the evaluation harness's retrieval records through the live
+    retrieval pipeline once per quantization mode (and, with `rerank`, once
+    more with the cross-encoder stage) and prints MRR and latency, plus each
+    mode's MRR change against float32 and whether it is within
+    MRR_TOLERANCE. With `rerank`, a summary of the cross-encoder's MRR gain
+    and latency cost per mode follows the table. Needs
+    VECTOR_STORE_BACKEND=local.
+    """
+    from app.core.config import settings
+    from app.services.cross_encoder_reranker import CrossEncoderReranker
+    from app.services.retrieval_cache import LocalLRUCache, RetrievalCache
+    from app.services.retrieval_service import RetrievalService
+    from evaluation.metrics import compute_retrieval_metrics
+    from evaluation.reporting import load_records
+    from evaluation.runner import LiveBenchmarkRunner
+
+    if settings.VECTOR_STORE_BACKEND != "local":
+        raise SystemExit("--eval-mrr compares local engine quantization modes; set VECTOR_STORE_BACKEND=local")
+
+    records = [record for record in load_records(records_path) if record.task_type == "retrieval"]
+    runner = LiveBenchmarkRunner()
+    print("| quantization | cross-encoder | MRR | vs float32 | mean ms | p95 ms |")
+    print("|---|---|---|---|---|---|")
+    baseline = {}
+    runs = {}
+    for mode in modes:
+        settings.VECTOR_QUANTIZATION = mode
+        for enabled in ([False, True] if rerank else [False]):
+            reranker = CrossEncoderReranker(
+                model_name=settings.RERANKER_MODEL_NAME,
+                enabled=enabled,
+                candidates=settings.RERANKER_CANDIDATES,
+                batch_size=settings.RERANKER_BATCH_SIZE,
+                max_length=settings.RERANKER_MAX_LENGTH,
+                time_budget_ms=settings.RERANKER_TIME_BUDGET_MS,
+            )
+            if enabled:
+                reranker.get_model()  # Keep the one-off load out of the latencies.
+            runner.retrieval_service = RetrievalService(
+                cache=RetrievalCache(LocalLRUCache(), enabled=False), reranker=reranker
+            )
+            executed = [asyncio.run(runner.run_retrieval(record.model_copy(deep=True))) for record in records]
+            metrics = compute_retrieval_metrics(executed)
+            latencies = [record.latency_ms for record in executed]
+            mrr = metrics.get("mrr", 0.0)
+            runs[mode, enabled] = (mrr, float(np.mean(latencies)), float(np.percentile(latencies, 95)))
+            if mode == "none":
+                baseline[enabled] = mrr
+            if enabled in baseline and baseline[enabled]:
+                change = (mrr - baseline[enabled]) / baseline[enabled]
+                verdict = "ok" if change >= -MRR_TOLERANCE else f"FAIL (>{MRR_TOLERANCE:.0%} drop)"
+                versus = f"{change:+.2%} {verdict}"
+            else:
+                versus = "n/a"
+            print(
+                f"| {mode} | {'on' if enabled else 'off'} | {mrr:.4f} | {versus} "
+                f"| {np.mean(latencies):.1f} | {np.percentile(latencies, 95):.1f} |"
+            )
+    for mode in modes if rerank else []:
+        (mrr_off, mean_off, p95_off), (mrr_on, mean_on, p95_on) = runs[mode, False], runs[mode, True]
+        print(
+            f"Cross-encoder on {mode}: MRR {mrr_on - mrr_off:+.4f}, "
+            f"mean latency {mean_on - mean_off:+.1f} ms, p95 latency {p95_on - p95_off:+.1f} ms"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Recall@k vs latency of the local engine's IVF index and quantized codes against exact search."
+    )
+    parser.add_argument(
+        "--records",
+        default=str(BACKEND_DIR / "evaluation" / "eval_records_v500.jsonl"),
+        help="Evaluation JSONL; its retrieval records are used as queries.",
+    )
+    parser.add_argument("--persist-directory", default="chroma_db")
+    parser.add_argument("--collection", default="legal_judgments")
+    parser.add_argument("--synthetic-rows", type=int, default=0, help="Benchmark a synthetic corpus of this size instead.")
+    parser.add_argument("--synthetic-queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (0 = ~4*sqrt(rows)).")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32", help="Comma-separated nprobe values to sweep.")
+    parser.add_argument("--quantization", default="none,int8,binary", help="Comma-separated quantization modes to compare.")
+    parser.add_argument(
+        "--eval-mrr",
+        action="store_true",
+        help="Also report end-to-end MRR of the evaluation retrieval records per quantization mode.",
+    )
+    parser.add_argument(
+        "--rerank",
+        action="store_true",
+        help="With --eval-mrr, also run every mode with the cross-encoder rerank stage enabled.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    modes = [mode.strip() for mode in args.quantization.split(",") if mode.strip()]
+
+    if args.eval_mrr:
+        evaluate_mrr(args.records, modes, rerank=args.rerank)
+        return 0
+
+    if args.synthetic_rows:
+        vectors = synthetic_vectors(args.synthetic_rows, args.dim, args.seed)
+        rng = np.random.default_rng(args.seed + 1)
+        sample = rng.choice(len(vectors), size=min(args.synthetic_queries, len(vectors)), replace=False)
+        queries = vectors[sample] + 0.1 * rng.normal(size=(len(sample), args.dim)).astype(np.float32)
+        source = f"synthetic ({args.synthetic_rows} rows)"
+    else:
+        from app.services.embedding_registry import get_embedding_model
+
+        vectors = load_collection_vectors(args.persist_directory, args.collection)
+        texts = load_retrieval_queries(args.records)
+        queries = np.asarray(get_embedding_model().embed_documents(texts), dtype=np.float32)
+        source = f"{args.collection} ({len(vectors)} rows), {len(texts)} queries from {Path(args.records).name}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collection = LocalCollection(tmp, name="benchmark")
+        for start in range(0, len(vectors), PAGE_SIZE):
+            block = vectors[start:start + PAGE_SIZE]
+            collection.add(
+                ids=[str(row) for row in range(start, start + len(block))],
+                embeddings=block,
+                documents=[""] * len(block),
+            )
+        build_start = time.perf_counter()
+        stats = collection.build_ann_index(nlist=args.nlist or None)
+        build_seconds = time.perf_counter() - build_start
+
+        exact_ids, exact_latency = timed_query(collection, queries, args.k, exact=True)
+        print(f"Source: {source}")
+        print(f"IVF: {stats['nlist']} lists, trained in {build_seconds:.2f}s, k={args.k}\n")
+        print("| search | quantization | in-RAM MB | recall@k | mean ms | p95 ms |")
+        print("|---|---|---|---|---|---|")
+        for mode in modes:
+            # Codes for the float rows on disk are encoded on load.
+            variant = LocalCollection(tmp, index_type="ivf", quantization=mode)
+            memory = variant.memory_stats()
+            ram_mb = (memory["code_bytes"] or memory["float_vector_bytes"]) / 2**20
+            runs = [("exact" if mode == "none" else "flat", {"exact": True})]
+            runs += [(f"ivf nprobe={nprobe}", {"nprobe": nprobe}) for nprobe in
+                     (int(value) for value in args.nprobe.split(",") if value.strip())]
+            for label, options in runs:
+                found, latency = (
+                    (exact_ids, exact_latency) if mode == "none" and options.get("exact")
+                    else timed_query(variant, queries, args.k, **options)
+                )
+                print(
+                    f"| {label} | {mode} | {ram_mb:.1f} | {recall_at_k(exact_ids, found):.4f} "
+                    f"| {latency.mean():.2f} | {np.percentile(latency, 95):.2f} |"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
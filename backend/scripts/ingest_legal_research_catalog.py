@@ -18,6 +18,7 @@ from app.agents.legal_research.document_store import DocumentStore
 from app.integrations.indiankanoon.client import IndianKanoonClient
 from app.integrations.indiankanoon.query_builder import IndianKanoonQueryBuilder
 from app.services.legal_corpus_catalog import (
+    catalog_chunk_metadata,
     get_legal_research_act_catalog,
     match_catalog_entries,
     normalize_legal_title,
@@ -77,7 +78,14 @@ class LegalCorpusIngestor:
             header += f"\nSection {section}"
         return f"{header}\n\n{clean_content}".strip()
 
-    def chunk_by_sections(self, content: str, act_name: str, doc_type: str = "statute", jurisdiction: str = "India") -> List[Dict[str, Any]]:
+    def chunk_by_sections(
+        self,
+        content: str,
+        act_name: str,
+        doc_type: str = "statute",
+        jurisdiction: str = "India",
+        priority: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
         sections: List[Dict[str, Any]] = []
 
         if 'class="akn-section"' in content:
@@ -180,6 +188,8 @@ class LegalCorpusIngestor:
         for sec in sections:
             sec["metadata"]["doc_type"] = doc_type
             sec["metadata"]["jurisdiction"] = jurisdiction
+            if priority:
+                sec["metadata"]["priority"] = priority
             if "act_name" not in sec["metadata"]:
                 sec["metadata"]["act_name"] = act_name
 
@@ -246,12 +256,7 @@ class LegalCorpusIngestor:
             logger.warning(f"No content returned for {act_display_name}")
             return
 
-        chunks = self.chunk_by_sections(
-            content,
-            act_display_name,
-            doc_type=act.get("doc_type", "statute"),
-            jurisdiction=act.get("jurisdiction", "India"),
-        )
+        chunks = self.chunk_by_sections(content, act_display_name, **catalog_chunk_metadata(act))
         logger.info(f"Split into {len(chunks)} sections.")
         if chunks:
             for chunk in chunks:
@@ -320,11 +325,21 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Print the curated ingestion list without making Indian Kanoon requests.",
     )
+    parser.add_argument(
+        "--rebuild-sparse-index",
+        action="store_true",
+        help="Rebuild the on-disk BM25 and act/section indexes from the existing collection and exit.",
+    )
     return parser.parse_args()
 
 
 async def main() -> None:
     args = parse_args()
+    if args.rebuild_sparse_index:
+        count = DocumentStore().rebuild_sparse_index()
+        logger.info(f"Rebuilt BM25 and section indexes over {count} chunks.")
+        return
+
     acts = get_legal_research_act_catalog()
     if args.only:
         requested_names = [item.strip() for item in args.only.split(",") if item.strip()]
@@ -346,6 +361,7 @@ async def main() -> None:
         except Exception as exc:
             logger.error(f"Failed {act['name']}: {exc}")
         await asyncio.sleep(3)
+    ingestor.store.compact_indexes()
 
 
 if __name__ == "__main__":
@@ -155,6 +155,7 @@ async def main():
     for act in acts:
         await ingestor.ingest_act(act["name"], act["tid"])
         await asyncio.sleep(3)
+    ingestor.store.compact_indexes()
 
 if __name__ == "__main__":
     asyncio.run(run_curated_ingestion())
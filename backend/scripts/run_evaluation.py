@@ -24,6 +24,9 @@ from evaluation.reporting import (  # noqa: E402
     load_records,
 )
 from evaluation.runner import LiveBenchmarkRunner # noqa: E402
+from app.agents.document_generator.llm_client import llm_client  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.services.llm_scheduler import llm_priority  # noqa: E402
 
 
 async def main() -> int:
@@ -60,7 +63,12 @@ async def main() -> int:
     if args.execute:
         print(">>> Starting Live Execution Benchmarking...")
         runner = LiveBenchmarkRunner()
-        records = await runner.execute_all(records)
+        # Benchmark traffic must not starve users sharing the Groq keys. The
+        # API server's scheduler cannot see this process, so its lanes do
+        # not help; cap this process's share of each key outright.
+        llm_client.groq_scheduler.cap_share(settings.GROQ_BACKGROUND_PROCESS_SHARE)
+        with llm_priority("background"):
+            records = await runner.execute_all(records)
         
         if args.save_results:
             save_path = Path(args.save_results)
@@ -0,0 +1,33 @@
+from app.services.context_packer import ContextPacker
+
+
+class _WordEncoding:
+    def encode(self, text):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def test_trim_to_sentences_never_cuts_mid_sentence():
+    packer = ContextPacker(encoding=_WordEncoding())
+    text = "The landlord may recover possession. The tenant must pay arrears within a month. Costs follow."
+
+    assert packer.trim_to_sentences(text, max_tokens=12) == "The landlord may recover possession."
+    assert packer.trim_to_sentences("one two three four five", max_tokens=3) == "one two"
+
+
+def test_pack_drops_overlapping_chunks_and_respects_budget():
+    packer = ContextPacker(encoding=_WordEncoding())
+    body = "the tenant shall pay the agreed rent on or before the fifth day of every month"
+    texts = [
+        body + ".",
+        body + " and on default the landlord may sue.",
+        "A notice to quit must be served in writing.",
+        " ".join(["filler"] * 200) + ".",
+    ]
+
+    packed = packer.pack(texts, budget=60, max_tokens_per_passage=100, overhead_tokens=5)
+
+    assert [idx for idx, _text in packed] == [0, 2]
+    assert sum(len(text.split()) + 5 for _idx, text in packed) <= 60
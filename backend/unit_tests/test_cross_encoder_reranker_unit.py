@@ -0,0 +1,45 @@
+from langchain_core.documents import Document
+
+from app.services.cross_encoder_reranker import CrossEncoderReranker
+
+
+class _FakeCrossEncoder:
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs):
+        self.pairs.extend(pairs)
+        # Longer chunks score higher.
+        return [float(len(text)) for _query, text in pairs]
+
+
+def _reranker(model, **kwargs):
+    return CrossEncoderReranker(enabled=True, batch_size=2, model_factory=lambda *args: model, **kwargs)
+
+
+def _docs():
+    return [Document(id=f"c{i}", page_content="x" * length) for i, length in enumerate([1, 3, 2])]
+
+
+def test_rerank_orders_by_score_and_caches_pair_scores():
+    model = _FakeCrossEncoder()
+    reranker = _reranker(model)
+
+    first = reranker.rerank_batch(["eviction grounds"], [_docs()], k=2)
+    second = reranker.rerank_batch(["Eviction  grounds"], [_docs()], k=2)
+
+    assert [doc.id for doc in first[0]] == ["c1", "c2"]
+    assert [doc.id for doc in second[0]] == ["c1", "c2"]
+    assert len(model.pairs) == 3
+    assert reranker.stats()["cache_hits"] == 3
+
+
+def test_exhausted_time_budget_keeps_fused_order():
+    model = _FakeCrossEncoder()
+    reranker = _reranker(model, time_budget_ms=0)
+
+    ranked = reranker.rerank_batch(["eviction grounds"], [_docs()], k=2)
+
+    assert [doc.id for doc in ranked[0]] == ["c0", "c1"]
+    assert model.pairs == []
+    assert reranker.stats()["budget_fallbacks"] == 1
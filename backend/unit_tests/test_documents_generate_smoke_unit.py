@@ -98,6 +98,7 @@ def _load_documents_endpoint_module():
         return "stub"
 
     assembly_mod.assembly_engine = SimpleNamespace(assemble_document=_assemble_document)
+    assembly_mod.SectionGenerationError = type("SectionGenerationError", (RuntimeError,), {})
     ghost_typing_mod.ghost_typing_engine = SimpleNamespace(suggest_next_sentence=_suggest_next_sentence)
     agentic_policy_mod.should_escalate_agentic = lambda **kwargs: {"escalate": False, "reasons": [], "step_budget": 1}
     legal_validation_mod.build_clause_traceability = lambda content, sources: [{"clause_id": "C1", "text": content}]
@@ -203,10 +204,13 @@ def test_generate_document_returns_retrieval_sources_when_context_available():
         return "generated-body"
 
     module.assembly_engine.assemble_document = _assemble_document
-    module._fetch_grounded_legal_context = lambda query, strategy="dense", k=5: (
-        "Context block",
-        [{"title": "Case A", "source": "SCC", "url": "https://example.test", "id": "1"}],
-    )
+    async def _fetch_grounded_legal_context(query, strategy="dense", k=5):
+        return (
+            "Context block",
+            [{"title": "Case A", "source": "SCC", "url": "https://example.test", "id": "1"}],
+        )
+
+    module._fetch_grounded_legal_context = _fetch_grounded_legal_context
 
     result = asyncio.run(
         module.generate_document(
@@ -231,10 +235,10 @@ def test_generate_document_returns_empty_retrieval_sources_when_query_empty():
         return "generated-body"
 
     module.assembly_engine.assemble_document = _assemble_document
-    module._fetch_grounded_legal_context = lambda query, strategy="dense", k=5: (
-        "Context block should be ignored",
-        [{"title": "Case A"}],
-    )
+    async def _fetch_grounded_legal_context(query, strategy="dense", k=5):
+        return "Context block should be ignored", [{"title": "Case A"}]
+
+    module._fetch_grounded_legal_context = _fetch_grounded_legal_context
 
     result = asyncio.run(
         module.generate_document(
@@ -0,0 +1,64 @@
+import numpy as np
+
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class _CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_cached_embeddings_only_embed_unseen_texts(tmp_path):
+    base = _CountingEmbeddings()
+    embeddings = CachedEmbeddings(base, EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2"))
+
+    first = embeddings.embed_documents(["NI Act", "Limitation Act, 1963"])
+    second = embeddings.embed_documents(["Limitation Act, 1963", "Rent Act", "NI Act"])
+    query = embeddings.embed_query("Rent Act")
+
+    # Query embeddings are cached apart from document embeddings.
+    assert base.calls == [["NI Act", "Limitation Act, 1963"], ["Rent Act"], ["Rent Act"]]
+    assert second == [first[1], [8.0, 1.0, 0.5], first[0]]
+    assert query == [8.0, 1.0, 0.5]
+    assert embeddings.embed_query("Rent Act") == query
+    assert len(base.calls) == 3
+
+
+def test_cache_is_shared_through_the_files_on_disk(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2")
+    reader = EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2")
+
+    writer.put_many(["a"], [[1.0, 2.0]])
+    assert reader.get_many(["a", "b"])[1] is None
+    writer.put_many(["b"], [[3.0, 4.0]])
+
+    vectors = reader.get_many(["a", "b"])
+
+    assert np.allclose(vectors[0], [1.0, 2.0])
+    assert np.allclose(vectors[1], [3.0, 4.0])
+    assert EmbeddingCache(str(tmp_path), "other-model").get_many(["a"]) == [None]
+
+
+def test_cache_evicts_least_recently_used_entries_past_its_bound(tmp_path):
+    writer = EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2", max_entries=4)
+    reader = EmbeddingCache(str(tmp_path), "all-MiniLM-L6-v2", max_entries=4)
+    writer.put_many(["a", "b", "c", "d"], [[1.0, 0.0], [2.0, 0.0], [3.0, 0.0], [4.0, 0.0]])
+    # The reader maps the pre-eviction file and must remap after it.
+    assert np.allclose(reader.get_many(["d"])[0], [4.0, 0.0])
+    writer.get_many(["a"])
+
+    writer.put_many(["e"], [[5.0, 0.0]])
+
+    assert len(writer) == 3
+    assert writer.stats()["evictions"] == 2
+    # "a" was read since, "e" is new, and "d" is the newest of the rest.
+    assert [vector is not None for vector in reader.get_many(["a", "b", "c", "d", "e"])] == [True, False, False, True, True]
+    assert np.allclose(reader.get_many(["e"])[0], [5.0, 0.0])
+    assert np.allclose(writer.get_many(["a"])[0], [1.0, 0.0])
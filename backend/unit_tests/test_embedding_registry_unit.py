@@ -0,0 +1,44 @@
+import threading
+
+from app.services.embedding_registry import EmbeddingModelRegistry
+
+
+class _FakeEmbeddings:
+    def __init__(self, model_name, device):
+        self.model_name = model_name
+        self.device = device
+        self.queries = []
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [0.0, 1.0]
+
+
+def test_registry_loads_each_model_once_across_threads():
+    calls = []
+
+    def factory(model_name, device):
+        calls.append((model_name, device))
+        return _FakeEmbeddings(model_name, device)
+
+    registry = EmbeddingModelRegistry(default_model_name="mini", default_device="cpu", factory=factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [("mini", "cpu")]
+    assert all(result is results[0] for result in results)
+    assert registry.get("other") is not results[0]
+
+
+def test_warmup_runs_forward_pass_and_reports_usage():
+    registry = EmbeddingModelRegistry(factory=_FakeEmbeddings)
+
+    usage = registry.warmup()
+
+    assert registry.get().queries == ["warmup"]
+    assert usage["loaded_models"] == 1
+    assert usage["models"][0]["model_name"] == "all-MiniLM-L6-v2"
@@ -0,0 +1,118 @@
+import importlib.util
+import random
+import time
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+
+_FUSION_PATH = Path(__file__).resolve().parents[1] / "app" / "agents" / "legal_research" / "fusion.py"
+_SPEC = importlib.util.spec_from_file_location("fusion_under_test", _FUSION_PATH)
+_MODULE = importlib.util.module_from_spec(_SPEC)
+assert _SPEC and _SPEC.loader
+_SPEC.loader.exec_module(_MODULE)
+
+
+def test_weighted_rrf_prefers_candidates_ranked_by_both_lists():
+    keys, scores = _MODULE.fuse_ranked_keys(
+        {"dense": ["a", "b", "c"], "sparse": ["c", "d", "a"]},
+        {"dense": 0.4, "sparse": 0.6},
+        rrf_k=60,
+    )
+
+    assert keys[:2] == ["c", "a"]
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_compute_boosts_applies_jurisdiction_and_recency():
+    boosts = _MODULE.compute_boosts(
+        [
+            {"jurisdiction": "India", "publication_date": "2026-09-01"},
+            {"jurisdiction": "Maharashtra", "publication_date": "2019-01-01"},
+        ],
+        {"jurisdiction": "India", "jurisdiction_boost": 1.5, "recency_days": 365, "recency_boost": 1.2},
+        today=date(2026, 10, 1),
+    )
+
+    assert round(float(boosts[0]), 2) == 1.8
+    assert float(boosts[1]) == 1.0
+
+
+def test_compute_boosts_reads_the_ingestion_date_ordinal():
+    boosts = _MODULE.compute_boosts(
+        [{"jurisdiction": "india", "date_ordinal": 20260901}, {"judgment_date": "not a date"}, {}],
+        {"jurisdiction": "India", "jurisdiction_boost": 1.5, "recency_days": 365, "recency_boost": 1.2},
+        today=date(2026, 10, 1),
+    )
+
+    assert [round(float(boost), 2) for boost in boosts] == [1.8, 1.0, 1.0]
+
+
+def test_fusion_benchmark_adds_under_one_millisecond_at_k40():
+    rng = random.Random(7)
+    pool = [f"chunk-{i}" for i in range(120)]
+    ranked = {name: rng.sample(pool, 40) for name in ("dense", "sparse", "exact")}
+    weights = {"dense": 0.4, "sparse": 0.6, "exact": 1.0}
+
+    for _ in range(20):
+        _MODULE.fuse_ranked_keys(ranked, weights)
+
+    runs = 500
+    started = time.perf_counter()
+    for _ in range(runs):
+        _MODULE.fuse_ranked_keys(ranked, weights)
+    per_query_ms = (time.perf_counter() - started) * 1000 / runs
+
+    assert per_query_ms < 1.0
+
+
+def test_fuse_documents_benchmark_with_boosts_adds_under_one_millisecond_at_k40():
+    rng = random.Random(7)
+    docs = []
+    for i in range(120):
+        doc_type = rng.choice(["statute", "rule", "judgment"])
+        metadata = {
+            "act_name": f"Act {i % 9}",
+            "section": str(i),
+            "doc_type": doc_type,
+            "jurisdiction": rng.choice(["India", "Maharashtra"]),
+            "source": "IndianKanoon",
+            "title": f"Title {i}",
+        }
+        if doc_type == "judgment":
+            metadata["judgment_date"] = f"20{rng.randint(10, 26)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}"
+            # Chunks ingested before the metadata index carry no ordinal.
+            if i % 2:
+                metadata["date_ordinal"] = int(metadata["judgment_date"].replace("-", ""))
+        docs.append(SimpleNamespace(page_content=f"chunk {i}", metadata=metadata))
+    ranked = {name: rng.sample(docs, 40) for name in ("dense", "sparse", "exact")}
+    config = {
+        "keyword_weight": 0.6,
+        "semantic_weight": 0.4,
+        "rrf_k": 60,
+        "boost_factors": {"jurisdiction": "India", "jurisdiction_boost": 1.5, "recency_days": 365, "recency_boost": 1.2},
+    }
+
+    def fuse():
+        return _MODULE.fuse_documents(ranked, config, key_fn=lambda doc: doc.page_content, k=40)
+
+    for _ in range(20):
+        fuse()
+
+    runs = 500
+    started = time.perf_counter()
+    for _ in range(runs):
+        fuse()
+    per_query_ms = (time.perf_counter() - started) * 1000 / runs
+
+    assert len(fuse()) == 40
+    assert per_query_ms < 1.0
+
+
+def test_pinned_exact_matches_rank_first():
+    keys, _scores = _MODULE.fuse_ranked_keys(
+        {"dense": ["a", "b"], "sparse": ["a", "b"], "exact": ["c"]},
+        {"dense": 0.4, "sparse": 0.6, "exact": 0.1},
+        pinned=("exact",),
+    )
+
+    assert keys == ["c", "a", "b"]
@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.db.local_vector_store import LocalCollection
+
+
+def _clustered_corpus(n_rows=800, dim=16, seed=5):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim)).astype(np.float32)
+    return centers[rng.integers(0, 8, size=n_rows)] + 0.3 * rng.standard_normal((n_rows, dim)).astype(np.float32)
+
+
+def _ivf_collection(path, vectors):
+    collection = LocalCollection(path, name="legal", index_type="ivf", nlist=8, nprobe=2)
+    collection.add(ids=[f"c{i}" for i in range(len(vectors))], embeddings=vectors)
+    return collection
+
+
+def test_ivf_trains_automatically_and_full_probe_matches_exact(tmp_path):
+    vectors = _clustered_corpus()
+    collection = _ivf_collection(str(tmp_path / "local_legal"), vectors)
+    queries = _clustered_corpus(n_rows=5, seed=9)
+
+    assert collection.ann_stats()["trained"] is True
+    exact = collection.query(queries, n_results=10, include=[], exact=True)
+    full_probe = collection.query(queries, n_results=10, include=[], nprobe=8)
+    assert full_probe["ids"] == exact["ids"]
+
+
+def test_incremental_inserts_are_indexed_and_survive_reload(tmp_path):
+    path = str(tmp_path / "local_legal")
+    vectors = _clustered_corpus()
+    collection = _ivf_collection(path, vectors)
+    new_vector = vectors[3] * 1.01
+    collection.add(ids=["new"], embeddings=[new_vector])
+
+    reader = LocalCollection(path, index_type="ivf")
+    result = reader.query([new_vector], n_results=2, include=[], nprobe=1)
+
+    assert reader.ann_stats()["rows"] == len(vectors) + 1
+    assert "new" in result["ids"][0]
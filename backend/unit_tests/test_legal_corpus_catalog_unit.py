@@ -1,4 +1,10 @@
-from app.services.legal_corpus_catalog import match_catalog_entries, normalize_legal_title
+from app.services.legal_corpus_catalog import (
+    ActMatcher,
+    match_act_in_text,
+    match_acts_in_text,
+    match_catalog_entries,
+    normalize_legal_title,
+)
 
 
 def test_normalize_legal_title_handles_spacing_and_punctuation():
@@ -24,3 +30,54 @@ def test_match_catalog_entries_resolves_aliases_and_typos():
     assert "Bombay High Court (Original Side) Rules" in selected_names
     assert "Industrial Disputes Act, 1947" in selected_names
     assert unresolved == []
+
+
+def test_match_acts_in_text_returns_every_act_with_spans():
+    query = "Is Section 138 NI Act read with the Code of Civil Procedure?"
+    normalized = normalize_legal_title(query)
+
+    matches = match_acts_in_text(query)
+
+    assert [(match.entry["name"], normalized[match.start:match.end]) for match in matches] == [
+        ("Negotiable Instruments Act, 1881", "ni act"),
+        ("Code of Civil Procedure, 1908", "code of civil procedure"),
+    ]
+    # The longest match, which is also the first act in catalog order.
+    assert match_act_in_text(query)["name"] == "Code of Civil Procedure, 1908"
+
+
+def test_act_matcher_only_matches_whole_words_and_overlapping_aliases():
+    matcher = ActMatcher(
+        [
+            {"name": "Rent Act", "aliases": ["rent control act"]},
+            {"name": "Control Act", "aliases": []},
+        ]
+    )
+
+    assert matcher.find_all("torrent act") == []
+    assert [match.alias for match in matcher.find_all("the rent control act")] == ["rent control act", "control act"]
+
+
+def _per_act_scan(entries, text):
+    # The pre-automaton matcher: first catalog entry with an alias in the text.
+    normalized = normalize_legal_title(text)
+    for entry in entries:
+        if any(normalize_legal_title(alias) in normalized for alias in [entry["name"], *entry.get("aliases", [])]):
+            return entry
+    return None
+
+
+def test_act_matcher_resolves_colliding_aliases_like_the_per_act_scan():
+    entries = [
+        {"name": "Bombay Rent Act", "aliases": ["rent act"], "priority": "Priority 2"},
+        {"name": "Delhi Rent Act", "aliases": ["rent act"], "priority": "Priority 2"},
+        {"name": "Central Rent Act", "aliases": ["rent act"]},
+    ]
+    matcher = ActMatcher(entries)
+
+    assert matcher.lookup("Rent Act")["name"] == _per_act_scan(entries, "Rent Act")["name"] == "Bombay Rent Act"
+    assert matcher.best_match("eviction under the rent act").entry["name"] == "Bombay Rent Act"
+    # An explicit priority outranks catalog order; a longer match outranks both.
+    prioritized = ActMatcher([*entries, {"name": "Model Rent Act", "aliases": ["rent act"], "priority": "Priority 1"}])
+    assert prioritized.lookup("rent act")["name"] == "Model Rent Act"
+    assert prioritized.best_match("the central rent act applies").entry["name"] == "Central Rent Act"
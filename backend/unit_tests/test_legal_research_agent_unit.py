@@ -1,6 +1,11 @@
+import asyncio
 from types import SimpleNamespace
 
-from app.agents.legal_research.agent import LegalResearchAgent
+from app.agents.legal_research.agent import RERANK_FIELD_WEIGHTS, LegalResearchAgent
+from app.agents.legal_research.content_normalization import (
+    content_fields,
+    doc_search_fields,
+)
 
 
 def test_rerank_docs_prefers_substantive_section_over_preamble():
@@ -25,6 +30,65 @@ def test_rerank_docs_prefers_substantive_section_over_preamble():
     assert ranked[0].metadata["section"] == "16"
 
 
+def test_rerank_scores_stored_search_terms_like_raw_content():
+    agent = LegalResearchAgent()
+    raw = "<p>The tenant in <b>arrears</b> of rent may face eviction.</p>"
+    metadata = {"act_name": "Maharashtra Rent Control Act, 1999", "section": "16"}
+    stored = SimpleNamespace(page_content=raw, metadata={**metadata, **content_fields(raw)})
+    legacy = SimpleNamespace(page_content=raw, metadata=metadata)
+    query_terms = agent._extract_query_terms("eviction for arrears of rent under section 16")
+
+    # Only the token set is stored, not a second copy of the text.
+    assert set(content_fields(raw)) == {"search_terms"}
+    assert agent._score_doc_relevance(query_terms, stored) == agent._score_doc_relevance(query_terms, legacy)
+    assert list(agent._score_docs(query_terms, [stored, legacy])) == [agent._score_doc_relevance(query_terms, legacy)] * 2
+
+
+def test_rerank_matrix_weights_every_field_hit_by_query_term_count():
+    agent = LegalResearchAgent()
+    texts = [
+        "The drawer of a dishonoured cheque is liable under section 138.",
+        "A landlord may recover possession from a tenant in arrears.",
+    ]
+    docs = [
+        SimpleNamespace(
+            page_content=text,
+            metadata={"act_name": "Negotiable Instruments Act", "section": section, "title": "Cheque dishonour", **content_fields(text)},
+        )
+        for text, section in zip(texts, ("138", "16"))
+    ]
+    query_terms = ["cheque", "cheque", "138", "negotiable", "tenant", "probate"]
+
+    expected = []
+    for doc in docs:
+        fields = doc_search_fields(doc)
+        expected.append(sum(
+            term_weight
+            for term in query_terms
+            for term_weight, hit in zip(
+                RERANK_FIELD_WEIGHTS,
+                (term in fields.content_terms, term in fields.act_terms, term in fields.title_terms, term == fields.section),
+            )
+            if hit
+        ))
+
+    assert list(agent._score_docs(query_terms, docs)) == expected
+
+
+def test_rerank_penalizes_short_title_only_as_a_phrase():
+    agent = LegalResearchAgent()
+    metadata = {"act_name": "Negotiable Instruments Act, 1881", "section": "1"}
+    phrase = "<p>1. Short   title, extent and commencement.</p>"
+    apart = "The title passes although the payment fell short."
+    docs = [SimpleNamespace(page_content=text, metadata={**metadata, **content_fields(text)}) for text in (phrase, apart)]
+    query_terms = agent._extract_query_terms("payment of cheque under section 1")
+
+    scores = agent._score_docs(query_terms, docs)
+    unpenalized = agent._score_docs(query_terms, [SimpleNamespace(page_content="", metadata=doc.metadata) for doc in docs])
+
+    assert list(unpenalized - scores) == [4.0, 0.0]
+
+
 def test_build_focus_queries_adds_act_and_section_queries():
     agent = LegalResearchAgent()
 
@@ -35,3 +99,72 @@ def test_build_focus_queries_adds_act_and_section_queries():
     assert "What are the grounds for eviction under Maharashtra Rent Control Act Section 16?" in queries
     assert "Maharashtra Rent Control Act, 1999" in queries
     assert "Maharashtra Rent Control Act, 1999 Section 16" in queries
+
+
+def test_answer_query_reuses_cached_answer_for_paraphrase(monkeypatch):
+    from app.agents.legal_research import agent as agent_module
+    from app.services.semantic_answer_cache import SemanticAnswerCache
+
+    agent = LegalResearchAgent(answer_cache=SemanticAnswerCache(threshold=0.9))
+    doc = SimpleNamespace(
+        id="c16",
+        page_content="The landlord may recover possession where the tenant is in arrears of rent.",
+        metadata={"act_name": "Maharashtra Rent Control Act, 1999", "section": "16"},
+    )
+    vectors = {"grounds for eviction under MRCA": [1.0, 0.0], "Maharashtra rent act eviction grounds": [0.96, 0.05]}
+    calls = []
+
+    async def _retrieve(queries, strategy, k, filters=None):
+        return [doc]
+
+    async def _embed(queries):
+        return [vectors[queries[0]]]
+
+    async def _generate(prompt, caller="default"):
+        calls.append(prompt)
+        return "Section 16 lists the grounds."
+
+    monkeypatch.setattr(agent.retrieval_service, "is_citation_query", lambda query: True)
+    monkeypatch.setattr(agent.retrieval_service, "aretrieve_documents_batch", _retrieve)
+    monkeypatch.setattr(agent.retrieval_service, "aembed_queries", _embed)
+    monkeypatch.setattr(agent.retrieval_service, "corpus_version", lambda: 1)
+    monkeypatch.setattr(agent_module.llm_client, "generate", _generate)
+
+    first = asyncio.run(agent.answer_query("grounds for eviction under MRCA"))
+    second = asyncio.run(agent.answer_query("Maharashtra rent act eviction grounds"))
+
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["answer"] == first["answer"]
+    assert len(calls) == 1
+
+
+def test_stream_answer_sends_sources_before_tokens(monkeypatch):
+    from app.agents.legal_research import agent as agent_module
+    from app.services.semantic_answer_cache import SemanticAnswerCache
+
+    agent = LegalResearchAgent(answer_cache=SemanticAnswerCache(enabled=False))
+    doc = SimpleNamespace(
+        id="c138",
+        page_content="Dishonour of cheque for insufficiency of funds is an offence.",
+        metadata={"act_name": "Negotiable Instruments Act, 1881", "section": "138", "title": "NI Act"},
+    )
+
+    async def _retrieve(queries, strategy, k, filters=None):
+        return [doc]
+
+    async def _stream(prompt, caller="default"):
+        for chunk in ["Section 138 ", "makes it an offence."]:
+            yield chunk
+
+    monkeypatch.setattr(agent.retrieval_service, "is_citation_query", lambda query: True)
+    monkeypatch.setattr(agent.retrieval_service, "aretrieve_documents_batch", _retrieve)
+    monkeypatch.setattr(agent.retrieval_service, "corpus_version", lambda: 1)
+    monkeypatch.setattr(agent_module.llm_client, "generate_stream", _stream)
+
+    async def _collect():
+        return [event async for event in agent.stream_answer("Section 138 NI Act")]
+
+    events = asyncio.run(_collect())
+
+    assert [name for name, _data in events] == ["sources", "token", "token", "done"]
+    assert events[0][1]["sources"][0]["title"] == "NI Act"
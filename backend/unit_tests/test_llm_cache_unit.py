@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.agents.document_generator.llm_client import LLMClient
+from app.services.llm_cache import LLMResponseCache
+from app.services.single_flight import SingleFlight
+
+
+def test_cache_key_ignores_whitespace_but_not_model_or_params():
+    key = LLMResponseCache.make_key("groq:m", "Draft a notice.\r\n\n\n\nFacts:  tenant ", {"temperature": 0.7})
+
+    assert key == LLMResponseCache.make_key("groq:m", "Draft a notice.\n\nFacts: tenant", {"temperature": 0.7})
+    assert key != LLMResponseCache.make_key("groq:other", "Draft a notice.\n\nFacts: tenant", {"temperature": 0.7})
+    assert key != LLMResponseCache.make_key("groq:m", "Draft a notice.\n\nFacts: tenant", {"temperature": 0.2})
+
+
+def test_cache_evicts_least_recently_used_and_expires_entries(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "responses.sqlite"), max_entries=2)
+    cache.set("a", "m", "A")
+    cache.set("b", "m", "B")
+    assert cache.get("a", caller="research") == "A"
+    cache.set("c", "m", "C")
+
+    assert cache.get("b", caller="research") is None
+    assert cache.get("c", caller="ghost_typing") == "C"
+    assert cache.stats()["callers"]["research"] == {"hits": 1, "misses": 1, "bypasses": 0, "hit_rate": 0.5}
+
+    cache.ttl_seconds = -1
+    assert cache.get("a") is None
+
+
+def test_generate_serves_repeated_prompts_from_cache_unless_opted_out(tmp_path):
+    calls = []
+
+    async def _generate_uncached(prompt, use_groq=True, priority="standard"):
+        calls.append(prompt)
+        return f"answer {len(calls)}", "groq:llama-3.3-70b-versatile"
+
+    client = LLMClient.__new__(LLMClient)
+    client.response_cache = LLMResponseCache(str(tmp_path / "responses.sqlite"))
+    client.single_flight = SingleFlight("llm")
+    client.groq_client = object()
+    client.gemini_model = None
+    client._generate_uncached = _generate_uncached
+
+    first = asyncio.run(client.generate("What is Section 138?", caller="research"))
+    second = asyncio.run(client.generate("What is  Section 138?", caller="research"))
+    fresh = asyncio.run(client.generate("What is Section 138?", caller="ghost_typing", use_cache=False))
+
+    assert (first, second, fresh) == ("answer 1", "answer 1", "answer 2")
+    callers = client.response_cache.stats()["callers"]
+    assert callers["research"]["hits"] == 1
+    assert callers["ghost_typing"] == {"hits": 0, "misses": 0, "bypasses": 1, "hit_rate": 0.0}
+
+
+def test_generate_caches_a_gemini_fallback_under_gemini_not_groq(tmp_path):
+    calls = []
+
+    async def _generate_uncached(prompt, use_groq=True, priority="standard"):
+        calls.append(use_groq)
+        return "gemini answer", "gemini:gemini-1.5-flash"
+
+    client = LLMClient.__new__(LLMClient)
+    client.response_cache = LLMResponseCache(str(tmp_path / "responses.sqlite"))
+    client.single_flight = SingleFlight("llm")
+    client.groq_client = object()
+    client.gemini_model = SimpleNamespace(model_name="gemini-1.5-flash")
+    client._generate_uncached = _generate_uncached
+
+    asyncio.run(client.generate("What is Section 138?"))
+    asyncio.run(client.generate("What is Section 138?"))
+    gemini = asyncio.run(client.generate("What is Section 138?", use_groq=False))
+
+    # The Groq-first calls both miss; only a Gemini-first call is served.
+    assert calls == [True, True]
+    assert gemini == "gemini answer"
+
+
+def test_generate_stream_falls_back_before_first_chunk_and_caches_result(tmp_path):
+    async def _failing_groq(prompt, priority="standard"):
+        raise RuntimeError("rate_limit")
+        yield  # pragma: no cover
+
+    async def _gemini(prompt):
+        for chunk in ["Sec", "tion 138"]:
+            yield chunk
+
+    client = LLMClient.__new__(LLMClient)
+    client.response_cache = LLMResponseCache(str(tmp_path / "responses.sqlite"))
+    client.groq_client = object()
+    client.gemini_model = SimpleNamespace(model_name="gemini-1.5-flash")
+    client._stream_with_groq = _failing_groq
+    client._stream_with_gemini = _gemini
+
+    async def _collect(use_groq=True):
+        return [chunk async for chunk in client.generate_stream("What is Section 138?", use_groq=use_groq)]
+
+    assert asyncio.run(_collect()) == ["Sec", "tion 138"]
+    # Cached under Gemini, which produced it, not under Groq.
+    assert asyncio.run(_collect(use_groq=False)) == ["Section 138"]
+    assert asyncio.run(_collect()) == ["Sec", "tion 138"]
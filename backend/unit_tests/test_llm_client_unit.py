@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.agents.document_generator.llm_client import LLMClient
+from app.services.llm_scheduler import LLMKeyScheduler
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+
+class _FakeCompletions:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        usage = SimpleNamespace(total_tokens=50)
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+
+def _client(api_keys):
+    client = LLMClient.__new__(LLMClient)
+    client.groq_api_keys = api_keys
+    client._groq_loop = None
+    client._build_groq_clients()
+    client.groq_scheduler = LLMKeyScheduler(len(api_keys), requests_per_minute=10, tokens_per_minute=100000)
+    return client
+
+
+async def _clients(client):
+    return list(await client._groq_clients_for_loop())
+
+
+def test_groq_key_clients_share_one_pool_per_event_loop():
+    client = _client(["key-1", "key-2"])
+
+    first = asyncio.run(_clients(client))
+    second = asyncio.run(_clients(client))
+
+    assert first[0]._client is first[1]._client
+    assert second[0]._client is not first[0]._client
+    # The first loop's pool is closed once the second loop replaces it.
+    assert first[0]._client.is_closed
+    assert not second[0]._client.is_closed
+
+
+def test_call_groq_awaits_async_client_and_moves_past_rate_limited_key():
+    client = _client(["key-1", "key-2"])
+    limited, healthy = _FakeCompletions(error=_RateLimited("429 rate_limit")), _FakeCompletions()
+
+    async def _run():
+        clients = await client._groq_clients_for_loop()
+        clients[0].chat = SimpleNamespace(completions=limited)
+        clients[1].chat = SimpleNamespace(completions=healthy)
+        return await client.generate_with_groq("What is Section 138?")
+
+    assert asyncio.run(_run()) == "ok"
+    assert (limited.calls, healthy.calls) == (1, 1)
+    assert client.groq_scheduler.stats()[0]["rate_limited"] == 1
+
+
+def test_generate_with_groq_gives_up_on_rate_limits_and_refunds_the_estimate():
+    client = _client(["key-1", "key-2"])
+    limited = [_FakeCompletions(error=_RateLimited("429 rate_limit")) for _ in range(2)]
+
+    async def _run():
+        clients = await client._groq_clients_for_loop()
+        for key_client, completions in zip(clients, limited):
+            key_client.chat = SimpleNamespace(completions=completions)
+        try:
+            await client.generate_with_groq("What is Section 138?")
+        except _RateLimited:
+            return "rate limited"
+
+    assert asyncio.run(_run()) == "rate limited"
+    # One attempt per key, with no backoff retries on top.
+    assert [completions.calls for completions in limited] == [1, 1]
+    assert [key["rate_limited"] for key in client.groq_scheduler.stats()] == [1, 1]
+    assert all(key["tokens_available"] == 100000 for key in client.groq_scheduler.stats())
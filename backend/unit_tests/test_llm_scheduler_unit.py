@@ -0,0 +1,85 @@
+import asyncio
+
+from app.services.llm_scheduler import LLMKeyScheduler
+
+
+class _FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_acquire_spreads_load_and_skips_cooling_keys():
+    clock = _FakeClock()
+    scheduler = LLMKeyScheduler(3, requests_per_minute=2, tokens_per_minute=1000, clock=clock, sleep=clock.sleep)
+    scheduler.cool_down(1, retry_after=30)
+
+    async def _acquire_many():
+        return [await scheduler.acquire(100) for _ in range(4)]
+
+    picked = asyncio.run(_acquire_many())
+
+    assert sorted(picked) == [0, 0, 2, 2]
+    assert clock.sleeps == []
+
+
+def test_exhausted_pool_sleeps_until_first_key_refills():
+    clock = _FakeClock()
+    scheduler = LLMKeyScheduler(2, requests_per_minute=60, tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+    async def _acquire_many():
+        return [await scheduler.acquire(600) for _ in range(3)]
+
+    picked = asyncio.run(_acquire_many())
+
+    # Each call drains a key's whole token budget; the third waits for a refill.
+    assert picked[:2] in ([0, 1], [1, 0])
+    assert clock.sleeps and abs(sum(clock.sleeps) - 60.0) < 1e-6
+
+
+def test_interactive_request_jumps_queued_background_work():
+    clock = _FakeClock()
+    scheduler = LLMKeyScheduler(1, requests_per_minute=10, tokens_per_minute=100000, clock=clock, sleep=clock.sleep)
+    order = []
+
+    async def _acquire(name, priority):
+        await scheduler.acquire(10, priority)
+        order.append(name)
+
+    async def _run():
+        # Background may only take 5 of the 10 requests: the rest is the
+        # interactive and standard reserve.
+        background = [asyncio.create_task(_acquire(f"bg{i}", "background")) for i in range(6)]
+        await asyncio.sleep(0)
+        await _acquire("interactive", "interactive")
+        await asyncio.gather(*background)
+
+    asyncio.run(_run())
+
+    assert order[:6] == ["bg0", "bg1", "bg2", "bg3", "bg4", "interactive"]
+    assert order[6] == "bg5"
+    stats = scheduler.queue_stats()
+    assert stats["interactive"]["max_wait_ms"] == 0.0
+    assert stats["background"]["granted"] == 6 and stats["background"]["max_wait_ms"] > 0
+
+
+def test_cap_share_limits_a_background_process_to_part_of_each_key():
+    clock = _FakeClock()
+    scheduler = LLMKeyScheduler(1, requests_per_minute=8, tokens_per_minute=100000, clock=clock, sleep=clock.sleep)
+    scheduler.cap_share(0.25)
+
+    async def _acquire_many():
+        for _ in range(3):
+            await scheduler.acquire(10, "interactive")
+
+    asyncio.run(_acquire_many())
+
+    # Two requests fit in a quarter of 8 rpm; the third waits for a refill.
+    assert abs(sum(clock.sleeps) - 30.0) < 1e-6
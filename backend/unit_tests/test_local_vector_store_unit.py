@@ -0,0 +1,88 @@
+import json
+
+import numpy as np
+
+from app.db.local_vector_store import LocalCollection
+
+
+def _random_corpus(n_rows=300, dim=16, seed=7):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n_rows, dim)).astype(np.float32)
+
+
+def test_query_matches_brute_force_cosine_top_k(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.db.local_vector_store.SEARCH_BLOCK_ROWS", 64)
+    vectors = _random_corpus()
+    collection = LocalCollection(str(tmp_path / "local_legal"), name="legal")
+    collection.add(
+        ids=[f"c{i}" for i in range(len(vectors))],
+        embeddings=vectors,
+        documents=[f"chunk {i}" for i in range(len(vectors))],
+        metadatas=[{"section": str(i), "act_name": "NI Act"} if i % 2 else {"section": str(i)} for i in range(len(vectors))],
+    )
+    queries = _random_corpus(n_rows=3, seed=11)
+
+    result = collection.query(queries, n_results=5, include=["documents", "metadatas", "embeddings", "distances"])
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    for row, query in enumerate(queries):
+        expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+        assert result["ids"][row] == [f"c{i}" for i in expected]
+        assert result["embeddings"][row].shape == (5, 16)
+    assert result["metadatas"][0][0]["section"] == result["ids"][0][0][1:]
+    assert all(np.diff(result["distances"][0]) >= 0)
+
+
+def test_collection_persists_and_reloads_float16(tmp_path):
+    path = str(tmp_path / "local_legal")
+    vectors = _random_corpus(n_rows=10)
+    writer = LocalCollection(path, dtype="float16")
+    writer.add(ids=[f"c{i}" for i in range(10)], embeddings=vectors, metadatas=[{"doc_type": "statute"}] * 10)
+    writer.add(ids=["c0", "c10"], embeddings=_random_corpus(n_rows=2, seed=3))
+
+    reader = LocalCollection(path)
+    stored = reader.get(ids=["c10", "c3"], include=["metadatas", "embeddings"])
+
+    assert reader.count() == 11
+    assert stored["ids"] == ["c10", "c3"]
+    assert stored["metadatas"] == [{}, {"doc_type": "statute"}]
+    assert np.allclose(stored["embeddings"][1], vectors[3], atol=1e-2)
+
+
+def test_reader_catches_up_on_appended_rows_and_ignores_unaccounted_bytes(tmp_path):
+    path = str(tmp_path / "local_legal")
+    vectors = _random_corpus(n_rows=6)
+    writer = LocalCollection(path)
+    writer.add(ids=["c0", "c1", "c2"], embeddings=vectors[:3], documents=["a", "b", "c"])
+    reader = LocalCollection(path)
+    # A crashed writer's partial batch, never recorded in meta.json.
+    with open(tmp_path / "local_legal" / "rows.jsonl", "ab") as f:
+        f.write(b'["lost","x",{}]\n')
+
+    writer.add(ids=["c3", "c4", "c5"], embeddings=vectors[3:], documents=["d", "e", "f"], metadatas=[{"act_name": "NI Act"}] * 3)
+
+    assert reader.count() == 6
+    assert reader.get(ids=["c4"], include=["documents", "metadatas"]) == {
+        "ids": ["c4"], "documents": ["e"], "metadatas": [{"act_name": "NI Act"}], "embeddings": None,
+    }
+    assert reader.query(vectors[5:], n_results=1, include=[])["ids"] == [["c5"]]
+    assert LocalCollection(path).get(include=[])["ids"] == [f"c{i}" for i in range(6)]
+
+
+def test_collection_written_with_json_sidecars_is_converted_on_add(tmp_path):
+    path = tmp_path / "local_legal"
+    path.mkdir()
+    vectors = _random_corpus(n_rows=3)
+    vectors[:2].tofile(path / "vectors.bin")
+    (path / "ids.json").write_text(json.dumps(["c0", "c1"]))
+    (path / "documents.json").write_text(json.dumps(["a", "b"]))
+    (path / "metadata_columns.json").write_text(json.dumps({"section": ["1", None]}))
+    (path / "meta.json").write_text(json.dumps({"dim": 16, "dtype": "float32", "count": 2}))
+
+    collection = LocalCollection(str(path))
+    collection.add(ids=["c2"], embeddings=vectors[2:], documents=["c"])
+
+    reloaded = LocalCollection(str(path))
+    assert not (path / "ids.json").exists()
+    assert reloaded.get(include=["documents", "metadatas"])["metadatas"] == [{"section": "1"}, {}, {}]
+    assert reloaded.get(include=["documents"])["documents"] == ["a", "b", "c"]
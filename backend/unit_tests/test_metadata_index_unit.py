@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from app.agents.legal_research.metadata_index import (
+    MetadataFilter,
+    MetadataIndex,
+    metadata_date_ordinal,
+)
+from app.db.local_vector_store import LocalCollection
+from app.services.legal_corpus_catalog import (
+    catalog_chunk_metadata,
+    get_legal_research_act_catalog,
+)
+
+_METADATAS = [
+    {"act_name": "Maharashtra Rent Control Act", "jurisdiction": "Maharashtra", "doc_type": "statute"},
+    {"act_name": "NI Act", "jurisdiction": "India", "doc_type": "statute"},
+    {"title": "A v. B", "jurisdiction": "Maharashtra", "doc_type": "judgment", "judgment_date": "2021-03-04"},
+    {"title": "C v. D", "jurisdiction": "Maharashtra", "doc_type": "judgment", "judgment_date": "2015-07-01"},
+]
+
+
+def test_index_intersects_postings_and_date_ranges(tmp_path):
+    index = MetadataIndex(str(tmp_path / "metadata_legal.json"))
+    index.add(["s1", "s2", "j1", "j2"], _METADATAS)
+    index.save()
+    reloaded = MetadataIndex(str(tmp_path / "metadata_legal.json"))
+
+    maharashtra = MetadataFilter.from_mapping({"jurisdiction": "Maharashtra", "doc_type": ["statute", "judgment"]})
+    recent = MetadataFilter.from_mapping({"jurisdiction": "Maharashtra", "date_from": "2020-01-01"})
+
+    assert reloaded.matching_ids(maharashtra) == {"s1", "j1", "j2"}
+    assert reloaded.matching_ids(recent) == {"j1"}
+    assert recent.to_where() == {"$and": [{"jurisdiction": "Maharashtra"}, {"date_ordinal": {"$gte": 20200101}}]}
+    assert MetadataFilter.from_mapping({"jurisdiction": None}) is None
+    with pytest.raises(ValueError):
+        MetadataFilter.from_mapping({"court": "Bombay HC"})
+
+
+def test_catalog_chunks_carry_a_filterable_priority(tmp_path):
+    catalog = get_legal_research_act_catalog()
+    index = MetadataIndex(str(tmp_path / "metadata_legal.json"))
+    index.add(
+        [entry["name"] for entry in catalog],
+        [{"act_name": entry["name"], **catalog_chunk_metadata(entry)} for entry in catalog],
+    )
+
+    second = MetadataFilter.from_mapping({"priority": "Priority 2"})
+    expected = {entry["name"] for entry in catalog if entry["priority"] == "Priority 2"}
+
+    assert expected and index.matching_ids(second) == expected
+
+
+def test_local_collection_searches_only_rows_matching_where(tmp_path):
+    collection = LocalCollection(str(tmp_path / "local_legal"))
+    metadatas = [dict(metadata, date_ordinal=metadata_date_ordinal(metadata)) for metadata in _METADATAS]
+    collection.add(
+        ids=["s1", "s2", "j1", "j2"],
+        embeddings=np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.5, 0.5]]),
+        metadatas=metadatas,
+    )
+    where = MetadataFilter.from_mapping({"jurisdiction": ["Maharashtra"], "doc_type": "judgment"}).to_where()
+
+    result = collection.query([[1.0, 0.0]], n_results=3, include=[], where=where)
+    dated = collection.get(where={"date_ordinal": {"$gte": 20200101}}, include=[])
+
+    assert result["ids"] == [["j2", "j1"]]
+    assert dated["ids"] == ["j1"]
+
+
+def test_local_collection_answers_where_from_the_metadata_index(tmp_path):
+    index = MetadataIndex(str(tmp_path / "metadata_legal.json"))
+    index.add(["s1", "s2", "j1", "j2"], _METADATAS)
+    collection = LocalCollection(str(tmp_path / "local_legal"), metadata_index=index)
+    # Rows carry no filter fields of their own: matches can only come from the index.
+    collection.add(ids=["s1", "s2", "j1", "j2"], embeddings=np.array([[1.0, 0.0], [0.9, 0.1], [0.0, 1.0], [0.5, 0.5]]))
+    where = MetadataFilter.from_mapping({"jurisdiction": "Maharashtra", "date_to": "2020-12-31"}).to_where()
+
+    result = collection.query([[1.0, 0.0]], n_results=3, include=[], where=where)
+    statutes = collection.get(where={"doc_type": {"$ne": "judgment"}}, include=[])
+
+    assert result["ids"] == [["j2"]]
+    assert statutes["ids"] == ["s1", "s2"]
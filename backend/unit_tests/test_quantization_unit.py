@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.db.local_vector_store import LocalCollection
+
+
+def _clustered_corpus(n_rows=600, dim=32, seed=3):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((12, dim)).astype(np.float32)
+    return centers[rng.integers(0, 12, size=n_rows)] + 0.4 * rng.standard_normal((n_rows, dim)).astype(np.float32)
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_rescores_to_float_results(tmp_path, quantization):
+    vectors = _clustered_corpus()
+    collection = LocalCollection(str(tmp_path / "local_legal"), quantization=quantization)
+    collection.add(ids=[f"c{i}" for i in range(len(vectors))], embeddings=vectors)
+    queries = vectors[:20] + 0.05
+
+    exact = LocalCollection(str(tmp_path / "local_legal")).query(queries, n_results=5, include=["distances"])
+    quantized = collection.query(queries, n_results=5, include=["distances"])
+
+    recall = np.mean([len(set(a) & set(b)) / 5 for a, b in zip(exact["ids"], quantized["ids"])])
+    assert recall >= 0.9
+    # Re-scored distances are the float ones, not approximations.
+    assert np.allclose(quantized["distances"][0][0], exact["distances"][0][0], atol=1e-6)
+
+
+def test_codes_are_persisted_and_built_for_existing_rows(tmp_path):
+    path = str(tmp_path / "local_legal")
+    vectors = _clustered_corpus(n_rows=50)
+    LocalCollection(path).add(ids=[f"c{i}" for i in range(40)], embeddings=vectors[:40])
+
+    collection = LocalCollection(path, quantization="int8")
+    collection.add(ids=[f"c{i}" for i in range(40, 50)], embeddings=vectors[40:])
+    stats = LocalCollection(path, quantization="int8").memory_stats()
+
+    assert stats["code_bytes"] == 50 * 32
+    assert stats["float_vector_bytes"] == 50 * 32 * 4
+    assert (tmp_path / "local_legal" / "codes_int8.bin").stat().st_size == 50 * 32
+
+
+def test_reader_extends_codes_with_rows_another_writer_appended(tmp_path):
+    path = str(tmp_path / "local_legal")
+    vectors = _clustered_corpus(n_rows=60)
+    writer = LocalCollection(path, quantization="int8")
+    writer.add(ids=[f"c{i}" for i in range(30)], embeddings=vectors[:30])
+    reader = LocalCollection(path, quantization="int8")
+
+    writer.add(ids=[f"c{i}" for i in range(30, 60)], embeddings=vectors[30:])
+    result = reader.query(vectors[45:46], n_results=1, include=[])
+
+    assert result["ids"] == [["c45"]]
+    assert reader.memory_stats()["code_bytes"] == 60 * 32
@@ -0,0 +1,193 @@
+import asyncio
+
+import numpy as np
+
+from app.agents.legal_research.metadata_index import MetadataIndex
+from app.services import retrieval_service as retrieval_module
+from app.services.retrieval_cache import (
+    CorpusVersion,
+    LocalLRUCache,
+    RetrievalCache,
+    get_corpus_version,
+)
+from app.services.retrieval_service import RetrievalService
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.rows = {
+            "c1": ("Negotiable Instruments Act Section 138 dishonour of cheque", {"act_name": "NI Act", "section": "138"}, [1.0, 0.0]),
+            "c2": ("Negotiable Instruments Act Section 139 presumption", {"act_name": "NI Act", "section": "139"}, [0.6, 0.8]),
+            "c3": ("Limitation Act Section 3 bar of limitation", {"act_name": "Limitation Act", "section": "3"}, [0.0, 1.0]),
+        }
+        self.query_calls = []
+        self.where_calls = []
+
+    def query(self, query_embeddings, n_results, include, where=None):
+        self.query_calls.append(include)
+        self.where_calls.append(where)
+        ids = [i for i in ["c1", "c2"] if where is None or self.rows[i][1]["act_name"] == where["act_name"]][:n_results]
+        rows = len(query_embeddings)
+        return {
+            "ids": [ids] * rows,
+            "documents": [[self.rows[i][0] for i in ids]] * rows,
+            "metadatas": [[self.rows[i][1] for i in ids]] * rows,
+            "embeddings": [np.array([self.rows[i][2] for i in ids])] * rows,
+            "distances": [[0.0, 0.4][: len(ids)]] * rows,
+        }
+
+    def get(self, ids, include):
+        ids = list(reversed(ids))
+        return {
+            "ids": ids,
+            "documents": [self.rows[i][0] for i in ids],
+            "metadatas": [self.rows[i][1] for i in ids],
+            "embeddings": np.array([self.rows[i][2] for i in ids]),
+        }
+
+
+class _FakeSparseIndex:
+    def search(self, query, k, doc_ids=None):
+        return [(i, score) for i, score in [("c3", 4.2), ("c1", 2.0)] if doc_ids is None or i in doc_ids]
+
+
+class _FakeSectionIndex:
+    def __init__(self, entries=None):
+        self.entries = entries or {}
+
+    def lookup_query(self, query):
+        return list(self.entries.get(query, []))
+
+
+def _service_with_fakes(monkeypatch, collection, section_index=None, cache=None, persist_directory="chroma_db"):
+    service = RetrievalService(
+        persist_directory=persist_directory,
+        cache=cache or RetrievalCache(LocalLRUCache(), enabled=False),
+    )
+    monkeypatch.setattr(service, "get_collection", lambda: collection)
+    monkeypatch.setattr(service, "get_sparse_index", lambda: _FakeSparseIndex())
+    monkeypatch.setattr(service, "get_section_index", lambda: section_index or _FakeSectionIndex())
+    monkeypatch.setattr(service, "embed_query", lambda query: np.array([1.0, 0.0], dtype=np.float32))
+    return service
+
+
+def test_hybrid_retrieval_reuses_stored_embeddings(monkeypatch):
+    collection = _FakeCollection()
+    service = _service_with_fakes(monkeypatch, collection)
+    monkeypatch.setattr(
+        retrieval_module,
+        "get_embedding_model",
+        lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("candidates must not be re-embedded")),
+    )
+
+    docs = service.retrieve_documents("Section 138 NI Act", strategy="hybrid", k=3)
+
+    assert [doc.metadata["section"] for doc in docs][0] == "138"
+    assert {doc.metadata["section"] for doc in docs} == {"138", "139", "3"}
+    assert "embeddings" in collection.query_calls[0]
+
+
+def test_batch_retrieval_sends_one_vector_store_request_and_dedupes(monkeypatch):
+    collection = _FakeCollection()
+    service = _service_with_fakes(monkeypatch, collection)
+    monkeypatch.setattr(
+        service,
+        "embed_queries",
+        lambda queries: np.tile(np.array([1.0, 0.0], dtype=np.float32), (len(queries), 1)),
+    )
+
+    docs = service.retrieve_documents_batch(
+        ["cheque dishonour", "NI Act", "NI Act Section 138"],
+        strategy="dense",
+        k=2,
+    )
+
+    assert len(collection.query_calls) == 1
+    assert [doc.metadata["section"] for doc in docs] == ["138", "139"]
+
+
+def test_citation_queries_skip_embedding_and_pin_exact_chunks(monkeypatch):
+    collection = _FakeCollection()
+    service = _service_with_fakes(
+        monkeypatch,
+        collection,
+        section_index=_FakeSectionIndex({"Section 139 NI Act": ["c2"]}),
+    )
+    monkeypatch.setattr(
+        service,
+        "embed_queries",
+        lambda queries: (_ for _ in ()).throw(AssertionError("citation queries must not be embedded")),
+    )
+
+    docs = service.retrieve_documents("Section 139 NI Act", strategy="hybrid", k=3)
+
+    assert [doc.metadata["section"] for doc in docs] == ["139", "3", "138"]
+    assert collection.query_calls == []
+
+
+def test_async_retrieval_matches_sync_results(monkeypatch):
+    collection = _FakeCollection()
+    service = _service_with_fakes(monkeypatch, collection)
+
+    sync_docs = service.retrieve_documents("cheque dishonour", strategy="hybrid", k=3)
+    async_docs = asyncio.run(service.aretrieve_documents("cheque dishonour", strategy="hybrid", k=3))
+
+    assert [doc.id for doc in async_docs] == [doc.id for doc in sync_docs]
+    assert len(collection.query_calls) == 2
+
+
+def test_cached_results_are_invalidated_by_corpus_version(monkeypatch, tmp_path):
+    collection = _FakeCollection()
+    cache = RetrievalCache(LocalLRUCache(max_entries=8, ttl_seconds=60))
+    service = _service_with_fakes(monkeypatch, collection, cache=cache, persist_directory=str(tmp_path))
+
+    first = service.retrieve_documents("Cheque  dishonour", strategy="dense", k=2)
+    second = service.retrieve_documents("cheque dishonour", strategy="dense", k=2)
+    get_corpus_version(str(tmp_path), service.collection_name).bump()
+    service.retrieve_documents("cheque dishonour", strategy="dense", k=2)
+
+    assert [doc.id for doc in second] == [doc.id for doc in first]
+    assert len(collection.query_calls) == 2
+    assert cache.metrics()["hits"] == 1
+    assert cache.metrics()["misses"] == 2
+
+
+def test_corpus_version_bumps_a_file_written_by_another_process(tmp_path):
+    path = tmp_path / "corpus_version_legal"
+    path.write_text("3")
+    version = CorpusVersion(str(path))
+
+    assert version.bump() == 4
+    path.write_text("9")
+    assert version.bump() == 10
+    assert CorpusVersion(str(path)).get() == 10
+
+
+def test_filters_restrict_dense_sparse_and_cache_keys(monkeypatch, tmp_path):
+    collection = _FakeCollection()
+    cache = RetrievalCache(LocalLRUCache(), enabled=True)
+    service = _service_with_fakes(monkeypatch, collection, cache=cache)
+    metadata_index = MetadataIndex(str(tmp_path / "metadata_legal.json"))
+    metadata_index.add(list(collection.rows), [row[1] for row in collection.rows.values()])
+    monkeypatch.setattr(service, "get_metadata_index", lambda: metadata_index)
+
+    unfiltered = service.retrieve_documents("cheque bounce", strategy="hybrid", k=3)
+    filtered = service.retrieve_documents("cheque bounce", strategy="hybrid", k=3, filters={"act_name": "Limitation Act"})
+
+    assert {doc.metadata["act_name"] for doc in unfiltered} == {"NI Act", "Limitation Act"}
+    assert [doc.id for doc in filtered] == ["c3"]
+    assert collection.where_calls == [None, {"act_name": "Limitation Act"}]
+
+
+def test_async_chroma_http_moves_ingestion_and_sync_reads_to_the_same_server(monkeypatch):
+    from app.db import vector_db
+
+    server = object()
+    monkeypatch.setattr(vector_db, "get_vector_db", lambda: server)
+    monkeypatch.setattr(vector_db.settings, "VECTOR_STORE_BACKEND", "chroma")
+
+    monkeypatch.setattr(vector_db.settings, "CHROMA_ASYNC_HTTP", False)
+    assert vector_db.chroma_client_options("/data/chroma_db") == {"persist_directory": "/data/chroma_db"}
+
+    monkeypatch.setattr(vector_db.settings, "CHROMA_ASYNC_HTTP", True)
+    assert vector_db.chroma_client_options("/data/chroma_db") == {"client": server}
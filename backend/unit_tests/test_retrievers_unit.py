@@ -16,7 +16,7 @@ def test_get_hybrid_retriever_builds_dense_and_sparse_retrievers():
         {"page_content": "Cheque dishonour procedure", "metadata": {"source": "s2"}},
     ]
 
-    with patch.object(_MODULE, "SentenceTransformerEmbeddings") as MockEmbeddings, \
+    with patch.object(_MODULE, "get_embedding_model") as MockEmbeddings, \
          patch.object(_MODULE, "Chroma") as MockChroma, \
          patch.object(_MODULE, "BM25Retriever") as MockBM25:
 
@@ -44,7 +44,7 @@ def test_ensemble_retriever_contract_has_invoke():
         {"page_content": "A", "metadata": {"id": 1}},
     ]
 
-    with patch.object(_MODULE, "SentenceTransformerEmbeddings"), \
+    with patch.object(_MODULE, "get_embedding_model"), \
          patch.object(_MODULE, "Chroma") as MockChroma, \
          patch.object(_MODULE, "BM25Retriever") as MockBM25:
 
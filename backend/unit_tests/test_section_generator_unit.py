@@ -0,0 +1,52 @@
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+
+def _load_section_generator(generate_document):
+    # llm_service loads a tiktoken vocabulary at import; stand it in.
+    module_path = Path(__file__).resolve().parents[1] / "app" / "agents" / "document_generator" / "section_generator.py"
+    llm_service_mod = ModuleType("app.services.llm_service")
+    llm_service_mod.llm_service = SimpleNamespace(generate_document=generate_document)
+
+    old = sys.modules.get("app.services.llm_service")
+    try:
+        sys.modules["app.services.llm_service"] = llm_service_mod
+        spec = importlib.util.spec_from_file_location("section_generator_under_test", module_path)
+        module = importlib.util.module_from_spec(spec)
+        assert spec and spec.loader
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        if old is None:
+            sys.modules.pop("app.services.llm_service", None)
+        else:
+            sys.modules["app.services.llm_service"] = old
+
+
+def test_sections_run_concurrently_keep_order_and_report_failed_sections():
+    active = {"now": 0, "peak": 0}
+
+    async def _generate_document(case_facts, template):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        # Later sections finish first.
+        await asyncio.sleep(0.01 * (5 - int(template[-1])))
+        active["now"] -= 1
+        if template == "clause 3":
+            raise RuntimeError("rate_limit")
+        return template.upper()
+
+    module = _load_section_generator(_generate_document)
+    template = module.SECTION_SEPARATOR.join(f"clause {idx}" for idx in range(5))
+
+    with pytest.raises(module.SectionGenerationError) as excinfo:
+        asyncio.run(module.generate_sections(template, {}, max_concurrency=3))
+
+    assert excinfo.value.sections == ["CLAUSE 0", "CLAUSE 1", "CLAUSE 2", "clause 3", "CLAUSE 4"]
+    assert excinfo.value.failed_sections == [4]
+    assert active["peak"] == 3
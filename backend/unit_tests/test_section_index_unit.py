@@ -0,0 +1,40 @@
+from app.agents.legal_research.section_index import SectionIndex, parse_citations
+
+
+def test_parse_citations_resolves_act_aliases():
+    assert parse_citations("Section 138 NI Act") == [("Negotiable Instruments Act, 1881", "138")]
+    assert parse_citations("What is cheque dishonour?") == []
+
+
+def test_lookup_by_alias_survives_reload(tmp_path):
+    index_path = str(tmp_path / "sections_legal_judgments.json")
+    index = SectionIndex(index_path)
+    index.add(
+        ["c1", "c2", "c3"],
+        [
+            {"act_name": "Negotiable Instruments Act, 1881", "section": "138"},
+            {"act_name": "Negotiable Instruments Act, 1881", "section": "Preamble"},
+            {"act_name": "Limitation Act, 1963", "section": "3"},
+        ],
+    )
+    index.save()
+
+    reloaded = SectionIndex(index_path)
+
+    assert reloaded.lookup("NI Act", "138") == ["c1"]
+    assert reloaded.lookup_query("sec. 138 of the NI Act") == ["c1"]
+    assert len(reloaded) == 2
+
+
+def test_flushed_entries_replay_from_delta_log_and_old_files_still_load(tmp_path):
+    index_path = tmp_path / "sections_legal_judgments.json"
+    index_path.write_text('{"negotiable instruments act 1881|138": ["c1"]}')
+    index = SectionIndex(str(index_path))
+    index.add(["c2"], [{"act_name": "Limitation Act, 1963", "section": "3"}])
+    index.flush()
+
+    reloaded = SectionIndex(str(index_path))
+
+    assert reloaded.lookup("NI Act", "138") == ["c1"]
+    assert reloaded.lookup("Limitation Act", "3") == ["c2"]
+    assert index_path.read_text() == '{"negotiable instruments act 1881|138": ["c1"]}'
@@ -0,0 +1,21 @@
+import numpy as np
+
+from app.services.semantic_answer_cache import SemanticAnswerCache
+
+
+def test_paraphrase_with_same_sources_hits_and_other_sources_miss():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store(np.array([1.0, 0.0]), ["c1", "c2"], {"answer": "A", "sources": []}, "legal", 3)
+
+    assert cache.lookup(np.array([0.95, 0.1]), ["c2", "c1"], "legal", 3)["answer"] == "A"
+    assert cache.lookup(np.array([0.95, 0.1]), ["c1", "c3"], "legal", 3) is None
+    assert cache.lookup(np.array([0.0, 1.0]), ["c1", "c2"], "legal", 3) is None
+
+
+def test_corpus_version_change_invalidates_answers():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store(np.array([1.0, 0.0]), ["c1"], {"answer": "A", "sources": []}, "legal", 3)
+
+    assert cache.lookup(np.array([1.0, 0.0]), ["c1"], "legal", 4) is None
+    cache.store(np.array([0.0, 1.0]), ["c2"], {"answer": "B", "sources": []}, "legal", 4)
+    assert cache.stats()["entries"] == 1
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def _fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"result {key}"
+
+    async def _run():
+        return await asyncio.gather(
+            flight.do("a", lambda: _fetch("a")),
+            flight.do("a", lambda: _fetch("a")),
+            flight.do("b", lambda: _fetch("b")),
+        )
+
+    assert asyncio.run(_run()) == ["result a", "result a", "result b"]
+    assert calls == ["a", "b"]
+    assert flight.stats() == {"calls": 3, "shared": 1, "in_flight": 0, "dedupe_rate": 0.3333}
+
+
+def test_cancelled_waiter_does_not_cancel_call_for_others():
+    flight = SingleFlight("test")
+    started = []
+
+    async def _slow():
+        started.append(True)
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def _run():
+        first = asyncio.create_task(flight.do("k", _slow))
+        second = asyncio.create_task(flight.do("k", _slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(_run()) == "done"
+    assert started == [True]
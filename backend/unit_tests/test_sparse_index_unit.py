@@ -0,0 +1,83 @@
+import importlib.util
+from pathlib import Path
+
+_INDEX_PATH = Path(__file__).resolve().parents[1] / "app" / "agents" / "legal_research" / "sparse_index.py"
+_SPEC = importlib.util.spec_from_file_location("sparse_index_under_test", _INDEX_PATH)
+_MODULE = importlib.util.module_from_spec(_SPEC)
+assert _SPEC and _SPEC.loader
+_SPEC.loader.exec_module(_MODULE)
+
+
+def test_bm25_index_ranks_lexical_match_and_survives_reload(tmp_path):
+    index = _MODULE.BM25Index(str(tmp_path / "bm25"))
+    index.add(
+        ["c1", "c2", "c3"],
+        [
+            "Section 138 dishonour of cheque for insufficiency of funds",
+            "Section 16 landlord entitled to recover possession on eviction grounds",
+            "An Act to consolidate the law relating to rent control",
+        ],
+    )
+    index.save()
+
+    reloaded = _MODULE.BM25Index(str(tmp_path / "bm25"))
+    hits = reloaded.search("eviction of tenant by landlord", k=2)
+
+    assert len(reloaded) == 3
+    assert hits[0][0] == "c2"
+
+
+def test_bm25_index_searches_pending_and_persisted_segments(tmp_path):
+    index = _MODULE.BM25Index(str(tmp_path / "bm25"))
+    index.add(["c1"], ["probate of a will under the succession act"])
+    index.save()
+    index.add(["c2"], ["cheque dishonour complaint limitation"])
+
+    assert index.search("cheque dishonour", k=5)[0][0] == "c2"
+    assert index.search("probate", k=5)[0][0] == "c1"
+
+    index.save()
+    assert not index.has_pending
+    assert {doc_id for doc_id, _ in index.search("cheque probate", k=5)} == {"c1", "c2"}
+
+
+def test_bm25_flush_appends_a_delta_that_other_processes_replay(tmp_path):
+    writer = _MODULE.BM25Index(str(tmp_path / "bm25"))
+    writer.add(["c1"], ["probate of a will under the succession act"])
+    writer.save()
+    reader = _MODULE.BM25Index(str(tmp_path / "bm25"))
+    base_mtime = (tmp_path / "bm25" / "meta.json").stat().st_mtime_ns
+
+    writer.add(["c2"], ["cheque dishonour complaint limitation"])
+    writer.flush()
+    reader.refresh_if_stale()
+
+    # The batch went to the delta log; the merged postings were not rewritten.
+    assert (tmp_path / "bm25" / "meta.json").stat().st_mtime_ns == base_mtime
+    assert reader.search("cheque dishonour", k=5)[0][0] == "c2"
+
+    writer.save()
+    reader.refresh_if_stale()
+    assert not list((tmp_path / "bm25").glob("*.jsonl"))
+    assert len(reader) == 2 and len(_MODULE.BM25Index(str(tmp_path / "bm25"))) == 2
+
+
+def test_bm25_save_publishes_a_new_generation_without_touching_the_live_one(tmp_path):
+    writer = _MODULE.BM25Index(str(tmp_path / "bm25"))
+    writer.add(["c1"], ["probate of a will under the succession act"])
+    writer.save()
+    reader = _MODULE.BM25Index(str(tmp_path / "bm25"))
+
+    writer.add(["c2"], ["cheque dishonour complaint limitation"])
+    writer.save()
+    # The reader has not refreshed: its offsets still match its own postings.
+    assert [doc_id for doc_id, _ in reader.search("probate will", k=5)] == ["c1"]
+    assert reader.search("cheque", k=5) == []
+
+    writer.add(["c3"], ["eviction of a tenant by the landlord"])
+    writer.save()
+    names = sorted(path.name for path in (tmp_path / "bm25").glob("postings_docs.*.npy"))
+    assert names == ["postings_docs.2.npy", "postings_docs.3.npy"]
+
+    reader.refresh_if_stale()
+    assert len(reader) == 3 and reader.search("tenant eviction", k=5)[0][0] == "c3"